@@ -0,0 +1,65 @@
+"""Replays a long random chess game, checking the draw rules after every ply.
+
+Threefold repetition and insufficient material are checked after every
+move of a game, so they should stay cheap no matter how long the game
+has been going for.
+
+Run from the root of the repo:
+    python -m benchmarks.chess_draws
+"""
+
+import argparse
+import random
+import time
+
+import Chessnut as chessnut
+
+from cogs.games.chess import Game
+
+
+def random_game(plies, rng):
+    """Return up to `plies` random legal moves, ignoring the draw rules."""
+    game = chessnut.Game()
+    moves = []
+    while len(moves) < plies:
+        legal = game.get_moves()
+        if not legal:
+            break
+
+        move = rng.choice(legal)
+        game.apply_move(move)
+        moves.append(move)
+    return moves
+
+
+def replay(moves):
+    game = Game()
+    moving = checking = 0
+    draws = 0
+    for move in moves:
+        start = time.perf_counter()
+        game.apply_move(move)
+        moving += time.perf_counter() - start
+
+        start = time.perf_counter()
+        draw = game.insufficient_material() or game.threefold_repetition()
+        checking += time.perf_counter() - start
+        draws += draw
+
+    return moving, checking, draws
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--plies', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=2)
+    args = parser.parse_args()
+
+    moves = random_game(args.plies, random.Random(args.seed))
+    moving, checking, draws = replay(moves)
+    print(f'{len(moves)} plies: moves took {moving * 1e3:.2f} ms, '
+          f'draw checks took {checking * 1e3:.3f} ms, {draws} plies were drawn')
+
+
+if __name__ == '__main__':
+    main()
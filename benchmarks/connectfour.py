@@ -0,0 +1,70 @@
+"""Measures the Connect 4 computer opponent's search.
+
+This reports how deep best_move gets from the empty board and how many
+nodes per second it searches, then plays it against a random player.
+
+Run from the root of the repo:
+    python -m benchmarks.connectfour
+"""
+
+import argparse
+import random
+import time
+
+from cogs.games.connectfourengine import NUM_COLS, NUM_ROWS, best_move, bit, has_four
+
+
+def search_empty_board(time_limit):
+    start = time.perf_counter()
+    column, depth, nodes = best_move(0, 0, time_limit=time_limit)
+    elapsed = time.perf_counter() - start
+    print(f'Empty board: column {column}, depth {depth}, {nodes} nodes '
+          f'in {elapsed:.2f}s ({nodes / elapsed:,.0f} nodes/s)')
+
+
+def play_random(games, time_limit, rng):
+    """Return (wins, losses, draws) for the computer against a random player."""
+    wins = losses = draws = 0
+    for game in range(games):
+        pieces = [0, 0]
+        heights = [0] * NUM_COLS
+        computer = game % 2
+        player = 0
+
+        for _ in range(NUM_ROWS * NUM_COLS):
+            if player == computer:
+                column, _, _ = best_move(pieces[player], pieces[not player], time_limit=time_limit)
+            else:
+                column = rng.choice([c for c in range(NUM_COLS) if heights[c] < NUM_ROWS])
+
+            pieces[player] |= bit(column, heights[column])
+            heights[column] += 1
+            if has_four(pieces[player]):
+                if player == computer:
+                    wins += 1
+                else:
+                    losses += 1
+                break
+            player ^= 1
+        else:
+            draws += 1
+
+    return wins, losses, draws
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--time-limit', type=float, default=1.5)
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--game-time-limit', type=float, default=0.1,
+                        help='time limit per move in the games against a random player')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    search_empty_board(args.time_limit)
+    wins, losses, draws = play_random(args.games, args.game_time_limit, random.Random(args.seed))
+    print(f'Against a random player: {wins} won, {losses} lost, {draws} drawn')
+
+
+if __name__ == '__main__':
+    main()
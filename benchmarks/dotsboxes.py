@@ -0,0 +1,125 @@
+"""Compares drawing dots and boxes boards from scratch with drawing them
+incrementally, from 3x3 up to 20x20.
+
+The full redraw is how ImageBoard drew boards before _BoardRenderer,
+kept here so that the two can be compared.
+
+Run from the root of the repo:
+    python -m benchmarks.dotsboxes
+"""
+
+import argparse
+import io
+import itertools
+import random
+import string
+import time
+
+from PIL import Image, ImageDraw
+
+from cogs.games.dotsboxes import (
+    _XY_FONT, BACKGROUND_COLOUR, BOX_COLOURS, DOT_COLOUR, DOT_RADIUS, DOT_SIZE,
+    LINE_COLOURS, LINE_LENGTH, LINE_RADIUS, LINE_WIDTH, MARGIN_SIZE, TEXT_OFFSET,
+    Board, _BoardRenderer,
+)
+
+SIZES = [3, 5, 7, 10, 15, 20]
+_BASE = LINE_LENGTH + DOT_SIZE
+
+
+def full_redraw(horizontal, vertical, boxes):
+    """Draw the whole board from scratch and encode it, like ImageBoard used to."""
+    width, height = len(horizontal[0]), len(vertical)
+    grid = Image.new('RGBA', (_BASE * width + DOT_SIZE, _BASE * height + DOT_SIZE))
+    draw = ImageDraw.Draw(grid)
+
+    for y, row in enumerate(horizontal):
+        for x, owner in enumerate(row):
+            if owner is not None:
+                start_x, start_y = _BASE * x + DOT_SIZE, _BASE * y + DOT_RADIUS
+                coords = [start_x, start_y, start_x + LINE_LENGTH, start_y]
+                draw.line(coords, fill=LINE_COLOURS[owner], width=LINE_WIDTH)
+
+    for y, row in enumerate(vertical):
+        for x, owner in enumerate(row):
+            if owner is not None:
+                start_x, start_y = _BASE * x + DOT_RADIUS, _BASE * y + DOT_SIZE
+                coords = [start_x, start_y, start_x, start_y + LINE_LENGTH]
+                draw.line(coords, fill=LINE_COLOURS[owner], width=LINE_WIDTH)
+
+    for y, row in enumerate(boxes):
+        for x, owner in enumerate(row):
+            if owner is not None:
+                start_x, start_y = _BASE * x + DOT_RADIUS + LINE_RADIUS, _BASE * y + DOT_RADIUS + LINE_RADIUS
+                end_x, end_y = start_x + LINE_LENGTH + DOT_RADIUS, start_y + LINE_LENGTH + DOT_RADIUS
+                draw.rectangle([start_x, start_y, end_x, end_y], fill=BOX_COLOURS[owner])
+
+    for x, y in itertools.product(range(width + 1), range(height + 1)):
+        ex, ey = _BASE * x, _BASE * y
+        draw.ellipse([ex, ey, ex + DOT_SIZE, ey + DOT_SIZE], DOT_COLOUR)
+
+    grid_w, grid_h = grid.size
+    image = Image.new('RGBA', (grid_w + MARGIN_SIZE * 2, grid_h + MARGIN_SIZE * 2), BACKGROUND_COLOUR)
+    image.paste(grid, (MARGIN_SIZE, MARGIN_SIZE), mask=grid)
+    text_draw = ImageDraw.Draw(image)
+
+    for i, char in enumerate(string.ascii_uppercase[:width + 1]):
+        text_w, _ = text_draw.textsize(char, font=_XY_FONT)
+        text_draw.text((i * _BASE + MARGIN_SIZE + text_w // 4, TEXT_OFFSET), char, fill=0, font=_XY_FONT)
+    for i in range(height + 1):
+        text_draw.text((TEXT_OFFSET, i * _BASE + MARGIN_SIZE), str(i + 1), fill=0, font=_XY_FONT)
+
+    file = io.BytesIO()
+    image.save(file, 'png')
+    return file.getvalue()
+
+
+def random_game(size, moves, rng):
+    """Return the (horizontal, vertical, boxes) of a board after each move."""
+    board = Board(size, size)
+    spaces = [
+        *(((x, y), (x + 1, y)) for y, row in enumerate(board._horizontal) for x in range(len(row))),
+        *(((x, y), (x, y + 1)) for y, row in enumerate(board._vertical) for x in range(len(row))),
+    ]
+    rng.shuffle(spaces)
+
+    frames = []
+    for p1, p2 in spaces[:moves]:
+        board._make_line(p1, p2)
+        frames.append((
+            [row[:] for row in board._horizontal],
+            [row[:] for row in board._vertical],
+            [row[:] for row in board._boxes],
+        ))
+    return frames
+
+
+def bench(frames, render):
+    start = time.perf_counter()
+    sizes = [len(render(*frame)) for frame in frames]
+    elapsed = time.perf_counter() - start
+    return elapsed / len(frames) * 1e3, sum(sizes) / len(sizes) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--moves', type=int, default=40, help='moves to draw for each board')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print('Per move, averaged over the first moves of a random game:')
+    print(f'{"size":>7}  {"full redraw":>20}  {"incremental, RGB":>20}  {"incremental, palette":>20}')
+    for size in args.sizes:
+        frames = random_game(size, args.moves, random.Random(args.seed))
+        results = [
+            bench(frames, full_redraw),
+            bench(frames, _BoardRenderer(size, size, palette=False).render),
+            bench(frames, _BoardRenderer(size, size, palette=True).render),
+        ]
+        columns = (f'{ms:7.1f} ms ({kb:5.1f} KB)' for ms, kb in results)
+        print(f'{size:>3}x{size:<3}  ' + '  '.join(f'{c:>20}' for c in columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Replays synthetic member updates through Moderator.on_member_update.
+
+Most updates are nickname or presence changes that leave the roles as
+they were, so this measures how cheap those are, along with the few
+that add or remove a role.
+
+Run from the root of the repo:
+    python -m benchmarks.member_update
+"""
+
+import argparse
+import asyncio
+import collections
+import random
+import time
+
+from discord.utils import SnowflakeList
+
+from cogs.moderation.moderator import Moderator
+
+GUILD_ID = 1
+MUTED_ROLE_ID = 1000
+
+
+class FakeMember:
+    __slots__ = ('guild', '_roles')
+
+    def __init__(self, guild, roles):
+        self.guild = guild
+        self._roles = roles
+
+
+def make_updates(count, *, role_change_rate, rng):
+    guild = collections.namedtuple('FakeGuild', 'id')(GUILD_ID)
+    roles = [MUTED_ROLE_ID, *range(1, 20)]
+
+    updates = []
+    for _ in range(count):
+        before = FakeMember(guild, SnowflakeList(rng.sample(roles, 5)))
+        if rng.random() < role_change_rate:
+            # Take a role away, the muted one if they have it.
+            removed = MUTED_ROLE_ID if before._roles.has(MUTED_ROLE_ID) else before._roles[0]
+            after = FakeMember(guild, SnowflakeList([r for r in before._roles if r != removed]))
+        else:
+            after = FakeMember(guild, SnowflakeList(before._roles, is_sorted=True))
+        updates.append((before, after))
+    return updates
+
+
+async def replay(updates):
+    cog = Moderator.__new__(Moderator)
+    cog._muted_role_ids = {GUILD_ID: MUTED_ROLE_ID}
+
+    # Unmutes would normally hit the database, only count them here.
+    unmutes = 0
+    async def remove_time_entry(guild, member, connection=None):
+        nonlocal unmutes
+        unmutes += 1
+    cog._remove_time_entry = remove_time_entry
+
+    start = time.perf_counter()
+    for before, after in updates:
+        await cog.on_member_update(before, after)
+    return time.perf_counter() - start, unmutes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--updates', type=int, default=1_000_000)
+    parser.add_argument('--role-change-rate', type=float, default=0.001)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    updates = make_updates(args.updates, role_change_rate=args.role_change_rate,
+                           rng=random.Random(args.seed))
+    elapsed, unmutes = asyncio.get_event_loop().run_until_complete(replay(updates))
+    print(f'{len(updates)} updates in {elapsed:.2f}s '
+          f'({elapsed / len(updates) * 1e6:.2f} us each), {unmutes} manual unmutes')
+
+
+if __name__ == '__main__':
+    main()
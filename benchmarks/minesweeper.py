@@ -0,0 +1,84 @@
+"""Measures the no-guess minesweeper solver and board generation.
+
+For each board this reports how long is_solvable takes on one random
+board, and how long generate_no_guess takes to find a no-guess board,
+including the boards it throws away. Generation is timed on its worst run
+as well as on average, since that's how long the first click can take.
+
+Besides the three levels, this includes long thin boards with the same
+density of mines as expert, right at the 170 cell limit for custom
+boards (which have to be smaller than that). These take more tries than
+the square boards, and their worst runs are the slowest of all.
+
+Run from the root of the repo:
+    python -m benchmarks.minesweeper
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from cogs.games.minesweeperengine import _place_mines, generate_no_guess, is_solvable
+
+BOARDS = [
+    ('beginner', 9, 9, 10),
+    ('intermediate', 12, 12, 20),
+    ('expert', 13, 13, 40),
+    ('custom', 17, 10, 40),
+    ('custom', 10, 17, 40),
+]
+
+
+def time_solver(width, height, mines, boards, rng):
+    """Return the mean time in seconds is_solvable takes on a random board."""
+    times = []
+    for _ in range(boards):
+        start = rng.randrange(width * height)
+        placed = _place_mines(width, height, mines, start, rng)
+
+        before = time.perf_counter()
+        is_solvable(width, height, placed, start)
+        times.append(time.perf_counter() - before)
+
+    return statistics.mean(times)
+
+
+def time_generation(width, height, mines, runs, rng):
+    """Return (mean, worst, failures) for generate_no_guess."""
+    times = []
+    failures = 0
+    for _ in range(runs):
+        start = rng.randrange(width * height)
+
+        before = time.perf_counter()
+        result = generate_no_guess(width, height, mines, start, rng=rng)
+        times.append(time.perf_counter() - before)
+
+        failures += result is None
+
+    return statistics.mean(times), max(times), failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.partition('\n')[0])
+    parser.add_argument('--boards', type=int, default=500,
+                        help='number of random boards to run the solver on')
+    parser.add_argument('--runs', type=int, default=100,
+                        help='number of no-guess boards to generate')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    print(f'{"board":>24} {"solver":>10} {"generate":>10} {"worst":>10} {"failed":>7}')
+    for name, width, height, mines in BOARDS:
+        solver = time_solver(width, height, mines, args.boards, rng)
+        mean, worst, failures = time_generation(width, height, mines, args.runs, rng)
+        label = f'{name} {width}x{height}, {mines}'
+        print(f'{label:>24} {solver * 1000:>8.2f}ms {mean * 1000:>8.1f}ms '
+              f'{worst * 1000:>8.1f}ms {failures:>7}')
+
+
+if __name__ == '__main__':
+    main()
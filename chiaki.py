@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import asyncio
+import concurrent.futures
 import contextlib
 import datetime
 import functools
@@ -155,5 +156,28 @@ def init_db(verbose):
     click.echo('Database initialization successful! <3')
 
 
+# ------------- Other stuff ------------------
+
+@main.command(name='make-silhouettes')
+@click.option('-j', '--jobs', type=int, default=None, help='Number of processes to use, defaults to the number of CPUs')
+@click.option('-f', '--force', is_flag=True, help='Remake silhouettes that are already up to date')
+def make_silhouettes(jobs, force):
+    """Pre-generate the silhouettes for Pokemon trivia"""
+    from cogs.games import trivia
+
+    indices = trivia.pokemon_indices()
+    if not indices:
+        click.echo(f'No Pokemon images found in {trivia.POKEMON_IMAGE_PATH}.', err=True)
+        return
+
+    write = functools.partial(trivia.write_silhouette, force=force)
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor, \
+            click.progressbar(executor.map(write, indices, chunksize=16), length=len(indices)) as results:
+        for _ in results:
+            pass
+
+    click.echo(f'Made {len(indices)} silhouettes in {trivia.POKEMON_SILHOUETTE_PATH}! <3')
+
+
 if __name__ == '__main__':
     sys.exit(main())
@@ -1,6 +1,10 @@
 import discord
 import psutil
 from discord.ext import commands
+from more_itertools import ilen
+
+from ..utils import rendering
+from ..utils.paginator import trigger_cooldown_count
 
 
 class Stats:
@@ -31,11 +35,25 @@ class Stats:
             f'{bot.user_count} Users'
         )
 
+        caches = f'{trigger_cooldown_count()} Trigger cooldowns'
+        tags = self.bot.get_cog('Tags')
+        if tags is not None:
+            cached, hits, misses = tags.cache_stats()
+            ratio = hits / (hits + misses) if hits or misses else 0
+            caches += f'\n{cached} Tags ({ratio:.0%} hits)'
+
+        renders = '\n'.join(
+            f'{job_type}: {s.queued} queued, {s.running} running, {s.completed} done'
+            for job_type, s in rendering.stats().items()
+        ) or 'Nothing yet'
+
         chiaki_embed = (discord.Embed(description=bot.appinfo.description, colour=self.bot.colour)
                         .set_author(name=str(ctx.bot.user), icon_url=bot.user.avatar_url)
                         .add_field(name='CPU Usage', value=f'{cpu_usage}%\n{memory_usage_in_mb :.2f}MB')
                         .add_field(name='Presence', value=presence)
                         .add_field(name='Uptime', value=self.bot.str_uptime.replace(', ', '\n'))
+                        .add_field(name='Caches', value=caches)
+                        .add_field(name='Renders', value=renders, inline=False)
                         )
         await ctx.send(embed=chiaki_embed)
 
@@ -1,11 +1,10 @@
 import copy
-from itertools import starmap
 
 from discord.ext import commands
 
 from ..utils import db
 from ..utils.examples import _get_static_example
-from ..utils.paginator import Paginator
+from ..utils.paginator import Paginator, QueryPageSource
 
 
 class CommandAliases(db.Table, table_name='command_aliases'):
@@ -97,11 +96,12 @@ class Aliases:
     @commands.command()
     async def aliases(self, ctx):
         """Shows all the aliases for the server"""
-        query = """SELECT alias, command FROM command_aliases
-                   WHERE guild_id = $1
-                   ORDER BY alias;
-                """
-        entries = starmap('`{0}` => `{1}`'.format, await ctx.db.fetch(query, ctx.guild.id))
+        query = 'SELECT alias, command FROM command_aliases WHERE guild_id = $1'
+        entries = QueryPageSource(
+            ctx.pool, query, ctx.guild.id,
+            key='alias',
+            format_entry=lambda row: '`{0}` => `{1}`'.format(*row),
+        )
         pages = Paginator(ctx, entries)
         await pages.interact()
 
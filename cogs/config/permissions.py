@@ -11,7 +11,7 @@ from ..utils import cache, db, disambiguate, formats
 from ..utils.commands import command_category, walk_parents
 from ..utils.converter import BotCommand, Category
 from ..utils.misc import emoji_url, truncate, unique
-from ..utils.paginator import Paginator
+from ..utils.paginator import Paginator, QueryPageSource
 
 
 class CommandPermissions(db.Table, table_name='permissions'):
@@ -563,15 +563,20 @@ class Permissions:
     @commands.has_permissions(manage_guild=True)
     async def ignores(self, ctx):
         """Tells you what channels or members are currently ignored in this server."""
-        query = 'SELECT entity_id FROM plonks WHERE guild_id = $1;'
+        query = 'SELECT entity_id FROM plonks WHERE guild_id = $1'
 
         get_ch, get_m = ctx.guild.get_channel, ctx.guild.get_member
-        entries = [
-            (get_ch(e_id) or get_m(e_id) or _DummyEntry(e_id)).mention
-            for e_id, in await ctx.db.fetch(query, ctx.guild.id)
-        ]
 
-        if not entries:
+        def format_entry(row):
+            e_id = row[0]
+            return (get_ch(e_id) or get_m(e_id) or _DummyEntry(e_id)).mention
+
+        entries = QueryPageSource(
+            ctx.pool, query, ctx.guild.id,
+            key='entity_id', per_page=20, format_entry=format_entry,
+        )
+
+        if await entries.get_page(0) is None:
             return await ctx.send("I'm not ignoring anything here...")
 
         pages = Paginator(ctx, entries, title=f"Currently ignoring...", per_page=20)
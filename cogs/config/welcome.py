@@ -1,3 +1,4 @@
+import asyncio
 import collections
 import enum
 import functools
@@ -9,7 +10,7 @@ from more_itertools import one
 
 from ..utils import db, time
 from ..utils.examples import static_example
-from ..utils.formats import multi_replace
+from ..utils.formats import human_join, multi_replace
 from ..utils.misc import nice_time, ordinal
 
 
@@ -20,19 +21,25 @@ class ServerMessages(db.Table, table_name='server_messages'):
     message = db.Column(db.Text, nullable=True)
     delete_after = db.Column(db.SmallInt, default=0)
     enabled = db.Column(db.Boolean, default=False)
+    coalesce = db.Column(db.Boolean, default=False)
 
 
 _DEFAULT_CHANNEL_CHANGE_URL = ('https://github.com/discordapp/discord-api-docs/blob/master/docs/'
                                'Change_Log.md#breaking-change-default-channels')
 
 
-fields = 'guild_id is_welcome channel_id message delete_after enabled'.split()
+fields = 'guild_id is_welcome channel_id message delete_after enabled coalesce'.split()
 ServerMessage = collections.namedtuple('ServerMessage', fields)
 ServerMessage.__new__.__defaults__ = (None, ) * len(fields)
 del fields
 
 _server_message_check = functools.partial(commands.has_permissions, manage_guild=True)
 
+# How long to wait for other members to join (or leave) before sending the
+# message when coalescing is on.
+_COALESCE_WINDOW = 5
+_MESSAGE_LIMIT = 2000
+
 
 class ServerMessageType(enum.Enum):
     leave = False
@@ -57,10 +64,14 @@ class ServerMessageType(enum.Enum):
     def toggle_text(self):
         return _lookup[self][3]
 
+    @property
+    def verb(self):
+        return _lookup[self][4]
+
 
 _lookup = {
-    ServerMessageType.leave: ('leaves', 'left', 'bye', 'mourn the loss of members ;-;'),
-    ServerMessageType.welcome: ('joins', 'joined', 'welcome', 'welcome all new members to the server! ^o^')
+    ServerMessageType.leave: ('leaves', 'left', 'bye', 'mourn the loss of members ;-;', 'leave'),
+    ServerMessageType.welcome: ('joins', 'joined', 'welcome', 'welcome all new members to the server! ^o^', 'join')
 }
 
 
@@ -69,12 +80,45 @@ def special_message(message):
     return message if '{user}' in message else f'{{user}}{message}'
 
 
+def _coalesced_replacements(message, members, replacements):
+    # Every {user} and {uid} in the message becomes a list of members, so
+    # we have to make sure the lists don't push it past the message limit.
+    users, uids = message.count('{user}'), message.count('{uid}')
+    base = {**replacements, '{user}': '', '{uid}': ''}
+    # Leave some room for the "and x more" at the end.
+    budget = _MESSAGE_LIMIT - len(multi_replace(message, base)) - (users + uids) * 20
+
+    mentions, ids = [], []
+    for member in members:
+        mention, uid = member.mention, str(member.id)
+        budget -= (len(mention) + 2) * users + (len(uid) + 2) * uids
+        if budget < 0:
+            break
+
+        mentions.append(mention)
+        ids.append(uid)
+
+    remaining = len(members) - len(mentions)
+    if remaining:
+        mentions.append(f'{remaining} more')
+        ids.append(f'{remaining} more')
+
+    return {
+        **replacements,
+        '{user}': human_join(mentions),
+        '{uid}': human_join(ids),
+    }
+
+
 class WelcomeMessages:
     """Commands related to welcome and leave messages."""
     # TODO: Put this in a config module.
 
     def __init__(self, bot):
         self.bot = bot
+        # (guild_id, ServerMessageType) -> [(member, time)] for members that
+        # are waiting to be sent in one message when coalescing is on.
+        self._pending = {}
 
     # ------------ config helper functions --------------------
 
@@ -138,6 +182,14 @@ class WelcomeMessages:
                 inline=False
             )
 
+        if config.coalesce:
+            embed.add_field(
+                name='Coalescing',
+                value=f'Members that {thing.past_tense} within {_COALESCE_WINDOW} seconds '
+                      'of each other will be in one message.',
+                inline=False
+            )
+
         await ctx.send(embed=embed)
 
     async def _toggle_config(self, ctx, do_thing, *, thing):
@@ -192,11 +244,26 @@ class WelcomeMessages:
 
             await ctx.send(message)
 
+    async def _coalesce_config(self, ctx, coalesce, *, thing):
+        if coalesce is None:
+            config = await self._get_server_config(ctx.guild.id, thing, connection=ctx.db)
+            message = (f"I'm putting members who {thing.verb} around the same time in one message."
+                       if config and config.coalesce else
+                       f"I'm sending one {thing} message per member.")
+            await ctx.send(message)
+        else:
+            await self._update_server_config(ctx, thing, coalesce=coalesce)
+            message = (f"Ok, I'll put members who {thing.verb} around the same time in one message."
+                       if coalesce else
+                       f"Ok, I'll send one {thing} message per member.")
+
+            await ctx.send(message)
+
     # --------------------- commands -----------------------
 
     def _do_command(*, thing):
         _toggle_help = f"""
-        Sets whether or not I announce when someone {thing.action}s the server.
+        Sets whether or not I announce when someone {thing.action} the server.
 
         Specifying with no arguments will toggle it.
         """
@@ -219,8 +286,19 @@ class WelcomeMessages:
             A number less than or equal 0 will disable automatic deletion.
             """
 
+        _coalesce_help = f"""
+            Sets whether or not members that {thing.past_tense} within a few seconds
+            of each other should be put in one message.
+
+            This is useful during raids or when a lot of people {thing.verb}
+            at once, as it keeps the channel from being flooded. When this is on,
+            `{{{{user}}}}` and `{{{{uid}}}}` become a list of members instead.
+
+            If no arguments are given, it shows whether or not it's on.
+            """
+
         _message_help = f"""
-            Sets the bot's message when a member {thing.action}s this server.
+            Sets the bot's message when a member {thing.action} this server.
 
             The following special formats can be in the message:
             `{{{{user}}}}`     = The member that {thing.past_tense}. If one isn't placed,
@@ -253,13 +331,18 @@ class WelcomeMessages:
         async def group_delete(self, ctx, *, duration: int):
             await self._delete_after_config(ctx, duration, thing=thing)
 
-        return group, group_message, group_channel, group_delete
+        @group.command(name='coalesce', help=_coalesce_help)
+        @_server_message_check()
+        async def group_coalesce(self, ctx, coalesce: bool = None):
+            await self._coalesce_config(ctx, coalesce, thing=thing)
 
-    welcome, welcome_message, welcome_channel, welcome_delete = _do_command(
+        return group, group_message, group_channel, group_delete, group_coalesce
+
+    welcome, welcome_message, welcome_channel, welcome_delete, welcome_coalesce = _do_command(
         thing=ServerMessageType.welcome,
     )
 
-    bye, bye_message, bye_channel, bye_delete = _do_command(
+    bye, bye_message, bye_channel, bye_delete, bye_coalesce = _do_command(
         thing=ServerMessageType.leave,
     )
 
@@ -267,6 +350,15 @@ class WelcomeMessages:
 
     async def _maybe_do_message(self, member, thing, time):
         guild = member.guild
+        key = guild.id, thing
+
+        # Someone else is already waiting to send a message. Piggyback on
+        # that instead of querying the config again.
+        pending = self._pending.get(key)
+        if pending is not None:
+            pending.append((member, time))
+            return
+
         config = await self._get_server_config(guild.id, thing)
 
         if not (config and config.enabled):
@@ -281,11 +373,30 @@ class WelcomeMessages:
         if not message:
             return
 
+        if not config.coalesce:
+            await self._do_message(channel, config, guild, [member], time)
+            return
+
+        # Check again as another member could've come in while we were
+        # getting the config.
+        pending = self._pending.get(key)
+        if pending is not None:
+            pending.append((member, time))
+            return
+
+        pending = self._pending[key] = [(member, time)]
+        try:
+            await asyncio.sleep(_COALESCE_WINDOW)
+        finally:
+            del self._pending[key]
+
+        members = [m for m, _ in pending]
+        await self._do_message(channel, config, guild, members, pending[-1][1])
+
+    async def _do_message(self, channel, config, guild, members, time):
         member_count = guild.member_count
 
         replacements = {
-            '{user}': member.mention,
-            '{uid}': str(member.id),
             '{server}': str(guild),
             '{count}': str(member_count),
             '{countord}': ordinal(member_count),
@@ -293,6 +404,14 @@ class WelcomeMessages:
             '{time}': nice_time(time)
         }
 
+        message = config.message
+        if len(members) == 1:
+            member = members[0]
+            replacements['{user}'] = member.mention
+            replacements['{uid}'] = str(member.id)
+        else:
+            replacements = _coalesced_replacements(message, members, replacements)
+
         delete_after = config.delete_after
         if delete_after <= 0:
             delete_after = None
@@ -9,6 +9,7 @@ import re
 import discord
 from discord.ext import commands
 
+from ..utils import rendering
 from ..utils.context_managers import temp_item, temp_message
 
 
@@ -121,6 +122,8 @@ class TwoPlayerGameCog:
                 continue
 
             name = name[6:]
+            if name == 'computer' and not game_cls.has_computer_player():
+                continue
 
             help = inspect.getdoc(member).format(name=cls.name, cmd=cmd_name)
             command = gc(name=name, help=help)(member)
@@ -216,6 +219,18 @@ class TwoPlayerGameCog:
                 inst = self.running_games[ctx.channel.id]
                 await inst.run()
 
+    async def _game_computer(self, ctx):
+        """Starts a game of {name} against me.
+
+        For when there's no one else around to play with.
+        """
+        if ctx.channel.id in self.running_games:
+            return await ctx.send(f"There's a {self.__class__.name} game already running in this channel...")
+
+        await ctx.release()
+        with temp_item(self.running_games, ctx.channel.id, self.__game_class__(ctx, ctx.me)) as inst:
+            await inst.run()
+
     async def _game_join(self, ctx):
         """Joins a {name} game.
 
@@ -287,6 +302,17 @@ class TwoPlayerSession:
     def _push_move(self, move):
         raise NotImplementedError
 
+    async def _computer_move(self):
+        """Make a move for the computer player (i.e. the bot).
+
+        Games that implement this can be played against the bot.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def has_computer_player(cls):
+        return cls._computer_move is not TwoPlayerSession._computer_move
+
     def _is_game_over(self):
         raise NotImplementedError
 
@@ -321,9 +347,13 @@ class TwoPlayerSession:
             return True
 
     async def _make_move(self):
-        wait_for = self._ctx.bot.wait_for
+        if self.current() == self._ctx.me:
+            await self._computer_move()
+            return
+
+        wait_for = self._ctx.bot.wait_for_keyed
         try:
-            await wait_for('message', timeout=self._timeout, check=self._check)
+            await wait_for('message', self._ctx.channel.id, timeout=self._timeout, check=self._check)
         except asyncio.TimeoutError:
             self._status = Status.TIMEOUT
 
@@ -346,5 +376,9 @@ class TwoPlayerSession:
         await self._ctx.send(embed=self._display)
 
     async def run(self):
-        await self._loop()
-        await self._end()
+        try:
+            await self._loop()
+            await self._end()
+        finally:
+            # Don't leave any renders around for a game that's over.
+            rendering.cancel(self)
@@ -1,75 +1,23 @@
-import itertools
+from more_itertools import chunked
 
-from more_itertools import chunked, pairwise, sliced, spy
+from .checkersengine import (
+    BLACK, NUM_SQUARES, STARTING_POSITION, WHITE,
+    apply_move, has_moves, is_jump, legal_moves, square_to_xy,
+)
 
-BLACK, WHITE = False, True
 PIECES = BK_PIECE, WH_PIECE = 'bw'
 KINGS = BK_KING, WH_KING = 'BW'
 
-_is_king = str.isupper
-
-def _get_checkers(start, end, direction):
-    return [
-        (x, y) for y, x in itertools.product(range(start, end + direction, direction), range(8))
-        if (x + y) % 2 == 1
-    ]
-
-_STARTING_BOARD = [
-    ' ', BK_PIECE, ' ', BK_PIECE, ' ', BK_PIECE, ' ', BK_PIECE,
-    BK_PIECE, ' ', BK_PIECE, ' ', BK_PIECE, ' ', BK_PIECE, ' ',
-    ' ', BK_PIECE, ' ', BK_PIECE, ' ', BK_PIECE, ' ', BK_PIECE,
-    ' ', ' ', ' ', ' ', ' ', ' ', ' ', ' ',
-    ' ', ' ', ' ', ' ', ' ', ' ', ' ', ' ',
-    WH_PIECE, ' ', WH_PIECE, ' ', WH_PIECE, ' ', WH_PIECE, ' ',
-    ' ', WH_PIECE, ' ', WH_PIECE, ' ', WH_PIECE, ' ', WH_PIECE,
-    WH_PIECE, ' ', WH_PIECE, ' ', WH_PIECE, ' ', WH_PIECE, ' ',
-]
-
 X = 'abcdefgh'
 Y = '87654321'
 
-def _to_i(x, y):
-    return y * 8 + x
-
-_STARTING_BOARD = [' '] * 64
-_STARTING_BOARD[_to_i(3, 4)] = BK_PIECE
-_STARTING_BOARD[_to_i(4, 3)] = WH_PIECE
-
-def _i_to_xy(i):
-    y, x = divmod(i, 8)
-    return X[x] + Y[y]
-
-def _xy_to_i(xy):
-    x, y = xy
-    return _to_i(X.index(x), Y.index(y))
-
-def _in_range(x, y):
-    return 0 <= x < 8 and 0 <= y < 8
-
-def _moves(x, y, dy):
-    return [_to_i(x + dx, y + dy) for dx in (-1, 1) if _in_range(x + dx, y + dy)]
-
-def _captures(x, y, dy):
-    return [
-        (_to_i(x + dx, y + dy), _to_i(x + dx * 2, y + dy * 2))
-        for dx in (-1, 1)
-        if _in_range(x + dx, y + dy) and _in_range(x + dx * 2, y + dy * 2)
-    ]
-
-def _make_dict(f):
-    moves = {}
-    moves[BK_PIECE] = {_to_i(x, y): f(x, y, 1) for x, y in _get_checkers(0, 8, 1)}
-    moves[WH_PIECE] = {_to_i(x, y): f(x, y, -1) for x, y in _get_checkers(8, 0, -1)}
-    # Kings can move anywhere
-    moves[BK_KING] = moves[WH_KING] = {
-        k: moves[WH_PIECE].get(k, []) + moves[BK_PIECE].get(k, [])
-        for k in moves[BK_PIECE].keys() | moves[WH_PIECE].keys()
-    }
-    return moves
+# square -> index on the full 8x8 board, and square -> name (e.g. b8)
+_SQUARE_INDICES = [y * 8 + x for x, y in map(square_to_xy, range(NUM_SQUARES))]
+_SQUARE_NAMES = [X[x] + Y[y] for x, y in map(square_to_xy, range(NUM_SQUARES))]
 
-# Generate lookup table for moves
-_MOVES = _make_dict(_moves)
-_CAPTURES = _make_dict(_captures)
+
+def _move_to_str(move):
+    return ''.join(_SQUARE_NAMES[square] for square in move)
 
 
 class Board:
@@ -87,18 +35,22 @@ class Board:
     Y = [f'{i}\u20e3' for i in Y]
 
     def __init__(self):
-        self._board = _STARTING_BOARD[:]
+        # Indexed by colour, so _pieces[BLACK] is black's pieces.
+        self._pieces = list(STARTING_POSITION)
+        self._kings = 0
         self._half_moves = 0
         self._last_move = None
         self.turn = WHITE
+        # move string -> move, for the current position
+        self._legal_moves = None
 
     def __str__(self):
         rows = list(self._tiles())
         if self._last_move:
             last_move_tile = self.TILES[['WH_LAST_MOVE', 'BK_LAST_MOVE'][self.turn]]
             if last_move_tile:
-                for i in map(_xy_to_i, chunked(self._last_move[:-2], 2)):
-                    rows[i] = last_move_tile
+                for square in self._last_move[:-1]:
+                    rows[_SQUARE_INDICES[square]] = last_move_tile
 
         board = '\n'.join(f'{y}{"".join(chunk)}' for y, chunk in zip(self.Y, chunked(rows, 8)))
         return f'\N{BLACK LARGE SQUARE}{self.X}\n{board}'
@@ -107,114 +59,81 @@ class Board:
     def half_moves(self):
         return self._half_moves
 
+    def position(self):
+        """Return (black, white, kings, turn) for the computer player."""
+        return (*self._pieces, self._kings, self.turn)
+
     def _tiles(self):
         tiles = self.TILES
-        for i, char in enumerate(self._board):
-            key = not sum(divmod(i, 8)) % 2 if char == ' ' else char
-            yield tiles[key]
+        rows = [tiles[not sum(divmod(i, 8)) % 2] for i in range(64)]
 
-    def _find_all_pieces(self, colour):
-        return [i for i, v in enumerate(self._board) if v.lower() == colour]
+        kings = self._kings
+        for colour in (BLACK, WHITE):
+            for square in range(NUM_SQUARES):
+                bit = 1 << square
+                if self._pieces[colour] & bit:
+                    piece = (KINGS if kings & bit else PIECES)[colour]
+                    rows[_SQUARE_INDICES[square]] = tiles[piece]
+
+        return rows
+
+    def _args(self):
+        turn = self.turn
+        return self._pieces[turn], self._pieces[not turn], self._kings, turn
+
+    def _get_legal_moves(self):
+        if self._legal_moves is None:
+            self._legal_moves = {_move_to_str(m): m for m in legal_moves(*self._args())}
+        return self._legal_moves
 
     def legal_moves(self):
-        """Generate all legal moves in the current position.
+        """Return a list of all legal moves in the current position.
 
-        If there are any jumps one could make, those get generated instead,
+        If there are any jumps one could make, only those are returned,
         as jumps must be made according to the rules of Checkers.
         """
-        jumps_exist, jumps = spy(self.jumps())
-        if jumps_exist:
-            yield from jumps
-            return
-
-        board = self._board
-        for i in self._find_all_pieces(PIECES[self.turn]):
-            for end in _MOVES[board[i]][i]:
-                if board[end] == ' ':
-                    yield _i_to_xy(i) + _i_to_xy(end)
+        return list(self._get_legal_moves())
 
     def jumps(self):
-        """Generate all jumps one can make in the current position"""
-        owner = PIECES[self.turn]
-        return itertools.chain.from_iterable(map(self.jumps_from, self._find_all_pieces(owner)))
-
-    def jumps_from(self, square):
-        """Generate all jumps from a particular square in the current position"""
-        board = self._board
-        captures = _CAPTURES[board[square]]
-
-        def jump_helper(square, captured):
-            is_king = _is_king(board[square])
-            for jump_over, jump_end in captures[square]:
-                if board[jump_over].lower() != PIECES[not self.turn]:
-                    continue
-
-                if jump_over in captured:
-                    # no loops
-                    continue
-
-                if board[jump_end] != ' ':
-                    # The square must be empty (obviously)
-                    continue
-
-                if not is_king and square >> 3 == 7 * self.turn:
-                    # When a piece reaches the back rank they're supposed to be
-                    # kinged and can't jump anymore. Exception is if the piece
-                    # was already a king.
-                    yield square, jump_end
-                else:
-                    chain_exists, squares = spy(jump_helper(jump_end, captured | {jump_over}))
-                    if chain_exists:
-                        for sequence in squares:
-                            yield (square, *sequence)
-                    else:
-                        yield (square, jump_end)
-
-        return (''.join(map(_i_to_xy, s)) for s in jump_helper(square, set()))
+        """Return a list of all jumps one can make in the current position"""
+        return [s for s, m in self._get_legal_moves().items() if is_jump(m)]
 
     def is_game_over(self):
         """Return True if the game is over for the current player. False otherwise."""
-        return next(self.legal_moves(), None) is None
+        return not has_moves(*self._args())
 
     def move(self, move):
         """Take a move and apply it to the game"""
-        if move not in self.legal_moves():
-            raise ValueError(f'illegal move: {move!r}')
+        try:
+            squares = self._get_legal_moves()[move]
+        except KeyError:
+            raise ValueError(f'illegal move: {move!r}') from None
 
-        board = self._board
-        squares = [_xy_to_i(xy) for xy in sliced(move, 2)]
-        end = squares[-1]
-
-        piece = board[squares[0]]
-        if end >> 3 == 7 * (not self.turn) and not _is_king(piece):
-            # New king
-            piece = piece.upper()
-
-        for before, after in pairwise(squares):
-            difference = abs(before - after)
-            if difference not in {18, 14}:
-                continue
-
-            # A two step rather than a one step means a capture.
-            square_between = min(before, after) + difference // 2
-            board[square_between] = ' '
-
-        board[squares[0]] = ' '
-        board[end] = piece
-        self._last_move = move
+        turn = self.turn
+        pieces, opponent, self._kings = apply_move(*self._args(), squares)
+        self._pieces[turn], self._pieces[not turn] = pieces, opponent
+
+        self._last_move = squares
+        self._legal_moves = None
         self._half_moves += 1
-        self.turn = not self.turn
+        self.turn = not turn
 
 
 # Below is the game logic. If you just want to copy the board, Ignore this.
+import functools
 import random
 import re
 
 import discord
 
 from .bases import Status, TwoPlayerGameCog, TwoPlayerSession
+from .checkersengine import best_move
+from ..utils import rendering
 from ..utils.misc import emoji_url
 
+# How long Chiaki can think about a move for, in seconds.
+COMPUTER_THINKING_TIME = 1.5
+
 
 _VALID_MOVE_REGEX = re.compile(r'^([a-h][1-8]\s?)+', re.IGNORECASE)
 _MESSAGES = {
@@ -251,6 +170,11 @@ class CheckersSession(TwoPlayerSession, move_pattern=_VALID_MOVE_REGEX, board_fa
     def _push_move(self, match):
         self._board.move(match[0])
 
+    async def _computer_move(self):
+        search = functools.partial(best_move, time_limit=COMPUTER_THINKING_TIME)
+        move, _, _ = await rendering.run('checkers', search, *self._board.position(), group=self)
+        self._board.move(_move_to_str(move))
+
     def _is_game_over(self):
         return self._board.is_game_over()
 
@@ -0,0 +1,335 @@
+"""Checkers bitboards, move generation and a search for the computer opponent.
+
+Pieces can only ever be on the 32 dark squares, so each player's pieces
+(and the kings) are kept in an int, where bit s is set if there's a piece
+on square s. Squares are numbered left to right, top to bottom, so square
+0 is b8 and square 31 is g1. Black starts at the top and moves down, white
+starts at the bottom and moves up.
+
+Moves are tuples of the squares the piece stops on, starting with the
+square it moved from, so a double jump is three squares long.
+
+Everything here is pure Python with no dependencies on the bot, so it
+can be run in the render pool.
+"""
+
+import time
+
+__all__ = [
+    'BLACK', 'NUM_SQUARES', 'STARTING_POSITION', 'WHITE',
+    'apply_move', 'best_move', 'has_moves', 'is_jump', 'legal_moves', 'square_to_xy', 'xy_to_square',
+]
+
+BLACK, WHITE = False, True
+NUM_SQUARES = 32
+_ALL = (1 << NUM_SQUARES) - 1
+
+
+def square_to_xy(square):
+    y, i = divmod(square, 4)
+    return i * 2 + (not y % 2), y
+
+
+def xy_to_square(x, y):
+    """Return the square at (x, y), or None if it's a light square."""
+    if not (0 <= x < 8 and 0 <= y < 8) or (x + y) % 2 != 1:
+        return None
+    return y * 4 + x // 2
+
+
+def _row(y):
+    return sum(1 << s for s in range(y * 4, y * 4 + 4))
+
+
+# (black, white)
+STARTING_POSITION = (_row(0) | _row(1) | _row(2), _row(5) | _row(6) | _row(7))
+
+# The rows where men get crowned
+_PROMOTION = {BLACK: _row(7), WHITE: _row(0)}
+
+# Indices into the move tables. Men of each colour can only go forwards,
+# while kings can go either way.
+_KING = 2
+_FORWARD = {BLACK: (1,), WHITE: (-1,), _KING: (1, -1)}
+
+
+def _make_tables():
+    moves = {kind: [0] * NUM_SQUARES for kind in _FORWARD}
+    jumps = {kind: [()] * NUM_SQUARES for kind in _FORWARD}
+    between = [[0] * NUM_SQUARES for _ in range(NUM_SQUARES)]
+
+    for kind, directions in _FORWARD.items():
+        for square in range(NUM_SQUARES):
+            x, y = square_to_xy(square)
+            square_jumps = []
+            for dy in directions:
+                for dx in (-1, 1):
+                    step = xy_to_square(x + dx, y + dy)
+                    if step is None:
+                        continue
+                    moves[kind][square] |= 1 << step
+
+                    land = xy_to_square(x + dx * 2, y + dy * 2)
+                    if land is None:
+                        continue
+                    square_jumps.append((1 << step, land))
+                    between[square][land] = 1 << step
+
+            jumps[kind][square] = tuple(square_jumps)
+
+    return moves, jumps, between
+
+
+# _MOVES[kind][square] -> bitmask of the squares a piece can step to
+# _JUMPS[kind][square] -> tuple of (bit of the square jumped over, square landed on)
+# _BETWEEN[start][end] -> bit of the square jumped over from start to end,
+#                         or 0 if it's not a jump
+_MOVES, _JUMPS, _BETWEEN = _make_tables()
+
+
+def _bits(mask):
+    while mask:
+        bit = mask & -mask
+        yield bit.bit_length() - 1
+        mask ^= bit
+
+
+def _popcount(mask):
+    return bin(mask).count('1')
+
+
+def _extend_jumps(path, square, captured, opponent, empty, table, stop, out):
+    """Add every way of continuing a jump from `square` to `out`."""
+    found = False
+    for over, land in table[square]:
+        if not opponent & over or captured & over or not empty >> land & 1:
+            continue
+
+        found = True
+        path.append(land)
+        if stop >> land & 1:
+            # A man that gets crowned ends its turn there.
+            out.append(tuple(path))
+        else:
+            _extend_jumps(path, land, captured | over, opponent, empty, table, stop, out)
+        path.pop()
+
+    if not found and len(path) > 1:
+        out.append(tuple(path))
+
+
+def _jumps(pieces, opponent, kings, colour):
+    out = []
+    # Captured pieces stay on the board until the move is over, so they
+    # can't be jumped twice or landed on.
+    empty = _ALL & ~(pieces | opponent)
+    men_table, king_table = _JUMPS[colour], _JUMPS[_KING]
+    stop = _PROMOTION[colour]
+
+    for square in _bits(pieces):
+        bit = 1 << square
+        if kings & bit:
+            _extend_jumps([square], square, 0, opponent, empty | bit, king_table, 0, out)
+        else:
+            _extend_jumps([square], square, 0, opponent, empty | bit, men_table, stop, out)
+    return out
+
+
+def legal_moves(pieces, opponent, kings, colour):
+    """Return a list of the legal moves for `pieces`, which are `colour`.
+
+    If there are any jumps, only those are returned, as jumps must be made
+    according to the rules of checkers.
+    """
+    jumps = _jumps(pieces, opponent, kings, colour)
+    if jumps:
+        return jumps
+
+    empty = _ALL & ~(pieces | opponent)
+    men_table, king_table = _MOVES[colour], _MOVES[_KING]
+    moves = []
+    for square in _bits(pieces):
+        table = king_table if kings >> square & 1 else men_table
+        for end in _bits(table[square] & empty):
+            moves.append((square, end))
+    return moves
+
+
+def has_moves(pieces, opponent, kings, colour):
+    """Return whether `pieces` has any legal moves, without generating them."""
+    empty = _ALL & ~(pieces | opponent)
+    men_moves, king_moves = _MOVES[colour], _MOVES[_KING]
+    men_jumps, king_jumps = _JUMPS[colour], _JUMPS[_KING]
+
+    for square in _bits(pieces):
+        if kings >> square & 1:
+            step_table, jump_table = king_moves, king_jumps
+        else:
+            step_table, jump_table = men_moves, men_jumps
+
+        if step_table[square] & empty:
+            return True
+        for over, land in jump_table[square]:
+            if opponent & over and empty >> land & 1:
+                return True
+
+    return False
+
+
+def is_jump(move):
+    return len(move) > 2 or bool(_BETWEEN[move[0]][move[1]])
+
+
+def apply_move(pieces, opponent, kings, colour, move):
+    """Return (pieces, opponent, kings) after `pieces` makes a move."""
+    start, end = move[0], move[-1]
+    captured = 0
+    for before, after in zip(move, move[1:]):
+        captured |= _BETWEEN[before][after]
+
+    # A king can jump all the way around back to where it started.
+    moved = (1 << start) ^ (1 << end)
+    pieces ^= moved
+    if kings >> start & 1:
+        kings ^= moved
+    elif _PROMOTION[colour] >> end & 1:
+        kings |= 1 << end
+
+    opponent &= ~captured
+    kings &= ~captured
+    return pieces, opponent, kings
+
+
+# ---------- Search ----------
+
+_WIN = 100000
+_MAN = 100
+_KING_VALUE = 160
+_ADVANCED = {BLACK: _row(4) | _row(5) | _row(6), WHITE: _row(1) | _row(2) | _row(3)}
+_BACK_ROW = {BLACK: _row(0), WHITE: _row(7)}
+
+
+def _evaluate(pieces, opponent, kings, colour):
+    """Return a rough score of the position for `pieces`."""
+    score = 0
+    for side, side_colour, sign in ((pieces, colour, 1), (opponent, not colour, -1)):
+        side_kings = side & kings
+        men = side ^ side_kings
+        score += sign * (
+            _popcount(men) * _MAN
+            + _popcount(side_kings) * _KING_VALUE
+            # Men closer to being crowned are worth a bit more, and so are
+            # men that stay back to stop the other side from crowning.
+            + _popcount(men & _ADVANCED[side_colour]) * 5
+            + _popcount(men & _BACK_ROW[side_colour]) * 3
+        )
+    return score
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class _Search:
+    # How many nodes to search between checking the clock
+    CHECK_EVERY = 1024
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.nodes = 0
+        # key -> (depth, flag, score, move)
+        self.table = {}
+
+    def negamax(self, pieces, opponent, kings, colour, ply, depth, alpha, beta):
+        """Return the score of the position for `pieces`, which are `colour`."""
+        self.nodes += 1
+        if not self.nodes % self.CHECK_EVERY and time.perf_counter() > self.deadline:
+            raise _OutOfTime
+
+        moves = legal_moves(pieces, opponent, kings, colour)
+        if not moves:
+            return -(_WIN - ply), None
+
+        # Jumps are forced, so keep going until the position is quiet,
+        # otherwise the search can stop right before losing a piece.
+        # This always ends, as every jump takes a piece off the board.
+        if depth <= 0 and not is_jump(moves[0]):
+            return _evaluate(pieces, opponent, kings, colour), None
+
+        key = pieces | opponent << 32 | kings << 64 | colour << 96
+        entry = self.table.get(key)
+        best_move = None
+        if entry is not None:
+            entry_depth, flag, score, best_move = entry
+            if entry_depth >= depth:
+                if flag == 0:
+                    return score, best_move
+                if flag < 0 and score <= alpha:
+                    return score, best_move
+                if flag > 0 and score >= beta:
+                    return score, best_move
+
+            if best_move in moves:
+                moves.remove(best_move)
+                moves.insert(0, best_move)
+
+        original_alpha = alpha
+        best_score = -_WIN * 2
+        for move in moves:
+            after, their_pieces, after_kings = apply_move(pieces, opponent, kings, colour, move)
+            score, _ = self.negamax(
+                their_pieces, after, after_kings, not colour, ply + 1, depth - 1, -beta, -alpha,
+            )
+            score = -score
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            flag = -1  # upper bound
+        elif best_score >= beta:
+            flag = 1  # lower bound
+        else:
+            flag = 0
+        self.table[key] = depth, flag, best_score, best_move
+        return best_score, best_move
+
+
+# There's no draw rule, so kings can shuffle around forever. This just
+# makes sure the search can't go on forever in those cases.
+_MAX_DEPTH = 64
+
+
+def best_move(black, white, kings, colour, *, time_limit=1.5, max_depth=_MAX_DEPTH):
+    """Return (move, depth, nodes) for the best move for `colour`.
+
+    This searches deeper and deeper until the time limit runs out, and
+    returns the best move from the deepest search that finished.
+    """
+    pieces, opponent = (white, black) if colour else (black, white)
+    moves = legal_moves(pieces, opponent, kings, colour)
+    if not moves:
+        raise ValueError('there are no legal moves')
+
+    # Fall back to any legal move in case even the first search runs out of time.
+    move = moves[0]
+    depth = 0
+    if len(moves) == 1:
+        return move, depth, 0
+
+    search = _Search(time.perf_counter() + time_limit)
+    try:
+        for depth in range(1, max_depth + 1):
+            score, found = search.negamax(pieces, opponent, kings, colour, 0, depth, -_WIN * 2, _WIN * 2)
+            if found is not None:
+                move = found
+            if abs(score) >= _WIN - _MAX_DEPTH * 2:
+                # The game's been solved, there's no point searching deeper.
+                break
+    except _OutOfTime:
+        depth -= 1
+
+    return move, depth, search.nodes
@@ -6,9 +6,9 @@ import random
 import async_timeout
 import Chessnut as chessnut  # muh pep8
 import discord
-from more_itertools import all_equal
 
 from .bases import Status, TwoPlayerGameCog, TwoPlayerSession
+from ..utils import rendering
 from ..utils.context_managers import temp_message
 from ..utils.formats import escape_markdown
 
@@ -16,12 +16,12 @@ from ..utils.formats import escape_markdown
 # --------- Image making stuff please ignore ---------
 
 # TODO: Make a microservice for this silly thing
-import functools
 import io
 import itertools
 import pathlib
 import re
 import string
+from lru import LRU
 from PIL import Image, ImageDraw, ImageFilter, ImageFont
 
 _CHESS_PIECE_IMAGES = {}
@@ -97,48 +97,175 @@ _CHECK_IMAGE = _CHECK_IMAGE.filter(ImageFilter.GaussianBlur(2.5))
 
 del _check_image_draw, _bbox
 
-def _board_image_from_fen(fen, last_move=None, check=None):
-    image = _BLANK_BOARD.copy()
+# How boards are encoded, see _BoardRenderer. Palette mode is lossy, so
+# it's off by default.
+_COMPRESS_LEVEL = 1
+_PALETTE = False
 
-    if last_move is not None:
-        def overlay(start, end):
-            y, x = divmod(chessnut.Game.xy2i(last_move[start:end]), 8)
-            xy = (x * _PIECE_IMAGE_SIZE, y * _PIECE_IMAGE_SIZE)
-            image.alpha_composite(_GREEN_OVERLAY, xy)
-        overlay(None, 2)
-        overlay(2, 4)
+# (placement, last move, check, compress level, palette) -> PNG bytes
+#
+# Most games start with the same few openings, so a lot of boards can be
+# sent without drawing anything at all.
+_RENDERED_BOARDS = LRU(512)
 
-    for i, char in enumerate(_fen_tokens(fen)):
-        y, x = divmod(i, 8)
-        if not char:
-            continue
+def _move_squares(move):
+    if move is None:
+        return ()
+    return chessnut.Game.xy2i(move[:2]), chessnut.Game.xy2i(move[2:4])
 
-        xy = (_PIECE_IMAGE_SIZE * x, _PIECE_IMAGE_SIZE * y)
-        colour = 'w' if char.isupper() else 'b'
-        if check == colour and char.lower() == 'k':
-            image.paste(_CHECK_IMAGE, xy, mask=_CHECK_IMAGE)
 
-        key = colour + char.lower()
-        piece = _CHESS_PIECE_IMAGES[key]
-        image.paste(piece, xy, mask=piece)
+class _BoardRenderer:
+    """Renders the board of one game.
 
-    return image
+    Rather than drawing the whole board every move, this keeps the last
+    image that was drawn and only repaints the squares that changed.
+
+    compress_level is passed to PNG encoding, lower is faster but bigger.
+    If palette is True, the image is quantized first, which makes the
+    file a lot smaller but takes a bit longer.
+    """
+
+    def __init__(self, *, compress_level=1, palette=False):
+        self._compress_level = compress_level
+        self._palette = palette
+        self._image = _BLANK_BOARD.copy()
+        # What's currently drawn on each square, as (piece, highlighted, in check).
+        self._squares = [('', False, False)] * 64
+
+    @property
+    def options(self):
+        return self._compress_level, self._palette
+
+    def _square_states(self, placement, last_move, check):
+        highlighted = _move_squares(last_move)
+        king = {'w': 'K', 'b': 'k'}.get(check)
+
+        for i, char in enumerate(_fen_tokens(placement)):
+            yield char, i in highlighted, char == king
+
+    def _draw(self, placement, last_move, check):
+        image = self._image
+        squares = self._squares
+
+        for i, state in enumerate(self._square_states(placement, last_move, check)):
+            if squares[i] == state:
+                continue
+
+            squares[i] = state
+            char, highlighted, in_check = state
+            y, x = divmod(i, 8)
+            xy = (_PIECE_IMAGE_SIZE * x, _PIECE_IMAGE_SIZE * y)
+
+            image.paste(_CHESS_PIECE_IMAGES['tile_' + 'ld'[(x + y) % 2]], xy)
+            if highlighted:
+                image.alpha_composite(_GREEN_OVERLAY, xy)
+            if not char:
+                continue
+
+            if in_check:
+                image.paste(_CHECK_IMAGE, xy, mask=_CHECK_IMAGE)
+
+            piece = _CHESS_PIECE_IMAGES[('w' if char.isupper() else 'b') + char.lower()]
+            image.paste(piece, xy, mask=piece)
 
-def _board_file_from_fen(fen, last_move=None, check=None):
-    image = _board_image_from_fen(fen, last_move=last_move, check=check)
-    file = io.BytesIO()
-    image.save(file, 'png')
+        return image
 
-    file.seek(0)
-    return discord.File(file, 'chess.png')
+    def _encode(self, image):
+        if self._palette:
+            image = image.quantize(method=Image.FASTOCTREE)
+
+        file = io.BytesIO()
+        image.save(file, 'png', compress_level=self._compress_level)
+        return file.getvalue()
+
+    def render(self, placement, last_move=None, check=None):
+        """Return the board as PNG bytes."""
+        return self._encode(self._draw(placement, last_move, check))
+
+
+# game id -> _BoardRenderer. This lives in the render worker processes.
+#
+# A game's boards might be drawn by different workers, or an ID might be
+# reused by a later game. That's fine, a renderer will just repaint more
+# squares than it would've otherwise.
+_renderers = LRU(64)
+
+def _render_board(game_id, placement, last_move, check, compress_level, palette):
+    renderer = _renderers.get(game_id)
+    if renderer is None or renderer.options != (compress_level, palette):
+        renderer = _renderers[game_id] = _BoardRenderer(compress_level=compress_level, palette=palette)
+    return renderer.render(placement, last_move, check)
 
 # -------- End of image making stuff please continue. -------
 
 def _tile_type(tile):
     return sum(divmod(tile, 8)) % 2
 
-def _fen_key(fen):
-    return fen.rsplit(' ', 2)[0]
+
+# Zobrist hashing, so that positions can be compared without building and
+# comparing FEN strings. The seed is fixed so the hashes are the same across
+# restarts, which makes debugging less confusing.
+def _make_zobrist_keys():
+    rng = random.Random(0xC4E55)
+    keys = lambda n: [rng.getrandbits(64) for _ in range(n)]
+
+    pieces = {piece: keys(64) for piece in 'PNBRQKpnbrqk'}
+    black = rng.getrandbits(64)
+    castling = dict(zip('KQkq', keys(4)))
+    # The en passant square is determined by its file, the rank depends on
+    # whose turn it is, which is already part of the hash.
+    en_passant = dict(zip('abcdefgh', keys(8)))
+    return pieces, black, castling, en_passant
+
+_ZOBRIST_PIECES, _ZOBRIST_BLACK, _ZOBRIST_CASTLING, _ZOBRIST_EN_PASSANT = _make_zobrist_keys()
+
+
+def _state_hash(state):
+    # This is the part of the state that a FEN without the move clocks has,
+    # which is what counts for repetitions.
+    result = _ZOBRIST_BLACK if state.player == 'b' else 0
+    for right in state.rights:
+        result ^= _ZOBRIST_CASTLING.get(right, 0)
+    return result ^ _ZOBRIST_EN_PASSANT.get(state.en_passant[0], 0)
+
+
+class _HashedBoard(chessnut.board.Board):
+    """A Chessnut board that keeps its Zobrist hash and piece counts
+    up to date as pieces are moved.
+    """
+
+    def set_position(self, position):
+        super().set_position(position)
+
+        self.hash = 0
+        # lowercased piece -> number of pieces of that type, of either colour
+        self.counts = collections.Counter()
+        # number of bishops on light and dark squares
+        self.bishop_tiles = [0, 0]
+        for i, piece in enumerate(self._position):
+            self._toggle(i, piece, 1)
+
+    def _toggle(self, index, piece, delta):
+        if piece == ' ':
+            return
+
+        self.hash ^= _ZOBRIST_PIECES[piece][index]
+        lowered = piece.lower()
+        self.counts[lowered] += delta
+        if lowered == 'b':
+            self.bishop_tiles[_tile_type(index)] += delta
+
+    def move_piece(self, start, end, piece):
+        position = self._position
+        old_start, old_end = position[start], position[end]
+        super().move_piece(start, end, piece)
+
+        # Chessnut removes pieces (during en passant) by moving a blank
+        # square onto itself, so start and end can be the same.
+        self._toggle(end, old_end, -1)
+        self._toggle(end, position[end], 1)
+        if start != end:
+            self._toggle(start, old_start, -1)
 
 
 class Game(chessnut.Game):
@@ -148,29 +275,61 @@ class Game(chessnut.Game):
     THREEFOLD_REPETITION = _max + 3
     del _max
 
+    def __init__(self, *args, **kwargs):
+        # position hash -> number of times it's occurred
+        self._repetitions = collections.Counter()
+        self._most_repetitions = 0
+        self._applying_move = False
+        super().__init__(*args, **kwargs)
+
+    def set_fen(self, fen):
+        if not self._applying_move:
+            if not isinstance(self.board, _HashedBoard):
+                self.board = _HashedBoard()
+            super().set_fen(fen)
+        else:
+            # The board was already updated through move_piece, so there's
+            # no need to parse the whole position again.
+            self.fen_history.append(fen)
+            _, player, rights, en_passant, ply, turn = fen.split(' ')
+            self.state = chessnut.game.State(player, rights, en_passant, int(ply), int(turn))
+
+        count = self._repetitions[self.position_hash] = self._repetitions[self.position_hash] + 1
+        self._most_repetitions = max(self._most_repetitions, count)
+
+    def reset(self, *args, **kwargs):
+        self._repetitions.clear()
+        self._most_repetitions = 0
+        super().reset(*args, **kwargs)
+
+    def apply_move(self, move):
+        self._applying_move = True
+        try:
+            super().apply_move(move)
+        finally:
+            self._applying_move = False
+
+    @property
+    def position_hash(self):
+        return self.board.hash ^ _state_hash(self.state)
+
     def fifty_move_rule(self):
         return self.state.ply >= 100
 
     def insufficient_material(self):
-        piece_counter = collections.Counter(map(str.lower, self.board._position))
+        counts = self.board.counts
 
-        if piece_counter['p'] or piece_counter['r'] or piece_counter['q']:
+        if counts['p'] or counts['r'] or counts['q']:
             return False
 
-        if sum(piece_counter.values()) <= 3:
+        if sum(counts.values()) <= 3:
             return True
 
-        return all_equal(_tile_type(i) for i, c in enumerate(self.board._position) if c.lower() == 'b')
+        # All the bishops must be on the same colour.
+        return not all(self.board.bishop_tiles)
 
     def threefold_repetition(self):
-        # TODO: Simplify and possibly use some itertools magic.
-        counter = collections.Counter()
-        for fen in map(_fen_key, reversed(self.fen_history)):
-            counter[fen] += 1
-            if counter[fen] >= 3:
-                return True
-
-        return False
+        return self._most_repetitions >= 3
 
     @property
     def status(self):
@@ -382,7 +541,7 @@ class ChessSession(TwoPlayerSession, board_factory=Game):
     async def _make_move(self):
         try:
             with self._current_player().wait_for_move():
-                await self._ctx.bot.wait_for('message', check=self._check)
+                await self._ctx.bot.wait_for_keyed('message', self._ctx.channel.id, check=self._check)
         except asyncio.TimeoutError:
             self._status = Status.TIMEOUT
 
@@ -406,9 +565,12 @@ class ChessSession(TwoPlayerSession, board_factory=Game):
         player = self._current_player()
 
         check = turn if self._in_check() else None
-        run = self._ctx.bot.loop.run_in_executor
-        get_file = functools.partial(_board_file_from_fen, str(game.board), self._last_move, check)
-        self._image = await run(None, get_file)
+        key = str(game.board), self._last_move, check, _COMPRESS_LEVEL, _PALETTE
+        try:
+            data = _RENDERED_BOARDS[key]
+        except KeyError:
+            data = _RENDERED_BOARDS[key] = await rendering.run('chess', _render_board, id(self), *key, group=self)
+        self._image = discord.File(io.BytesIO(data), 'chess.png')
 
         # thank god dicts are ordered...
         formats = {
@@ -1,34 +1,18 @@
 import enum
-import itertools
+import functools
 import random
 from collections import namedtuple
 
 import discord
-from more_itertools import first_true, locate, windowed
 
+from ..utils import rendering
 from ..utils.formats import escape_markdown
 from ..utils.misc import emoji_url
 from .bases import Status, TwoPlayerGameCog, TwoPlayerSession
+from .connectfourengine import NUM_COLS, NUM_ROWS, best_move, bit, has_four, lines_through
 
-NUM_ROWS = 6
-NUM_COLS = 7
-WINNING_LENGTH = 4
-
-
-def _board_iterator_helper(num_cols, num_rows, length):
-    cols, rows = range(num_cols), range(num_rows)
-    for col in cols:
-        yield from (tuple((col, r) for r in row) for row in windowed(rows, length))
-
-    for row in rows:
-        yield from (tuple((c, row) for c in col) for col in windowed(cols, WINNING_LENGTH))
-
-    for row_diag, col_diag in itertools.product(range(num_rows - length + 1), range(num_cols - length + 1)):
-        yield tuple((col_diag + d, row_diag + d) for d in range(length))
-        yield tuple((col_diag + d, ~row_diag - d) for d in range(length))
-
-_default_indices = list(_board_iterator_helper(NUM_COLS, NUM_ROWS, WINNING_LENGTH))
-
+# How long Chiaki can think about a move for, in seconds.
+COMPUTER_THINKING_TIME = 1.5
 
 class Tile(enum.Enum):
     NONE = '\N{MEDIUM BLACK CIRCLE}'
@@ -39,51 +23,74 @@ class Tile(enum.Enum):
         return self.value
 
 
-def _is_full(line):
-    line = set(line)
-    return len(line) == 1 and Tile.NONE not in line
-
-
-_winning_tile_indices = {Tile.X: 0, Tile.O: 1}
-
 
 class Board:
     _numbers = [f'{i}\U000020e3' for i in range(1, NUM_COLS + 1)]
     _winning_tiles = ['\N{HEAVY BLACK HEART}', '\N{BLUE HEART}']
 
     def __init__(self):
-        self._board = [[Tile.NONE] * NUM_ROWS for _ in range(NUM_COLS)]
+        # Each player's pieces as a bitboard, see connectfourengine.
+        self._pieces = {Tile.X: 0, Tile.O: 0}
+        self._heights = [0] * NUM_COLS
+        self._moves = 0
+        self._last_move = None
         self._last_column = None
+        self._winner = None
+        self._winning_cells = 0
 
     def __str__(self):
-        fmt = ''.join(itertools.repeat('{}', NUM_COLS))
-        return self.top_row + '\n' + '\n'.join(map(fmt.format, *map(reversed, self._board)))
+        x, o = self._pieces[Tile.X], self._pieces[Tile.O]
+        winning, winning_tiles = self._winning_cells, self._winning_tiles
+
+        def tile(column, row):
+            cell = bit(column, row)
+            if x & cell:
+                return winning_tiles[0] if winning & cell else Tile.X.value
+            if o & cell:
+                return winning_tiles[1] if winning & cell else Tile.O.value
+            return Tile.NONE.value
+
+        rows = (
+            ''.join(tile(column, row) for column in range(NUM_COLS))
+            for row in reversed(range(NUM_ROWS))
+        )
+        return self.top_row + '\n' + '\n'.join(rows)
 
     def is_full(self):
-        return Tile.NONE not in itertools.chain.from_iterable(self._board)
+        return self._moves == NUM_ROWS * NUM_COLS
 
     def place(self, column, piece):
-        board_column = self._board[column]
-        board_column[board_column.index(Tile.NONE)] = piece
+        if not 0 <= column < NUM_COLS:
+            raise IndexError(f'column {column} is out of range')
+
+        row = self._heights[column]
+        if row >= NUM_ROWS:
+            raise ValueError(f'column {column} is full')
+
+        pieces = self._pieces[piece] = self._pieces[piece] | bit(column, row)
+        self._heights[column] += 1
+        self._moves += 1
+        self._last_move = column, row
         self._last_column = column
 
-    def mark_winning_lines(self):
-        b = self._board
+        # Only the piece that was just placed can make a new line.
+        if has_four(pieces):
+            self._winner = piece
 
-        lines = (tuple(b[c][r] for c, r in line) for line in _default_indices)
-        for line_idx in locate(lines, _is_full):
-            indices = _default_indices[line_idx]
-            winner = b[indices[0][0]][indices[0][1]]
-            emoji = self._winning_tiles[_winning_tile_indices[winner]]
+    def pieces(self, piece):
+        """Return the bitboard of a given piece, along with the opponent's."""
+        other = Tile.O if piece is Tile.X else Tile.X
+        return self._pieces[piece], self._pieces[other]
 
-            for c, r in indices:
-                # TODO: Custom emojis for tiles?
-                b[c][r] = emoji
+    def mark_winning_lines(self):
+        if self._winner is None:
+            return
+
+        self._winning_cells = lines_through(self._pieces[self._winner], *self._last_move)
 
     @property
     def winner(self):
-        lines = (tuple(self._board[c][r] for c, r in line) for line in _default_indices)
-        return first_true(lines, (None, ), _is_full)[0]
+        return self._winner
 
     @property
     def top_row(self):
@@ -135,6 +142,13 @@ class ConnectFourSession(TwoPlayerSession, board_factory=Board, move_pattern=r'^
         self._board.place(int(place[0]) - 1, self._current_player().symbol)
         self._turn = not self._turn
 
+    async def _computer_move(self):
+        pieces, opponent = self._board.pieces(self._current_player().symbol)
+        search = functools.partial(best_move, time_limit=COMPUTER_THINKING_TIME)
+        column, _, _ = await rendering.run('connect-4', search, pieces, opponent, group=self)
+        self._board.place(column, self._current_player().symbol)
+        self._turn = not self._turn
+
     async def _update_display(self):
         screen = self._display
         user = self._current_player().user
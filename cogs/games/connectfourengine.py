@@ -0,0 +1,208 @@
+"""Connect 4 bitboards and a search for the computer opponent.
+
+Each player's pieces are kept in an int. Columns are 7 bits apart, with
+bit 0 of a column being the bottom row. The 7th bit of every column is
+always empty, so that shifting a line off the top of a column can't wrap
+around into the bottom of the next one.
+
+Everything here is pure Python with no dependencies on the bot, so it
+can be run in the render pool.
+"""
+
+import time
+
+__all__ = ['NUM_COLS', 'NUM_ROWS', 'best_move', 'bit', 'has_four', 'lines_through']
+
+NUM_ROWS = 6
+NUM_COLS = 7
+_COL_BITS = NUM_ROWS + 1
+
+_BOTTOM = sum(1 << (col * _COL_BITS) for col in range(NUM_COLS))
+_BOARD = _BOTTOM * ((1 << NUM_ROWS) - 1)
+
+# Shifts that move a piece to its neighbour in a line:
+# vertical, horizontal, diagonal (/) and diagonal (\)
+_DIRECTIONS = (1, _COL_BITS, _COL_BITS + 1, _COL_BITS - 1)
+
+
+def bit(column, row):
+    return 1 << (column * _COL_BITS + row)
+
+
+def has_four(pieces):
+    """Return whether there are four pieces in a row."""
+    for shift in _DIRECTIONS:
+        pairs = pieces & (pieces >> shift)
+        if pairs & (pairs >> 2 * shift):
+            return True
+    return False
+
+
+def lines_through(pieces, column, row):
+    """Return a bitmask of every line of four or more that goes through a cell."""
+    start = bit(column, row)
+    result = 0
+    for shift in _DIRECTIONS:
+        line = start
+        for step in (shift, -shift):
+            cell = start
+            while True:
+                cell = cell << step if step > 0 else cell >> -step
+                if not cell & pieces:
+                    break
+                line |= cell
+
+        if bin(line).count('1') >= 4:
+            result |= line
+    return result
+
+
+# ---------- Search ----------
+
+_WIN = 1000
+_ORDER = sorted(range(NUM_COLS), key=lambda c: abs(NUM_COLS // 2 - c))
+_COLUMN_MASKS = [((1 << NUM_ROWS) - 1) << (col * _COL_BITS) for col in range(NUM_COLS)]
+
+
+def _winning_cells(pieces, mask):
+    """Return the empty cells that would give the player four in a row."""
+    # Vertical: three on top of each other, and the one above.
+    result = (pieces << 1) & (pieces << 2) & (pieces << 3)
+
+    for shift in _DIRECTIONS[1:]:
+        pairs = (pieces << shift) & (pieces << 2 * shift)
+        result |= pairs & (pieces << 3 * shift)  # _XXX
+        result |= pairs & (pieces >> shift)      # X_XX
+        pairs = (pieces >> shift) & (pieces >> 2 * shift)
+        result |= pairs & (pieces << shift)      # XX_X
+        result |= pairs & (pieces >> 3 * shift)  # XXX_
+
+    return result & (_BOARD ^ mask)
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class _Search:
+    # How many nodes to search between checking the clock
+    CHECK_EVERY = 1024
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.nodes = 0
+        # key -> (depth, flag, score, move)
+        self.table = {}
+
+    def negamax(self, pieces, mask, moves, depth, alpha, beta):
+        """Return the score of the position for the player whose pieces are `pieces`."""
+        self.nodes += 1
+        if not self.nodes % self.CHECK_EVERY and time.perf_counter() > self.deadline:
+            raise _OutOfTime
+
+        possible = (mask + _BOTTOM) & _BOARD
+        if not possible:
+            return 0, None
+
+        # We can win right away.
+        wins = _winning_cells(pieces, mask) & possible
+        if wins:
+            return _WIN - moves, _column_of(wins)
+
+        # The opponent is about to win, so we're forced to block them. If
+        # they have more than one way to win, or we'd have to play right
+        # under one of their wins, we've lost.
+        opponent = pieces ^ mask
+        threats = _winning_cells(opponent, mask)
+        forced = possible & threats
+        if forced:
+            if forced & (forced - 1):
+                return -(_WIN - moves - 1), _column_of(forced)
+            possible = forced
+        possible &= ~(threats >> 1)
+        if not possible:
+            return -(_WIN - moves - 1), None
+
+        if not depth:
+            return self._evaluate(pieces, mask), None
+
+        key = pieces + mask
+        entry = self.table.get(key)
+        best_move = None
+        if entry is not None:
+            entry_depth, flag, score, best_move = entry
+            if entry_depth >= depth:
+                if flag == 0:
+                    return score, best_move
+                if flag < 0 and score <= alpha:
+                    return score, best_move
+                if flag > 0 and score >= beta:
+                    return score, best_move
+
+        original_alpha = alpha
+        best_score = -_WIN * 2
+
+        columns = _ORDER if best_move is None else [best_move, *(c for c in _ORDER if c != best_move)]
+        for column in columns:
+            move = possible & _COLUMN_MASKS[column]
+            if not move:
+                continue
+
+            score, _ = self.negamax(opponent, mask | move, moves + 1, depth - 1, -beta, -alpha)
+            score = -score
+            if score > best_score:
+                best_score, best_move = score, column
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            flag = -1  # upper bound
+        elif best_score >= beta:
+            flag = 1  # lower bound
+        else:
+            flag = 0
+        self.table[key] = depth, flag, best_score, best_move
+        return best_score, best_move
+
+    @staticmethod
+    def _evaluate(pieces, mask):
+        # The number of cells that would win the game for each player is a
+        # cheap but decent guess at who's ahead.
+        ours = bin(_winning_cells(pieces, mask)).count('1')
+        theirs = bin(_winning_cells(pieces ^ mask, mask)).count('1')
+        return ours - theirs
+
+
+def _column_of(cells):
+    return ((cells & -cells).bit_length() - 1) // _COL_BITS
+
+
+def best_move(pieces, opponent, *, time_limit=1.5, max_depth=NUM_ROWS * NUM_COLS):
+    """Return (column, depth, nodes) for the best move for `pieces`.
+
+    This searches deeper and deeper until the time limit runs out, and
+    returns the best move from the deepest search that finished.
+    """
+    mask = pieces | opponent
+    moves = bin(mask).count('1')
+    search = _Search(time.perf_counter() + time_limit)
+
+    possible = (mask + _BOTTOM) & _BOARD
+    # Fall back to any legal move in case even the first search runs out of time.
+    column = next(c for c in _ORDER if possible & _COLUMN_MASKS[c])
+    depth = 0
+
+    try:
+        for depth in range(1, max_depth - moves + 1):
+            score, move = search.negamax(pieces, mask, moves, depth, -_WIN * 2, _WIN * 2)
+            if move is not None:
+                column = move
+            if abs(score) >= _WIN - NUM_ROWS * NUM_COLS:
+                # The game's been solved, there's no point searching deeper.
+                break
+    except _OutOfTime:
+        depth -= 1
+
+    return column, depth, search.nodes
@@ -185,8 +185,10 @@ class Board:
 
 # Board that uses PIL for image. If you just want to copy the board, Ignore this.
 import asyncio
+import functools
 import io
 
+from lru import LRU
 from PIL import Image, ImageDraw, ImageFont
 
 LINE_LENGTH = 120
@@ -195,6 +197,9 @@ LINE_RADIUS = LINE_WIDTH // 2
 DOT_SIZE = 20
 DOT_RADIUS = DOT_SIZE // 2
 LINE_COLOURS = [(255, 0, 0, 255), (0, 0, 255, 255)]
+BOX_COLOURS = [(*(round(c * 0.8) for c in colour[:3]), 255) for colour in LINE_COLOURS]
+DOT_COLOUR = (0, 0, 0, 255)
+BACKGROUND_COLOUR = (245, 245, 245, 255)
 
 
 try:
@@ -205,86 +210,177 @@ except Exception:
 MARGIN_SIZE = 60
 TEXT_OFFSET = MARGIN_SIZE / 3
 
+_BASE = LINE_LENGTH + DOT_SIZE
+
+# Colours that get drawn on top of the base layer. In palette mode these
+# get their own entries at the end of the palette, after the ones that
+# the base layer needs.
+_INKS = [DOT_COLOUR, *LINE_COLOURS, *BOX_COLOURS]
+_BASE_PALETTE_SIZE = 256 - len(_INKS)
+
+
+@functools.lru_cache(maxsize=16)
+def _base_layer(width, height, palette):
+    """Return the parts of the board that never change: the background,
+    the labels and the dots.
+    """
+    size = _BASE * width + DOT_SIZE + MARGIN_SIZE * 2, _BASE * height + DOT_SIZE + MARGIN_SIZE * 2
+    image = Image.new('RGB', size, BACKGROUND_COLOUR[:3])
+    draw = ImageDraw.Draw(image)
+
+    # A-H
+    for i, char in enumerate(string.ascii_uppercase[:width + 1]):
+        text_w, _ = draw.textsize(char, font=_XY_FONT)
+        xy = (i * _BASE + MARGIN_SIZE + text_w // 4, TEXT_OFFSET)
+        draw.text(xy, char, fill=0, font=_XY_FONT)
+    # 1-8
+    for i in range(height + 1):
+        char = str(i + 1)
+        xy = (TEXT_OFFSET, i * _BASE + MARGIN_SIZE)
+        draw.text(xy, char, fill=0, font=_XY_FONT)
+
+    for x, y in itertools.product(range(width + 1), range(height + 1)):
+        _draw_dot(draw, x, y, DOT_COLOUR[:3])
+
+    if palette:
+        # The base layer is just the background and (anti-aliased) black,
+        # so this doesn't lose any colours.
+        image = image.convert('P', palette=Image.ADAPTIVE, colors=_BASE_PALETTE_SIZE)
+        colours = image.getpalette()[:_BASE_PALETTE_SIZE * 3]
+        # Newer versions of Pillow only return the entries that are used.
+        colours.extend([0] * (_BASE_PALETTE_SIZE * 3 - len(colours)))
+        colours.extend(flatten(ink[:3] for ink in _INKS))
+        image.putpalette(colours)
+
+    return image
+
+
+def _draw_dot(draw, x, y, ink):
+    ex, ey = _BASE * x + MARGIN_SIZE, _BASE * y + MARGIN_SIZE
+    draw.ellipse([ex, ey, ex + DOT_SIZE, ey + DOT_SIZE], ink)
+
+
+class _BoardRenderer:
+    """Renders the board of one game.
+
+    Rather than drawing the whole board every move, this starts from a
+    cached base layer and only draws the lines and boxes that weren't
+    there the last time the board was drawn.
+
+    compress_level is passed to PNG encoding, lower is faster but bigger.
+    If palette is True, the board is drawn as a palette image. Unlike chess
+    this doesn't need quantizing, as the board only ever has a handful of
+    colours, and palette images are cheap enough to compress that the
+    default compress_level can be a lot higher.
+    """
+
+    def __init__(self, width, height, *, compress_level=6, palette=True):
+        self._width = width
+        self._height = height
+        self._compress_level = compress_level
+        self._palette = palette
+        self._reset()
+
+    def _reset(self):
+        self._image = _base_layer(self._width, self._height, self._palette).copy()
+        self._draw = ImageDraw.Draw(self._image)
+        # What's currently drawn, in the same layout as the Board.
+        self._horizontal = [[None] * self._width for _ in range(self._height + 1)]
+        self._vertical = [[None] * (self._width + 1) for _ in range(self._height)]
+        self._boxes = [[None] * self._width for _ in range(self._height)]
+
+    def _ink(self, colour):
+        if self._palette:
+            return _BASE_PALETTE_SIZE + _INKS.index(colour)
+        return colour[:3]
+
+    @staticmethod
+    def _changes(drawn, wanted):
+        """Return the (x, y, owner) of every space that needs to be drawn,
+        or None if something that was drawn has to be taken away.
+        """
+        changes = []
+        for y, (drawn_row, row) in enumerate(zip(drawn, wanted)):
+            if drawn_row == row:
+                continue
+
+            for x, (old, new) in enumerate(zip(drawn_row, row)):
+                if old == new:
+                    continue
+                if old is not None:
+                    return None
+                changes.append((x, y, new))
+                drawn_row[x] = new
+        return changes
+
+    def _changed_spaces(self, horizontal, vertical, boxes):
+        # Everything has to be found before drawing anything, because
+        # lines have to be drawn before boxes, and boxes before dots.
+        def changes():
+            return [
+                self._changes(self._horizontal, horizontal),
+                self._changes(self._vertical, vertical),
+                self._changes(self._boxes, boxes),
+            ]
+
+        result = changes()
+        if None in result:
+            # This renderer has a different game drawn (e.g. the ID got
+            # reused), so it has to start over.
+            self._reset()
+            result = changes()
+        return result
+
+    def draw(self, horizontal, vertical, boxes):
+        """Draw the board, returning the image."""
+        h_lines, v_lines, new_boxes = self._changed_spaces(horizontal, vertical, boxes)
+        draw = self._draw
+        # The dots have to go on top of everything else.
+        dots = set()
+
+        for x, y, owner in h_lines:
+            start_x, start_y = _BASE * x + DOT_SIZE + MARGIN_SIZE, _BASE * y + DOT_RADIUS + MARGIN_SIZE
+            coords = [start_x, start_y, start_x + LINE_LENGTH, start_y]
+            draw.line(coords, fill=self._ink(LINE_COLOURS[owner]), width=LINE_WIDTH)
+            dots.update({(x, y), (x + 1, y)})
+
+        for x, y, owner in v_lines:
+            start_x, start_y = _BASE * x + DOT_RADIUS + MARGIN_SIZE, _BASE * y + DOT_SIZE + MARGIN_SIZE
+            coords = [start_x, start_y, start_x, start_y + LINE_LENGTH]
+            draw.line(coords, fill=self._ink(LINE_COLOURS[owner]), width=LINE_WIDTH)
+            dots.update({(x, y), (x, y + 1)})
+
+        offset = DOT_RADIUS + LINE_RADIUS + MARGIN_SIZE
+        for x, y, owner in new_boxes:
+            start_x, start_y = _BASE * x + offset, _BASE * y + offset
+            coords = [start_x, start_y, start_x + LINE_LENGTH + DOT_RADIUS, start_y + LINE_LENGTH + DOT_RADIUS]
+            draw.rectangle(coords, fill=self._ink(BOX_COLOURS[owner]))
+            dots.update({(x, y), (x + 1, y), (x, y + 1), (x + 1, y + 1)})
+
+        dot_ink = self._ink(DOT_COLOUR)
+        for x, y in dots:
+            _draw_dot(draw, x, y, dot_ink)
+
+        return self._image
+
+    def _encode(self, image):
+        file = io.BytesIO()
+        image.save(file, 'png', compress_level=self._compress_level)
+        return file.getvalue()
+
+    def render(self, horizontal, vertical, boxes):
+        """Return the board as PNG bytes."""
+        return self._encode(self.draw(horizontal, vertical, boxes))
 
-class ImageBoard(Board):
-    def _grid_image(self):
-        w, h = self.width, self.height
-        base = LINE_LENGTH + DOT_SIZE
-        size = (base * w + DOT_SIZE, base * h + DOT_SIZE)
-        grid_image = Image.new('RGBA', size)
-        draw = ImageDraw.Draw(grid_image)
-
-        def draw_from(list_, x_offset, y_offset, handle):
-            for y, row in enumerate(list_):
-                start_y = base * y + y_offset
-
-                for x, space in enumerate(row):
-                    if space is None:
-                        continue
-
-                    start_x = base * x + x_offset
-                    colour = LINE_COLOURS[space]
-                    handle(start_x, start_y, colour)
-
-        def draw_line(index):
-            def draw_line(x, y, colour):
-                coords = [x, y] * 2
-                coords[2 + index] += LINE_LENGTH
-                draw.line(coords, fill=colour, width=LINE_WIDTH)
-            return draw_line
-
-        draw_from(self._horizontal, DOT_SIZE, DOT_RADIUS, draw_line(0))
-        draw_from(self._vertical, DOT_RADIUS, DOT_SIZE, draw_line(1))
-
-        def draw_box(x, y, colour):
-            end_x = x + LINE_LENGTH + DOT_RADIUS
-            end_y = y + LINE_LENGTH + DOT_RADIUS
-            colour = (*(round(c * 0.8) for c in colour[:3]), 255, )
-            draw.rectangle([x, y, end_x, end_y], fill=colour)
-
-        draw_from(self._boxes, DOT_RADIUS + LINE_RADIUS, DOT_RADIUS + LINE_RADIUS, draw_box)
-
-        for x, y in itertools.product(range(self.width + 1), range(self.height + 1)):
-            ex, ey = base * x, base * y
-            draw.ellipse([ex, ey, ex + DOT_SIZE, ey + DOT_SIZE], (0, 0, 0, 255))
-
-        return grid_image
 
+class ImageBoard(Board):
     def _image(self):
-        # For performance reasons it might be better to lump this with
-        # the grid... For maintainability reasons, I'm separating the
-        # grid with the text.
-        w, h = self.width, self.height
-        base = LINE_LENGTH + DOT_SIZE
-
-        grid = self._grid_image()
-        grid_w, grid_h = grid.size
-        size = grid_w + MARGIN_SIZE * 2, grid_h + MARGIN_SIZE * 2
-
-        image = Image.new('RGBA', size, (245, 245, 245, 255))
-        image.paste(grid, (MARGIN_SIZE, MARGIN_SIZE), mask=grid)
-        text_draw = ImageDraw.Draw(image)
-
-        # A-H
-        for i, char in enumerate(string.ascii_uppercase[:w + 1]):
-            w, h = text_draw.textsize(char, font=_XY_FONT)
-            xy = (i * base + MARGIN_SIZE + w // 4, TEXT_OFFSET)
-            text_draw.text(xy, char, fill=0, font=_XY_FONT)
-        # 1-8
-        for i in range(h):
-            char = str(i + 1)
-            w, h = text_draw.textsize(char, font=_XY_FONT)
-            xy = (TEXT_OFFSET, i * base + MARGIN_SIZE)
-            text_draw.text(xy, char, fill=0, font=_XY_FONT)
-
-        return image
+        renderer = _BoardRenderer(self.width, self.height)
+        return renderer.draw(self._horizontal, self._vertical, self._boxes).copy()
 
     def _image_file(self):
-        image = self._image()
-        f = io.BytesIO()
-        image.save(f, 'png')
-        f.seek(0)
-        return f
+        renderer = _BoardRenderer(self.width, self.height)
+        return io.BytesIO(renderer.render(self._horizontal, self._vertical, self._boxes))
 
     def image(self, *, async_=False, loop=None):
         if not async_:
@@ -299,6 +395,22 @@ class ImageBoard(Board):
         return loop.run_in_executor(None, self._image_file)
 
 
+# game id -> _BoardRenderer. This lives in the render worker processes.
+#
+# A game's boards might be drawn by different workers, or an ID might be
+# reused by a later game. That's fine, a renderer will just draw more
+# than it would've otherwise, or start over from the base layer.
+_renderers = LRU(64)
+
+def _render_board(game_id, horizontal, vertical, boxes):
+    # This is run in a render worker, so only the lines and boxes are sent.
+    width, height = len(horizontal[0]), len(vertical)
+    renderer = _renderers.get(game_id)
+    if renderer is None or (renderer._width, renderer._height) != (width, height):
+        renderer = _renderers[game_id] = _BoardRenderer(width, height)
+    return renderer.render(horizontal, vertical, boxes)
+
+
 # Below is the game logic. If you just want to copy the board, Ignore this.
 
 import random
@@ -307,6 +419,7 @@ import re
 import discord
 
 from .bases import Status, TwoPlayerGameCog, TwoPlayerSession
+from ..utils import rendering
 from ..utils.context_managers import temp_message
 
 _EMOJIS = ['\U0001f534', '\U0001f535']
@@ -372,8 +485,12 @@ class DotsAndBoxesSession(TwoPlayerSession, move_pattern=_VALID_MOVE_REGEX, boar
         scores = ' | '.join(f'{_EMOJIS[turn]} {score}' for turn, score in board.scoreboard())
         self._display.set_author(name=header)
         self._display.description = instructions + your_turn + scores
-        file = await board.image_file(async_=True)
-        self._image = discord.File(file, 'dots-and-boxes.png')
+        data = await rendering.run(
+            'dots-and-boxes', _render_board, id(self),
+            board._horizontal, board._vertical, board._boxes,
+            group=self,
+        )
+        self._image = discord.File(io.BytesIO(data), 'dots-and-boxes.png')
 
     def _send_message(self):
         return temp_message(self._ctx, file=self._image, embed=self._display)
@@ -96,7 +96,7 @@ class HangmanSession:
 
     async def _loop(self, message):
         while True:
-            guess = await self.ctx.bot.wait_for('message', check=self._check_message)
+            guess = await self.ctx.bot.wait_for_keyed('message', self.ctx.channel.id, check=self._check_message)
             content = guess.content.lower()
             content = content[len(content) > 1:]
 
@@ -2,6 +2,7 @@ import asyncio
 import collections
 import enum
 import itertools
+import operator
 import random
 import re
 import time
@@ -11,16 +12,40 @@ from string import ascii_lowercase, ascii_uppercase
 
 import discord
 from discord.ext import commands
-from more_itertools import chunked
 
-from ..utils import db
+from .minesweeperengine import generate_no_guess, neighbours
+from ..utils import db, rendering
 from ..utils.context_managers import temp_item
 from ..utils.formats import pluralize
 from ..utils.misc import emoji_url, REGIONAL_INDICATORS
-from ..utils.paginator import InteractiveSession, trigger
+from ..utils.paginator import FieldPaginator, InteractiveSession, trigger
 from ..utils.time import duration_units
 
 
+class MinesweeperGame(db.Table, table_name='minesweeper_games'):
+    id = db.Column(db.Serial, primary_key=True)
+    level = db.Column(db.SmallInt)
+    won = db.Column(db.Boolean)
+    guild_id = db.Column(db.BigInt)
+    user_id = db.Column(db.BigInt)
+    played_at = db.Column(db.Timestamp)
+    time = db.Column(db.Double)
+
+    minesweeper_games_time_idx = db.Index(time)
+
+
+# Kept up to date when games are recorded, so records and leaderboards
+# don't have to go through every game ever played.
+class MinesweeperBestTime(db.Table, table_name='minesweeper_best_times'):
+    user_id = db.Column(db.BigInt)
+    level = db.Column(db.SmallInt)
+    time = db.Column(db.Double)
+    played_at = db.Column(db.Timestamp)
+
+    minesweeper_best_times_level_time_idx = db.Index(level, time)
+    __create_extra__ = ['PRIMARY KEY(user_id, level)']
+
+
 class HitMine(Exception):
     def __init__(self, x, y):
         self.point = x, y
@@ -76,17 +101,39 @@ class FlagType(enum.Enum):
     unsure = 'unsure'
 
 
-SURROUNDING = list(filter(any, itertools.product(range(-1, 2), repeat=2)))
-VISIBLE, FLAG, UNSURE, MINE = range(4)
+# Cell states. The mine bit is kept separately from these so that flagging
+# a mine doesn't lose the fact that it's a mine.
+HIDDEN, VISIBLE, FLAG, UNSURE = range(4)
+_STATE_MASK = 0x0F
+_MINE_BIT = 0x10
+
+_NUMBER_TILES = ['\N{BLACK LARGE SQUARE}', *(f'{i}\u20e3' for i in range(1, 9))]
+
 
 class Board:
-    def __init__(self, width, height, mines):
+    def __init__(self, width, height, mines, *, no_guess=False):
         self.__validate(width, height, mines)
         self.width = width
         self.height = height
         self._mine_count = mines
+        # Whether the board should be made so that it can be cleared without
+        # guessing. These boards have to be made by the session, as they're
+        # too slow to make right here.
+        self.no_guess = no_guess
+
+        # Cells are stored left to right, top to bottom, so (x, y) is at
+        # y * width + x.
+        self._cells = bytearray(width * height)
+        # Number of mines around each cell. Only valid once mines are placed.
+        self._numbers = bytearray(width * height)
+        self._neighbours = neighbours(width, height)
+        self._mines_placed = False
+        self._visible_count = 0
+        self._flag_count = 0
+
+        # Rendered rows, None if the row needs to be rendered again.
+        self._rows = [None] * height
 
-        self._cell_types = ({}, set(), set(), set())
         self._revealed = False
         self._explode_at = None
         self._blown_up = False
@@ -110,26 +157,35 @@ class Board:
         if mines <= 0:
             raise ValueError("A least one mine is required")
 
-    def _tiles(self):
-        visible, flags, unsures, mines = self._cell_types
-        reveal = self._revealed
-        visible_get = visible.get
-
-        for y, x in itertools.product(range(self.height), range(self.width)):
-            xy = x, y
-            number = visible_get(xy)
-            if number is not None:
-                yield f'{number}\u20e3' if number else '\N{BLACK LARGE SQUARE}'
-            elif xy in flags:
-                yield '\N{TRIANGULAR FLAG ON POST}'
-            elif xy in unsures:
-                yield '\N{BLACK QUESTION MARK ORNAMENT}'
-            elif xy in mines and reveal:
-                yield '\N{COLLISION SYMBOL}' if self._blown_up else '\N{TRIANGULAR FLAG ON POST}'
-            elif xy == self._explode_at:
-                yield '\N{COLLISION SYMBOL}'
-            else:
-                yield '\N{WHITE LARGE SQUARE}'
+    def _tile(self, i):
+        cell = self._cells[i]
+        state = cell & _STATE_MASK
+
+        if state == VISIBLE:
+            return _NUMBER_TILES[self._numbers[i]]
+        if state == FLAG:
+            return '\N{TRIANGULAR FLAG ON POST}'
+        if state == UNSURE:
+            return '\N{BLACK QUESTION MARK ORNAMENT}'
+        if cell & _MINE_BIT and self._revealed:
+            return '\N{COLLISION SYMBOL}' if self._blown_up else '\N{TRIANGULAR FLAG ON POST}'
+        if i == self._explode_at:
+            return '\N{COLLISION SYMBOL}'
+        return '\N{WHITE LARGE SQUARE}'
+
+    def _render_rows(self):
+        rows, width = self._rows, self.width
+        for y, row in enumerate(rows):
+            if row is None:
+                start = y * width
+                rows[y] = ''.join(map(self._tile, range(start, start + width)))
+        return rows
+
+    def _mark_dirty(self, i):
+        self._rows[i // self.width] = None
+
+    def _mark_all_dirty(self):
+        self._rows = [None] * self.height
 
     def __contains__(self, xy):
         x, y = xy
@@ -138,80 +194,110 @@ class Board:
     def __repr__(self):
         return '{0.__class__.__name__}({0.width}, {0.height}, {0.mine_count})'.format(self)
 
-    def __str__(self):
-        meta_text = (
+    def _meta_text(self):
+        return (
             f'**Marked:** {self.mines_marked} / {self.mine_count}\n'
             f'**Flags Remaining:** {self.remaining_flags}'
         )
 
+    def __str__(self):
         top_row = '\u200b'.join(REGIONAL_INDICATORS[:self.width])
-        rows = map(''.join, chunked(self._tiles(), self.width))
-        string = '\n'.join(map('{0}{1}'.format, REGIONAL_INDICATORS, rows))
+        string = '\n'.join(map('{0}{1}'.format, REGIONAL_INDICATORS, self._render_rows()))
 
-        return f'{meta_text}\n\u200b\n\N{BLACK LARGE SQUARE}{top_row}\n{string}'
+        return f'{self._meta_text()}\n\u200b\n\N{BLACK LARGE SQUARE}{top_row}\n{string}'
 
-    def _place_mines_from(self, x, y):
-        surrounding = set(self._get_neighbours(x, y))
-        click_area = surrounding | {(x, y)}
+    def _set_mines(self, indices):
+        cells, numbers, adjacent = self._cells, self._numbers, self._neighbours
+        for i in indices:
+            cells[i] |= _MINE_BIT
+            for n in adjacent[i]:
+                numbers[n] += 1
 
-        coords = list(itertools.filterfalse(
-            click_area.__contains__,
-            itertools.product(range(self.width), range(self.height))
-        ))
+        self._mines_placed = True
+
+    def _place_mines_from(self, x, y):
+        start = y * self.width + x
+        surrounding = self._neighbours[start]
+        click_area = {start, *surrounding}
 
-        self.mines.update(random.sample(coords, k=min(self._mine_count, len(coords))))
-        self.mines.update(random.sample(surrounding, self._mine_count - len(self.mines)))
+        cells = [i for i in range(len(self._cells)) if i not in click_area]
+        mines = random.sample(cells, k=min(self._mine_count, len(cells)))
+        mines += random.sample(surrounding, self._mine_count - len(mines))
 
         # All mines should be exhausted, unless we somehow made a malformed board.
-        assert len(self.mines) == self._mine_count, f"only {len(self.mines)} mines were placed"
+        assert len(mines) == self._mine_count, f"only {len(mines)} mines were placed"
+        self._set_mines(mines)
 
-    def _is(self, type, x, y):
-        return (x, y) in self._cell_types[type]
+    def place_mines(self, mask):
+        """Place mines from a bitmask of cells, where bit y * width + x is
+        set if there's a mine on (x, y).
+        """
+        self._set_mines(i for i in range(len(self._cells)) if mask >> i & 1)
 
-    is_mine = partialmethod(_is, MINE)
-    is_visible = partialmethod(_is, VISIBLE)
-    is_flag = partialmethod(_is, FLAG)
-    is_unsure = partialmethod(_is, UNSURE)
-    del _is
+    def _state(self, x, y):
+        return self._cells[y * self.width + x] & _STATE_MASK
 
-    def _get_neighbours(self, x, y):
-        pairs = ((x + surr_x, y + surr_y) for (surr_x, surr_y) in SURROUNDING)
-        return (p for p in pairs if p in self)
+    def is_mine(self, x, y):
+        return bool(self._cells[y * self.width + x] & _MINE_BIT)
+
+    def is_visible(self, x, y):
+        return self._state(x, y) == VISIBLE
+
+    def is_flag(self, x, y):
+        return self._state(x, y) == FLAG
+
+    def is_unsure(self, x, y):
+        return self._state(x, y) == UNSURE
 
     def show(self, x, y):
-        if not self.mines:
+        if not self._mines_placed:
             self._place_mines_from(x, y)
 
-        xy = x, y
-        if any(xy in cells for cells in self._cell_types[:-1]):
+        cells, numbers, adjacent = self._cells, self._numbers, self._neighbours
+        start = y * self.width + x
+        cell = cells[start]
+        # Visible, flagged or unsure
+        if cell & _STATE_MASK:
             return
 
-        mines, flags = self.mines, self.flags
-        if xy in mines and xy not in flags:
+        if cell & _MINE_BIT:
             self._blown_up = True
             raise HitMine(x, y)
 
-        neighbours = list(self._get_neighbours(x, y))
-        surrounding = sum(n in mines for n in neighbours)
-        self._cell_types[VISIBLE][xy] = surrounding
+        # Flood-fill the empty area around the cell. Cells are marked as
+        # visible as soon as they're queued so they're never queued twice.
+        cells[start] = VISIBLE
+        queue = collections.deque([start])
+        rows, width = self._rows, self.width
+        shown = 0
+        while queue:
+            i = queue.popleft()
+            rows[i // width] = None
+            shown += 1
+
+            if numbers[i]:
+                continue
+
+            # Cells around an empty cell can't be mines, so any hidden
+            # ones can be shown straight away.
+            for n in adjacent[i]:
+                if cells[n] == HIDDEN:
+                    cells[n] = VISIBLE
+                    queue.append(n)
 
-        if not surrounding:
-            for nx, ny in neighbours:
-                self.show(nx, ny)
+        self._visible_count += shown
 
     def _modify(self, type, x, y):
-        if self.is_visible(x, y):
+        i = y * self.width + x
+        cell = self._cells[i]
+        state = cell & _STATE_MASK
+        if state == VISIBLE:
             return
 
-        types = self._cell_types
-        xy = x, y
-        was_thing = xy in types[type]
-
-        for t in [FLAG, UNSURE]:
-            types[t].discard(xy)
-
-        if not was_thing:
-            types[type].add(xy)
+        new_state = HIDDEN if state == type else type
+        self._flag_count += (new_state == FLAG) - (state == FLAG)
+        self._cells[i] = cell & _MINE_BIT | new_state
+        self._mark_dirty(i)
 
     unsure = partialmethod(_modify, UNSURE)
 
@@ -223,32 +309,26 @@ class Board:
 
     def reveal(self):
         self._revealed = True
+        self._mark_all_dirty()
 
     def explode(self, x, y):
-        self._explode_at = x, y
+        self._explode_at = y * self.width + x
+        self._mark_dirty(self._explode_at)
 
     def is_solved(self):
-        return len(self.visible) + len(self.mines) == self.width * self.height
-
-    @property
-    def mines(self):
-        return self._cell_types[MINE]
-
-    @property
-    def flags(self):
-        return self._cell_types[FLAG]
+        return self._visible_count + self._mine_count == self.width * self.height
 
     @property
-    def visible(self):
-        return self._cell_types[VISIBLE]
+    def mines_placed(self):
+        return self._mines_placed
 
     @property
     def mine_count(self):
-        return len(self.mines) or self._mine_count
+        return self._mine_count
 
     @property
     def mines_marked(self):
-        return len(self.flags)
+        return self._flag_count
 
     @property
     def remaining_flags(self):
@@ -273,22 +353,16 @@ class Board:
 # Subclass that will be used for minesweeper, so that we can see
 # the original board class in case we need it later.
 class CustomizableRowBoard(Board):
-    def __init__(self, width, height, mines, x_row, y_row):
-        super().__init__(width, height, mines)
+    def __init__(self, width, height, mines, x_row, y_row, **kwargs):
+        super().__init__(width, height, mines, **kwargs)
         self._x_row = x_row
         self._y_row = y_row
 
     def __str__(self):
-        meta_text = (
-            f'**Marked:** {self.mines_marked} / {self.mine_count}\n'
-            f'**Flags Remaining:** {self.remaining_flags}'
-        )
-
         top_row = '\u200b'.join(self._x_row[:self.width])
-        rows = map(''.join, chunked(self._tiles(), self.width))
-        string = '\n'.join(map('{0}{1}'.format, self._y_row, rows))
+        string = '\n'.join(map('{0}{1}'.format, self._y_row, self._render_rows()))
 
-        return f'{meta_text}\n\u200b\n\N{BLACK LARGE SQUARE}{top_row}\n{string}'
+        return f'{self._meta_text()}\n\u200b\n\N{BLACK LARGE SQUARE}{top_row}\n{string}'
 
     def examples(self, xs, ys):
         # We have duplicate values in FlagType, so we can't just iterate
@@ -374,12 +448,17 @@ class MinesweeperSession(InteractiveSession):
         super().__init__(ctx)
         self._board = board
         self._control_scheme = ctx.__msw_control_scheme__
-        self._header = f'Minesweeper - {level}'
+        self._level = level
+        self._header = self._make_header()
         self._state = _State.NORMAL
 
         self._help_future = self._bot.loop.create_future()
         self._help_future.set_result(None)
 
+    def _make_header(self):
+        header = f'Minesweeper - {self._level}'
+        return f'{header} (No Guess)' if self._board.no_guess else header
+
     # Overriding paginator stuffs...
     def default(self):
         board, ctx = self._board, self.context
@@ -484,10 +563,30 @@ class MinesweeperSession(InteractiveSession):
                 continue
         return None
 
+    async def _place_no_guess_mines(self, x, y):
+        board = self._board
+        mines = await rendering.run(
+            'minesweeper', generate_no_guess,
+            board.width, board.height, board.mine_count, y * board.width + x,
+            group=self,
+        )
+
+        if mines is None:
+            # Some boards (usually ones that are almost all mines) can't be
+            # made without guessing, so we have to settle for a normal one.
+            board.no_guess = False
+            self._header = self._make_header()
+        else:
+            board.place_mines(mines)
+
     # InteractiveSession.run passes self, we need to ignore that.
     async def _edit_board(self, input, *_):
         x, y, thing = input
-        getattr(self._board, thing.value)(x, y)
+        board = self._board
+        if board.no_guess and not board.mines_placed and thing is FlagType.default:
+            await self._place_no_guess_mines(x, y)
+
+        getattr(board, thing.value)(x, y)
 
         embed = self.default()
         await self._message.edit(embed=embed)
@@ -500,13 +599,6 @@ class MinesweeperSession(InteractiveSession):
             await self._queue.put(None)
 
     async def on_message(self, message):
-        if (
-            self._blocking
-            or message.channel != self._channel
-            or message.author.id not in self._users
-        ):
-            return
-
         parsed = self._parse_message(message.content.lower())
         if not parsed:
             return
@@ -522,36 +614,35 @@ class MinesweeperSession(InteractiveSession):
     async def run(self):
         delete_edit = partial(self._edit, delete_after=45)
 
-        with self._bot.temp_listener(self.on_message):
-            try:
-                start = time.perf_counter()
-                await super().run(delete_after=False, timeout=120)
-            except HitMine as e:
-                # Explode the first mine...
-                self._board.explode(*e.point)
-                await self._edit(0xFFFF00, header='BOOM!', icon=BOOM_ICON)
-                await asyncio.sleep(random.uniform(0.5, 1))
-
-                # Then explode all the mines
-                self._board.reveal()
-                await delete_edit(0xFF0000, 'Game Over!', icon=GAME_OVER_ICON)
-                return False, -1
-            else:
-                state = self._state
-                if state is _State.NORMAL:
-                    # If this happens then run() had timed out. As of now, there's
-                    # no easy way to distinguish between timeout and normal exit,
-                    # so this is the simplest way.
-                    await delete_edit(0, 'Out of time!')
-                    return None, -1
-                if state is _State.STOPPED:
-                    await delete_edit(0, 'Minesweeper Stopped')
-                    return None, -1
-
-                end = time.perf_counter()
-                self._board.reveal()
-                await delete_edit(0x00FF00, "You're winner!", icon=SUCCESS_ICON)
-                return True, end - start
+        try:
+            start = time.perf_counter()
+            await super().run(delete_after=False, timeout=120)
+        except HitMine as e:
+            # Explode the first mine...
+            self._board.explode(*e.point)
+            await self._edit(0xFFFF00, header='BOOM!', icon=BOOM_ICON)
+            await asyncio.sleep(random.uniform(0.5, 1))
+
+            # Then explode all the mines
+            self._board.reveal()
+            await delete_edit(0xFF0000, 'Game Over!', icon=GAME_OVER_ICON)
+            return False, -1
+        else:
+            state = self._state
+            if state is _State.NORMAL:
+                # If this happens then run() had timed out. As of now, there's
+                # no easy way to distinguish between timeout and normal exit,
+                # so this is the simplest way.
+                await delete_edit(0, 'Out of time!')
+                return None, -1
+            if state is _State.STOPPED:
+                await delete_edit(0, 'Minesweeper Stopped')
+                return None, -1
+
+            end = time.perf_counter()
+            self._board.reveal()
+            await delete_edit(0x00FF00, "You're winner!", icon=SUCCESS_ICON)
+            return True, end - start
 
 
 _CUSTOM_DESCRIPTION_TEMPLATE = (
@@ -602,13 +693,6 @@ class _MinesweeperCustomMenu(InteractiveSession):
         await self._message.edit(embed=self.default())
 
     async def on_message(self, message):
-        if (
-            self._blocking
-            or message.channel != self._channel
-            or message.author.id not in self._users
-        ):
-            return
-
         try:
             width, height, mines = map(int, message.content.split(None, 3))
             args = width, height, mines
@@ -641,10 +725,6 @@ class _MinesweeperCustomMenu(InteractiveSession):
         embed.description = _CUSTOM_DESCRIPTION_TEMPLATE.format(*self._args, error=error)
         await self._message.edit(embed=embed)
 
-    async def run(self, **kwargs):
-        with self._bot.temp_listener(self.on_message):
-            await super().run(**kwargs)
-
 _CRB = CustomizableRowBoard
 
 
@@ -655,7 +735,7 @@ class _MinesweeperMenu(InteractiveSession):
         self.level = None
 
     async def _get_world_records(self):
-        query = 'SELECT level, MIN(time) FROM minesweeper_games WHERE won GROUP BY level;'
+        query = 'SELECT level, MIN(time) FROM minesweeper_best_times GROUP BY level;'
 
         wrs = [0] * len(Level)
         for level, wr in await self._bot.pool.fetch(query):
@@ -704,6 +784,9 @@ class _MinesweeperMenu(InteractiveSession):
 del _CRB
 
 
+LEADERBOARD_SIZE = 10
+
+
 def not_playing_minesweeper():
     def predicate(ctx):
         channel_id = ctx.cog.sessions.get(ctx.author.id)
@@ -748,30 +831,53 @@ class Minesweeper:
 
     async def _get_record_text(self, user_id, level, time, *, connection):
         # Check if it's the world record
-        query = """SELECT MIN(time) as "world_record" FROM minesweeper_games
-                   WHERE won AND level = $1;
-                """
+        query = 'SELECT MIN(time) FROM minesweeper_best_times WHERE level = $1;'
         wr = await connection.fetchval(query, level.value)
 
         if wr is None or time < wr:
             return "This is a new world record. Congratulations!!"
 
         # Check if it's a personal best
-        query = """SELECT MIN(time) FROM minesweeper_games
-                   WHERE won AND level = $1 AND user_id = $2;
-                """
-        pb = await connection.fetchval(query, level.value, user_id)
+        query = 'SELECT time FROM minesweeper_best_times WHERE user_id = $1 AND level = $2;'
+        pb = await connection.fetchval(query, user_id, level.value)
 
         if pb is None or time < pb:
             return "This is a new personal best!"
 
         return ''
 
-    async def _say_ending_embed(self, ctx, level, time):
+    async def _record_game(self, ctx, level, won, time, *, connection):
+        """Record a game, returning the record text if it was won."""
+        played_at = datetime.utcnow()
+        # DMs don't have a guild.
+        guild_id = ctx.guild.id if ctx.guild else 0
+
+        query = """INSERT INTO minesweeper_games (level, won, guild_id, user_id, played_at, time)
+                   VALUES ($1, $2, $3, $4, $5, $6);
+                """
+        await connection.execute(query, level.value, won, guild_id, ctx.author.id, played_at, time)
+
+        # Custom boards can be anything, so comparing times between
+        # them doesn't make sense.
+        if not won or level is Level.custom:
+            return ''
+
+        text = await self._get_record_text(ctx.author.id, level, time, connection=connection)
+
+        query = """INSERT INTO minesweeper_best_times (user_id, level, time, played_at)
+                   VALUES ($1, $2, $3, $4)
+                   ON CONFLICT (user_id, level)
+                   DO UPDATE SET time = EXCLUDED.time, played_at = EXCLUDED.played_at
+                   WHERE minesweeper_best_times.time > EXCLUDED.time;
+                """
+        await connection.execute(query, ctx.author.id, level.value, time, played_at)
+        return text
+
+    async def _say_ending_embed(self, ctx, level, time, record_text):
         rounded = round(time, 2)
         text = f'You beat Minesweeper on {level} in {duration_units(rounded)}.'
 
-        description = text
+        description = f'{text}\n{record_text}' if record_text else text
         embed = (discord.Embed(colour=0x00FF00, timestamp=datetime.utcnow(), description=description)
                  .set_author(name='A winner is you!')
                  .set_thumbnail(url=ctx.author.avatar_url)
@@ -784,14 +890,52 @@ class Minesweeper:
         await menu.run()
         return menu.level, menu.board
 
+    async def _get_custom_board(self, ctx):
+        menu = _MinesweeperCustomMenu(ctx)
+        await menu.run(timeout=60)
+        return menu.board if menu.confirmed else None
+
     async def _do_minesweeper(self, ctx, level, board):
         await ctx.release()
-        won, time = await MinesweeperSession(ctx, level, board).run()
+        session = MinesweeperSession(ctx, level, board)
+        try:
+            won, time = await session.run()
+        finally:
+            rendering.cancel(session)
         if won is None:
             return
 
+        # No-guess boards are a lot easier, so they'd make the records
+        # pointless for normal boards.
+        if board.no_guess:
+            if won:
+                await self._say_ending_embed(ctx, level, time, '')
+            return
+
+        await ctx.acquire()
+        async with ctx.db.transaction():
+            record_text = await self._record_game(ctx, level, won, time, connection=ctx.db)
+
         if won:
-            await self._say_ending_embed(ctx, level, time)
+            await self._say_ending_embed(ctx, level, time, record_text)
+
+    async def _minesweeper(self, ctx, level, *, no_guess=False):
+        if level is None:
+            level, board = await self._get_board(ctx)
+            if level is None:
+                return
+        elif level is Level.custom:
+            board = await self._get_custom_board(ctx)
+            if board is None:
+                return
+        else:
+            board = getattr(CustomizableRowBoard, level.name)(
+                x_row=ctx.__msw_x_row__,
+                y_row=ctx.__msw_y_row__
+            )
+
+        board.no_guess = no_guess
+        await self._do_minesweeper(ctx, level, board)
 
     @commands.group(aliases=['msw'], invoke_without_command=True)
     @not_playing_minesweeper()
@@ -803,17 +947,19 @@ class Minesweeper:
                 ctx.command = self.minesweeper_custom
                 return await ctx.reinvoke()
 
-            if level is None:
-                level, board = await self._get_board(ctx)
-                if level is None:
-                    return
-            else:
-                board = getattr(CustomizableRowBoard, level.name)(
-                    x_row=ctx.__msw_x_row__,
-                    y_row=ctx.__msw_y_row__
-                )
+            await self._minesweeper(ctx, level)
 
-            await self._do_minesweeper(ctx, level, board)
+    @minesweeper.command(name='no-guess', aliases=['noguess', 'ng'])
+    @not_playing_minesweeper()
+    @commands.bot_has_permissions(embed_links=True)
+    async def minesweeper_no_guess(self, ctx, level: Level = None):
+        """Starts a game of Minesweeper that can be won without guessing.
+
+        Every tile can be worked out from the numbers, starting
+        from your first click. No more 50/50s!
+        """
+        with self._create_session(ctx):
+            await self._minesweeper(ctx, level, no_guess=True)
 
     @minesweeper.command(name='custom')
     @not_playing_minesweeper()
@@ -832,9 +978,45 @@ class Minesweeper:
                 await self._do_minesweeper(ctx, Level.custom, board)
 
     @minesweeper.command(name='leaderboard', aliases=['lb'])
-    async def minesweeper_leaderboard(self, ctx):
-        """Shows the 10 fastest times for each level of Minesweeper."""
-        pages = _Leaderboard(ctx)
+    async def minesweeper_leaderboard(self, ctx, level: Level = None):
+        """Shows the 10 fastest times for each level of Minesweeper.
+
+        If a level is given, only that level is shown.
+        """
+        if level is Level.custom:
+            return await ctx.send("Custom boards don't have a leaderboard.")
+
+        levels = [level] if level else [l for l in Level if l is not Level.custom]
+
+        # The lateral join lets each level use the (level, time) index,
+        # rather than sorting every best time.
+        query = """SELECT levels.level, best.user_id, best.time
+                   FROM unnest($1::smallint[]) AS levels (level)
+                   CROSS JOIN LATERAL (
+                       SELECT user_id, time FROM minesweeper_best_times
+                       WHERE level = levels.level
+                       ORDER BY time
+                       LIMIT $2
+                   ) AS best
+                   ORDER BY levels.level, best.time;
+                """
+        rows = await ctx.db.fetch(query, [l.value for l in levels], LEADERBOARD_SIZE)
+        by_level = {
+            k: list(g) for k, g in itertools.groupby(rows, key=operator.itemgetter('level'))
+        }
+
+        def field(level):
+            entries = by_level.get(level.value)
+            if not entries:
+                return str(level), 'No records yet.'
+
+            return str(level), '\n'.join(
+                f'{i}. <@{row["user_id"]}> - {row["time"]:.2f}s'
+                for i, row in enumerate(entries, 1)
+            )
+
+        pages = FieldPaginator(ctx, map(field, levels), per_page=len(levels),
+                               inline=False, title='Minesweeper Leaderboard')
         await pages.interact()
 
 def setup(bot):
@@ -0,0 +1,188 @@
+"""Minesweeper solving and no-guess board generation.
+
+Cells are numbered left to right, top to bottom, so the cell at (x, y) is
+y * width + x. Sets of cells are kept as ints, where bit i is set if cell i
+is in the set, so that things like "the hidden neighbours of a cell" are
+just a couple of bitwise operations.
+
+Everything here is pure Python with no dependencies on the bot, so it
+can be run in the render pool.
+"""
+
+import functools
+import random
+
+__all__ = ['generate_no_guess', 'is_solvable', 'neighbours']
+
+
+@functools.lru_cache(maxsize=None)
+def neighbours(width, height):
+    """Return a tuple of the indices of the neighbours of each cell."""
+    result = []
+    for y in range(height):
+        for x in range(width):
+            result.append(tuple(
+                ny * width + nx
+                for ny in range(max(y - 1, 0), min(y + 2, height))
+                for nx in range(max(x - 1, 0), min(x + 2, width))
+                if (nx, ny) != (x, y)
+            ))
+    return tuple(result)
+
+
+@functools.lru_cache(maxsize=None)
+def _neighbour_masks(width, height):
+    return tuple(sum(1 << n for n in cell) for cell in neighbours(width, height))
+
+
+def _popcount(mask):
+    return bin(mask).count('1')
+
+
+def _indices(mask):
+    while mask:
+        bit = mask & -mask
+        yield bit.bit_length() - 1
+        mask ^= bit
+
+
+def is_solvable(width, height, mines, start):
+    """Return whether a board can be cleared from `start` without guessing.
+
+    `mines` is a bitmask of the cells that have mines. This plays the board
+    the way a (very patient) person would: cells are only revealed or
+    flagged if the numbers around them prove that they're safe or mines.
+    """
+    adjacent = neighbours(width, height)
+    masks = _neighbour_masks(width, height)
+    counts = [_popcount(m & mines) for m in masks]
+    mine_count = _popcount(mines)
+    everything = (1 << (width * height)) - 1
+    safe_cells = everything & ~mines
+
+    revealed = flagged = 0
+    # Revealed cells that still have hidden neighbours.
+    frontier = set()
+
+    def reveal(cell):
+        nonlocal revealed
+        stack = [cell]
+        while stack:
+            cell = stack.pop()
+            bit = 1 << cell
+            if revealed & bit:
+                continue
+
+            revealed |= bit
+            if counts[cell]:
+                frontier.add(cell)
+            else:
+                stack.extend(n for n in adjacent[cell] if not revealed >> n & 1)
+
+    if mines >> start & 1:
+        return False
+
+    reveal(start)
+    while revealed != safe_cells:
+        hidden = everything & ~(revealed | flagged)
+        safe = found_mines = 0
+        constraints = []
+
+        # Simple deductions: a number whose mines are all flagged, or whose
+        # hidden neighbours must all be mines.
+        for cell in list(frontier):
+            unknown = masks[cell] & hidden
+            if not unknown:
+                frontier.discard(cell)
+                continue
+
+            need = counts[cell] - _popcount(masks[cell] & flagged)
+            if not need:
+                safe |= unknown
+            elif need == _popcount(unknown):
+                found_mines |= unknown
+            else:
+                constraints.append((unknown, need))
+
+        if not (safe or found_mines):
+            safe, found_mines = _pairwise(constraints)
+
+        if not (safe or found_mines):
+            # The last resort is the total number of mines left.
+            left = mine_count - _popcount(flagged)
+            if not left:
+                safe = hidden
+            elif left == _popcount(hidden):
+                found_mines = hidden
+            else:
+                return False
+
+        flagged |= found_mines
+        for cell in _indices(safe):
+            reveal(cell)
+
+    return True
+
+
+def _pairwise(constraints):
+    """Deduce cells by comparing every pair of overlapping constraints.
+
+    For two constraints A and B, the number of mines in the cells they
+    share is bounded by both of them, which can force the cells that are
+    only in B to be all safe or all mines. When A is a subset of B, this
+    is the usual "B - A has B.need - A.need mines" rule.
+    """
+    safe = found_mines = 0
+    for a_cells, a_need in constraints:
+        for b_cells, b_need in constraints:
+            shared = a_cells & b_cells
+            if not shared or a_cells == b_cells:
+                continue
+
+            only_b = b_cells & ~a_cells
+            if not only_b:
+                continue
+
+            only_a_count = _popcount(a_cells & ~b_cells)
+            only_b_count = _popcount(only_b)
+            shared_count = _popcount(shared)
+
+            most_shared = min(shared_count, a_need, b_need)
+            least_shared = max(0, a_need - only_a_count)
+
+            if b_need - most_shared == only_b_count:
+                found_mines |= only_b
+            elif b_need - least_shared == 0:
+                safe |= only_b
+
+    return safe, found_mines
+
+
+def _place_mines(width, height, mines, start, rng):
+    cells = width * height
+    area = {start, *neighbours(width, height)[start]}
+    # If there isn't enough room to keep the area around the first click
+    # clear then we can only keep the first click itself clear.
+    if cells - len(area) < mines:
+        area = {start}
+
+    population = [i for i in range(cells) if i not in area]
+    return sum(1 << i for i in rng.sample(population, mines))
+
+
+# The number of boards to try before giving up. Dense boards can need a
+# lot of tries, and some boards (e.g. almost all mines) can't be made
+# without guessing at all.
+GENERATE_ATTEMPTS = 500
+
+
+def generate_no_guess(width, height, mines, start, *, attempts=GENERATE_ATTEMPTS, rng=random):
+    """Return a bitmask of mines for a board that can be cleared from
+    `start` without guessing, or None if one couldn't be found.
+    """
+    for _ in range(attempts):
+        placed = _place_mines(width, height, mines, start, rng)
+        if is_solvable(width, height, placed, start):
+            return placed
+
+    return None
@@ -0,0 +1,245 @@
+"""Question store for Open Trivia DB questions.
+
+Questions are fetched in the background and kept in a JSON file, so that
+trivia sessions can take questions straight from here without ever
+waiting on the API, even right after a restart.
+"""
+
+import asyncio
+import collections
+import hashlib
+import logging
+import random
+import time
+from html import unescape
+
+from ..utils.jsonf import JSONFile
+
+logger = logging.getLogger(__name__)
+
+
+class OTDBQuestion(collections.namedtuple('_OTDBQ', 'category type question answer incorrect')):
+    __slots__ = ()
+
+    @property
+    def choices(self):
+        a = [self.answer, *self.incorrect]
+        return random.sample(a, len(a))
+
+    @property
+    def hash(self):
+        # The API doesn't give questions an ID, so this is used to tell
+        # whether we already have a question or not.
+        key = '\0'.join((self.category, self.question, self.answer))
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=12).hexdigest()
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(
+            category=data['category'],
+            type=data['type'],
+            question=unescape(data['question']),
+            answer=unescape(data['correct_answer']),
+            incorrect=tuple(map(unescape, data['incorrect_answers'])),
+        )
+
+
+class QuestionStore:
+    """Keeps a pool of questions from Open Trivia DB.
+
+    A background task makes sure there are always at least `low_water`
+    questions that haven't been given out yet. Once those run out (or the
+    API runs out of questions), questions that were already given out are
+    used instead.
+    """
+
+    BASE = 'https://opentdb.com'
+
+    # How many questions to fetch from the API at once
+    AMOUNT = 50
+
+    # How long it takes since the token was last used before it expires
+    TOKEN_EXPIRY_TIME = 60 * 60 * 6
+
+    # How long to wait after the API failed before trying again
+    RETRY_DELAY = 60
+
+    # How long to wait after running out of new questions before checking
+    # if there are any new ones.
+    EXHAUSTED_RETRY_DELAY = 60 * 60 * 24
+
+    def __init__(self, session, *, filename='otdb_questions.json', base=BASE,
+                 low_water=100, interval=5, loop=None):
+        self._session = session
+        self._base = base.rstrip('/')
+        self._low_water = low_water
+        # OTDB doesn't like being spammed, so we wait a bit between requests.
+        self._interval = interval
+        self._loop = loop or asyncio.get_event_loop()
+
+        self._data = JSONFile(filename, loop=self._loop)
+        self._questions = {
+            hash: OTDBQuestion(*fields[:4], tuple(fields[4]))
+            for hash, fields in self._data.get('questions', {}).items()
+        }
+        self._unseen = [h for h in self._data.get('unseen', []) if h in self._questions]
+
+        self._needs_refill = asyncio.Event()
+        self._refilled = asyncio.Event()
+        self._task = None
+
+    def __len__(self):
+        return len(self._questions)
+
+    @property
+    def unseen(self):
+        return len(self._unseen)
+
+    def start(self):
+        if self._task is None:
+            self._task = self._loop.create_task(self._refill_loop())
+            self._needs_refill.set()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.save()
+
+    async def save(self):
+        self._data['questions'] = {h: list(q) for h, q in self._questions.items()}
+        self._data['unseen'] = self._unseen
+        await self._data.save()
+
+    # --------- Token stuff ----------
+
+    async def _request_token(self):
+        logger.info('Creating a new OTDB token')
+        params = dict(command='request')
+        async with self._session.get(f'{self._base}/api_token.php', params=params) as r:
+            response = await r.json()
+
+        if response['response_code'] != 0:
+            raise RuntimeError(f'could not get an OTDB token (response {response!r})')
+
+        self._data['token'] = response['token']
+        self._data['token_used_at'] = time.time()
+        return response['token']
+
+    async def _get_token(self):
+        token = self._data.get('token')
+        used_at = self._data.get('token_used_at', 0)
+        if token is None or time.time() - used_at >= self.TOKEN_EXPIRY_TIME:
+            return await self._request_token()
+        return token
+
+    # --------- Fetching questions -----------
+
+    async def _fetch(self):
+        """Fetch one batch of questions, returning how many were new."""
+        token = await self._get_token()
+        params = dict(amount=self.AMOUNT, token=token)
+        async with self._session.get(f'{self._base}/api.php', params=params) as r:
+            response = await r.json()
+        self._data['token_used_at'] = time.time()
+
+        code = response['response_code']
+        if code == 3:
+            # The token has expired. We need to regenerate it
+            self._data.pop('token', None)
+            return await self._fetch()
+
+        if code in {1, 4}:
+            # We've exhausted all possible questions with this token, or
+            # there aren't enough left to fill a batch. This token isn't
+            # good anymore.
+            self._data.pop('token', None)
+            return 0
+
+        if code != 0:
+            raise RuntimeError(f'OTDB returned response code {code}')
+
+        questions = self._questions
+        added = 0
+        for data in response['results']:
+            question = OTDBQuestion.from_data(data)
+            hash = question.hash
+            if hash in questions:
+                continue
+
+            questions[hash] = question
+            self._unseen.append(hash)
+            added += 1
+
+        return added
+
+    def _should_refill(self):
+        if len(self._unseen) >= self._low_water:
+            return False
+
+        exhausted_at = self._data.get('exhausted_at')
+        return exhausted_at is None or time.time() - exhausted_at >= self.EXHAUSTED_RETRY_DELAY
+
+    async def _refill(self):
+        try:
+            while self._should_refill():
+                added = await self._fetch()
+                if not added:
+                    # Either the API ran out of questions, or we already had
+                    # every question it gave us. Either way, there's no point
+                    # in hammering it for more. At this point we have to use
+                    # the questions that we already have.
+                    logger.info('OTDB questions have been exhausted.')
+                    self._data['exhausted_at'] = time.time()
+                    break
+
+                self._data.pop('exhausted_at', None)
+                self._refilled.set()
+
+                if self._should_refill():
+                    await asyncio.sleep(self._interval)
+        finally:
+            self._refilled.set()
+            await self.save()
+
+    async def _refill_loop(self):
+        while True:
+            await self._needs_refill.wait()
+            self._needs_refill.clear()
+
+            try:
+                await self._refill()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Failed to refill OTDB questions, retrying in %d seconds', self.RETRY_DELAY)
+                await asyncio.sleep(self.RETRY_DELAY)
+                self._needs_refill.set()
+
+    # --------- Drawing questions -----------
+
+    async def draw(self, amount):
+        """Take up to `amount` questions from the store.
+
+        This only waits if there are no questions at all, which should
+        only happen on the very first run.
+        """
+        if not self._questions:
+            self._refilled.clear()
+            self._needs_refill.set()
+            await self._refilled.wait()
+
+            if not self._questions:
+                raise RuntimeError('no trivia questions could be fetched')
+
+        unseen = self._unseen
+        taken = [self._questions[unseen.pop()] for _ in range(min(amount, len(unseen)))]
+
+        if len(taken) < amount:
+            population = list(self._questions.values())
+            taken.extend(random.sample(population, min(amount - len(taken), len(population))))
+
+        if self._should_refill():
+            self._needs_refill.set()
+
+        return taken
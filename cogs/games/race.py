@@ -8,9 +8,9 @@ from operator import attrgetter
 import discord
 import emoji
 from discord.ext import commands
-from more_itertools import first, one, partition
+from more_itertools import first, partition
 
-from ..utils import db, formats
+from ..utils import currency, db, formats, ticker
 from ..utils.context_managers import temp_item
 
 
@@ -20,6 +20,8 @@ class Racehorses(db.Table):
 
 
 TRACK_LENGTH = 40
+# How many ticks there are between each update of the race
+TICKS_PER_UPDATE = 4
 DEFAULT_TRACK = '-' * TRACK_LENGTH
 ANIMALS = [
     '\N{TURTLE}',
@@ -71,6 +73,8 @@ MAXIMUM_REQUIRED_MEMBERS = 25
 class _RaceWaiter:
     def __init__(self, bot, author):
         self.members = []
+        # user id -> amount. These are only taken once the race starts.
+        self.bets = {}
         self.pot = 0
         self._bot = bot
         self._author = author
@@ -85,7 +89,10 @@ class _RaceWaiter:
         with contextlib.suppress(asyncio.TimeoutError, asyncio.CancelledError):
             await future
 
-        return len(self.members) >= 1
+        return self.has_enough_members()
+
+    def has_enough_members(self):
+        return len(self.members) >= MINIMUM_REQUIRED_MEMBERS
 
     def close(self, member):
         if not self._future:
@@ -96,35 +103,47 @@ class _RaceWaiter:
 
         return self._future.cancel()
 
-    async def _update_pot(self, member, amount, *, connection):
-        if amount is None:
-            return
-
+    async def _check_bet(self, member, amount, *, connection):
         if amount <= 0:
             raise ValueError(f"How can you bet {amount} anyway?")
 
-        currency = self._bot.get_cog('Money')
-        if currency is None:
-            raise RuntimeError("Betting isn't available right now. Please try again later.")
-
         money = await currency.get_money(member.id, connection=connection)
         if money < amount:
             raise RuntimeError(f"{member.mention}, you don't have enough...")
 
-        await currency.add_money(member.id, -amount)
-        self.pot += amount
-
     async def add_member(self, member, amount, *, connection):
+        if self._future is not None and self._future.done():
+            raise RuntimeError('Sorry... you were late...')
+
         if any(r.user.id == member.id for r in self.members):
             raise RuntimeError("You're already in the race!")
 
-        await self._update_pot(member, amount, connection=connection)
+        if amount is not None:
+            await self._check_bet(member, amount, connection=connection)
+
         horse = await _get_race_horse(member.id, connection=connection)
         self.members.append(Racer(member, horse))
+        if amount is not None:
+            self.bets[member.id] = amount
 
         if len(self.members) >= MAXIMUM_REQUIRED_MEMBERS:
             self._full.set()
 
+    async def take_bets(self, *, connection):
+        """Take everyone's bets at once, returning the racers who couldn't
+        afford their bet anymore. Those racers are taken out of the race.
+        """
+        taken = await currency.take_bets(self.bets, connection=connection)
+        left_out = [r for r in self.members if r.user.id in self.bets and r.user.id not in taken]
+        self.members = [r for r in self.members if r not in left_out]
+        self.pot = sum(taken.values())
+
+        if not self.has_enough_members():
+            # Give back the bets that were taken, as there's no race.
+            await currency.pay_out(taken, connection=connection)
+            self.pot = 0
+        return left_out
+
 
 class Racer:
     def __init__(self, user, animal=None):
@@ -171,6 +190,7 @@ class RacingSession:
         self.players = players
         self.pot = pot
         self._winners = set()
+        self._message = None
         self._track = (discord.Embed(colour=self.ctx.bot.colour)
                        .set_author(name='Race has started!')
                        .set_footer(text='Current Leader: None')
@@ -201,23 +221,20 @@ class RacingSession:
             position = min(leader.position, 100)
             self._track.set_footer(text=f'Current Leader: {leader.user} ({position :.2f}m)')
 
+    def tick(self):
+        self.update_game()
+        self.update_current_embed()
+        ticker.edit(self._message, embed=self._track)
+        return self.is_completed()
+
     async def _loop(self):
         for name, value in self._member_fields():
             self._track.add_field(name=name, value=value, inline=False)
 
-        message = await self.ctx.send(embed=self._track)
-
-        while not self.is_completed():
-            await asyncio.sleep(random.uniform(1, 3))
-            self.update_game()
-            self.update_current_embed()
-
-            try:
-                await message.edit(embed=self._track)
-            except discord.NotFound:
-                message = await self.ctx.send(embed=self._track)
-
-            await asyncio.sleep(random.uniform(1, 3))
+        self._message = await self.ctx.send(embed=self._track)
+        await ticker.add(self, every=TICKS_PER_UPDATE)
+        # Make sure the finished race is shown before the results are.
+        self._message = await ticker.finish(self._message)
 
     async def _display_winners(self):
         format_racer = '{0.animal} {0.user} ({0.time_taken:.2f}s)'.format
@@ -257,14 +274,9 @@ class RacingSession:
         await self.ctx.send(embed=embed)
 
     async def _give_to_winners(self):
-        num_winners = len(self._winners)
-        amount = self.pot // num_winners
-        ids = [winner.user.id for winner in self._winners]
-
-        query = """UPDATE currency SET amount = currency.amount + $1
-                   WHERE user_id = ANY($2::BIGINT[])
-                """
-        await self.ctx.db.execute(query, amount, ids)
+        amount = self.pot // len(self._winners)
+        winnings = {winner.user.id: amount for winner in self._winners}
+        await currency.pay_out(winnings, connection=self.ctx.db)
 
     async def run(self):
         await self._loop()
@@ -323,17 +335,22 @@ class Racing:
 
             await ctx.release()  # release as we're gonna be waiting for a bit
             if not await waiter.wait():
-                if amount is not None:
-                    currency = self.bot.get_cog('Money')
-                    if currency:
-                        # We can assert that there will only be one racer because there
-                        # must be at least two racers.
-                        user = one(waiter.members).user
-                        await ctx.acquire()
-                        await currency.add_money(user.id, amount, connection=ctx.db)
-
                 return await ctx.send("Can't start the race. There weren't enough people. ;-;")
 
+            if waiter.bets:
+                # Everyone's bets are taken at once here rather than when they
+                # joined, so a race with a lot of people only needs one query.
+                await ctx.acquire()
+                left_out = await waiter.take_bets(connection=ctx.db)
+                await ctx.release()
+
+                if left_out:
+                    mentions = formats.human_join(r.user.mention for r in left_out)
+                    await ctx.send(f"{mentions} didn't have enough for their bet anymore, so they can't race...")
+
+                if not waiter.has_enough_members():
+                    return await ctx.send("Can't start the race. There weren't enough people. ;-;")
+
         with temp_item(self.sessions, ctx.channel.id, RacingSession(ctx, waiter.members, waiter.pot)) as inst:
             await asyncio.sleep(random.uniform(0.25, 0.75))
             await inst.run()
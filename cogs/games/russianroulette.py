@@ -4,9 +4,10 @@ import random
 
 from collections import deque
 from discord.ext import commands
-from more_itertools import one
 
+from ..utils import currency, ticker
 from ..utils.context_managers import temp_item
+from ..utils.formats import human_join
 
 
 class InvalidGameState(Exception):
@@ -21,28 +22,17 @@ class RussianRouletteSession:
         self.context = ctx
         self.players = deque()
         self.pot = 0
+        # user id -> amount. These are only taken once the game starts.
+        self._bets = {}
 
         self._full = asyncio.Event()
         self._required_message = f'{ctx.prefix}click'
 
-    async def _update_pot(self, member, amount, *, connection):
-        if amount is None:
-            return
-
-        if amount <= 0:
-            raise InvalidGameState(f"How can you bet {amount} anyway?")
-
-        currency = self.context.bot.get_cog('Money')
-        if currency is None:
-            raise InvalidGameState("Betting isn't available right now. Please try again later.")
-
+    async def _check_bet(self, member, amount, *, connection):
         money = await currency.get_money(member.id, connection=connection)
         if money < amount:
             raise InvalidGameState(f"{member.mention}, you don't have enough...")
 
-        await currency.add_money(member.id, -amount)
-        self.pot += amount
-
     async def add_member(self, member, amount, *, connection):
         if self._full.is_set():
             raise InvalidGameState("Sorry... you were late...")
@@ -54,7 +44,8 @@ class RussianRouletteSession:
             if amount <= 0:
                 raise InvalidGameState("Yeah... no. Bet something for once!")
 
-            await self._update_pot(member, amount, connection=connection)
+            await self._check_bet(member, amount, connection=connection)
+            self._bets[member.id] = amount
 
         self.players.appendleft(member)
 
@@ -69,30 +60,54 @@ class RussianRouletteSession:
             message = "Couldn't start Russian Roulette because there wasn't enough people ;-;"
             raise InvalidGameState(message)
 
+    async def _take_bets(self):
+        if not self._bets:
+            return
+
+        # Everyone's bets are taken at once here rather than when they
+        # joined, so a game with a lot of people only needs one query.
+        ctx = self.context
+        await ctx.acquire()
+        try:
+            taken = await currency.take_bets(self._bets, connection=ctx.db)
+            left_out = [m for m in self.players if m.id in self._bets and m.id not in taken]
+            for member in left_out:
+                self.players.remove(member)
+
+            if not self.has_enough_players():
+                # Give back the bets that were taken, as there's no game.
+                await currency.pay_out(taken, connection=ctx.db)
+        finally:
+            await ctx.release()
+
+        if left_out:
+            mentions = human_join(m.mention for m in left_out)
+            await ctx.send(f"{mentions} didn't have enough for their bet anymore, so they can't play...")
+
+        self._check_number_players()
+        self.pot = sum(taken.values())
+
     def wait_until_full(self):
         return asyncio.wait_for(self._full.wait(), timeout=15)
 
     async def _loop(self):
         # some local declarations to avoid excessive dot lookup.
-        wait_for = self.context.bot.wait_for
+        wait_for = self.context.bot.wait_for_keyed
+        channel_id = self.context.channel.id
         send = self.context.send
-        self._full.set()
 
         while len(self.players) != 1:
-            await asyncio.sleep(random.uniform(1, 2))
+            await ticker.wait(2)
             current = self.players.popleft()
 
             def check(m):
-                return (m.channel == self.context.channel
-                        and m.author.id == current.id
-                        and m.content == self._required_message
-                        )
+                return m.author.id == current.id and m.content == self._required_message
 
             await send(f'Alright {current.mention}, it is now your turn. '
                        f'Type `{self._required_message}` to pull the trigger...')
 
             try:
-                await wait_for('message', timeout=30, check=check)
+                await wait_for('message', channel_id, timeout=30, check=check)
             except asyncio.TimeoutError:
                 await send(
                     f"{current} took too long. They must've died a long time ago, "
@@ -116,10 +131,12 @@ class RussianRouletteSession:
             with contextlib.suppress(asyncio.TimeoutError):
                 await self.wait_until_full()
 
+            self._full.set()
             self._check_number_players()
+            await self._take_bets()
             await self._loop()
 
-            await asyncio.sleep(random.uniform(1, 2))
+            await ticker.wait(2)
             return self.players.popleft()
         finally:
             # Regardless of whether or not we had enough players
@@ -158,19 +175,10 @@ class RussianRoulette:
                 try:
                     winner = await inst.run()
                 except InvalidGameState as e:
-                    if amount is not None:
-                        currency = self.bot.get_cog('Money')
-                        if currency:
-                            # We can assert that there will only be one racer because there
-                            # must be at least two players.
-                            user = one(inst.players)
-                            await currency.add_money(user.id, amount, connection=ctx.db)
-
                     return await ctx.send(e)
 
             if inst.pot:
-                query = 'UPDATE currency SET amount = currency.amount + $1 WHERE user_id = $2'
-                await ctx.db.execute(query, inst.pot, winner.id)
+                await currency.pay_out({winner.id: inst.pot}, connection=ctx.db)
                 extra = f'You win **{inst.pot}**{ctx.bot.emoji_config.money}. Hope that was worth it...'
             else:
                 extra = ''
@@ -1,7 +1,9 @@
 import asyncio
+import collections
 import enum
 import functools
 import itertools
+import logging
 import random
 import re
 
@@ -9,16 +11,22 @@ import discord
 from discord.ext import commands
 from more_itertools import flatten, grouper, sliced
 
-from ..utils import db
+from . import sudokuengine
+from .sudokuengine import DIFFICULTIES
+from ..utils import db, rendering
 from ..utils.context_managers import temp_item
+from ..utils.jsonf import JSONFile
 from ..utils.paginator import InteractiveSession, trigger
 from ..utils.misc import emoji_url
 
+logger = logging.getLogger(__name__)
+
 
 class SavedSudokuGames(db.Table, table_name='saved_sudoku_games'):
     user_id = db.Column(db.BigInt, primary_key=True)
     board = db.Column(db.Text)
     clues = db.Column(db.Text)
+    difficulty = db.Column(db.Text)
 
 
 SUDOKU_ICON = emoji_url('\N{INPUT SYMBOL FOR NUMBERS}')
@@ -28,43 +36,6 @@ BOARD_SIZE = 81
 EMPTY = 0
 
 
-# Sudoku board generator by Gareth Rees
-# This works best when m = 3.
-# For some reason it goes significantly slower when m >= 4
-# And it doesn't work when m = 2
-def _make_board(m=3):
-    """Return a random filled m**2 x m**2 Sudoku board."""
-    n = m * m
-    nn = n * n
-    board = [[None] * n for _ in range(n)]
-
-    def search(c=0):
-        i, j = divmod(c, n)
-        i0, j0 = i - i % 3, j - j % 3  # Origin of mxm block
-        numbers = random.sample(range(1, n + 1), n)
-        for x in numbers:
-            if (x not in board[i]                      # row
-                and all(row[j] != x for row in board)  # column
-                and all(x not in row[j0:j0+m]          # block
-                        for row in board[i0:i])):
-                board[i][j] = x
-                if c + 1 >= nn or search(c + 1):
-                    return board
-        else:
-            # No number is valid in this cell: backtrack and try again.
-            board[i][j] = None
-            return None
-
-    return search()
-
-
-def _get_squares(board):
-    size = len(board[0])
-    subsize = int(size ** 0.5)
-    for slice_ in sliced(board, subsize):
-        yield from zip(*(sliced(line, subsize) for line in slice_))
-
-
 def _get_coords(size):
     return itertools.product(range(size), repeat=2)
 
@@ -79,28 +50,106 @@ _letters = 'abcdefghi'
 DEFAULT_CLUE_EMOJIS = tuple(_number_markers)
 
 
+# Rows, columns and boxes are all "units", each of which must have every
+# number exactly once. Units 0-8 are the rows, 9-17 the columns and 18-26
+# the boxes.
+_SIZE = BLOCK_SIZE * BLOCK_SIZE
+_FULL_MASK = (1 << _SIZE) - 1
+
+
+def _cell_units(x, y):
+    return y, _SIZE + x, _SIZE * 2 + y // BLOCK_SIZE * BLOCK_SIZE + x // BLOCK_SIZE
+
+
+_unit_cells = [[] for _ in range(_SIZE * 3)]
+for _xy in _get_coords(_SIZE):
+    for _unit in _cell_units(*_xy):
+        _unit_cells[_unit].append(_xy)
+del _xy, _unit
+
+_unit_names = [
+    *(f'Row {i}' for i in range(1, _SIZE + 1)),
+    *(f'Column {c}' for c in _letters.upper()),
+    *(f'Box {i}' for i in range(1, _SIZE + 1)),
+]
+
+
+def _cell_name(xy):
+    x, y = xy
+    return f'{_letters[x].upper()}{y + 1}'
+
+
+class Conflict(collections.namedtuple('Conflict', 'unit other')):
+    """A rule broken by a number, and the other cell that has that number."""
+    __slots__ = ()
+
+    def __str__(self):
+        return f'{_unit_names[self.unit]} already has one at {_cell_name(self.other)}'
+
+
+class Hint(collections.namedtuple('Hint', 'xy number reason')):
+    __slots__ = ()
+
+    def __str__(self):
+        return f'{_cell_name(self.xy)} must be {self.number}, {self.reason}.'
+
+
 class Board:
-    __slots__ = ('_board', '_clues', '_clue_markers', 'new', 'dirty')
+    __slots__ = (
+        '_board', '_clues', '_clue_markers', 'new', 'dirty',
+        '_counts', '_used', '_conflicts', '_empty', '_difficulty', '_solution',
+    )
 
-    def __init__(self, clues):
+    def __init__(self, grid, difficulty=None):
         self.new = True
         self.dirty = True  # So we can save this right away
-        self._board = _make_board()
-
-        # put holes in the board.
-        coords = list(_get_coords(BLOCK_SIZE * BLOCK_SIZE))
-        random.shuffle(coords)
-        it = iter(coords)
 
-        # slice the iterator first to get the "clues"
-        self._clues = set(itertools.islice(it, clues))
-
-        # Fill the rest
-        for p in it:
-            self[p] = EMPTY
+        self._board = [list(row) for row in sliced(grid, _SIZE)]
+        self._clues = {(i % _SIZE, i // _SIZE) for i, value in enumerate(grid) if value}
+        self._difficulty = difficulty
+        self._solution = None
 
         # Needed to specially mark the clues.
         self._clue_markers = DEFAULT_CLUE_EMOJIS
+        self._build_state()
+
+    def _build_state(self):
+        # unit -> how many times each number appears in it (index 0 is unused)
+        self._counts = [[0] * (_SIZE + 1) for _ in range(_SIZE * 3)]
+        # unit -> bitmask of the numbers in it, where bit n - 1 is number n
+        self._used = [0] * (_SIZE * 3)
+        # number of (unit, number) pairs where the number appears more than once
+        self._conflicts = 0
+        self._empty = _SIZE * _SIZE
+
+        for y, row in enumerate(self._board):
+            for x, value in enumerate(row):
+                if value:
+                    self._add(x, y, value)
+
+    def _add(self, x, y, value):
+        bit = 1 << (value - 1)
+        for unit in _cell_units(x, y):
+            counts = self._counts[unit]
+            counts[value] += 1
+            if counts[value] == 1:
+                self._used[unit] |= bit
+            elif counts[value] == 2:
+                self._conflicts += 1
+
+        self._empty -= 1
+
+    def _remove(self, x, y, value):
+        bit = 1 << (value - 1)
+        for unit in _cell_units(x, y):
+            counts = self._counts[unit]
+            counts[value] -= 1
+            if not counts[value]:
+                self._used[unit] &= ~bit
+            elif counts[value] == 1:
+                self._conflicts -= 1
+
+        self._empty += 1
 
     def __getitem__(self, xy):
         x, y = xy
@@ -111,7 +160,17 @@ class Board:
             raise ValueError("cannot place a number in a pre-placed clue")
 
         x, y = xy
-        self._board[y][x] = value
+        row = self._board[y]
+        old = row[x]
+        if old == value:
+            return
+
+        if old:
+            self._remove(x, y, old)
+        if value:
+            self._add(x, y, value)
+
+        row[x] = value
         self.dirty = True
 
     def __repr__(self):
@@ -140,34 +199,97 @@ class Board:
         )
 
     def is_full(self):
-        return EMPTY not in flatten(self._board)
+        return not self._empty
+
+    def has_conflicts(self):
+        return self._conflicts > 0
+
+    def conflicts(self, xy):
+        """Return the rules that the number at a given cell breaks."""
+        value = self[xy]
+        if not value:
+            return []
+
+        return [
+            Conflict(unit, next(p for p in _unit_cells[unit] if p != xy and self[p] == value))
+            for unit in _cell_units(*xy)
+            if self._counts[unit][value] > 1
+        ]
 
     def validate(self):
         # If the board is not full then it's not valid.
         if not self.is_full():
             raise ValueError('Fill the board first.')
 
-        row_markers = range(1, len(self._board[0]) + 1)
-        column_markers = _letters.upper()
+        # A full board can only have every number once in each unit if none
+        # of them are repeated.
+        if not self._conflicts:
+            return
 
-        required_nums = set(row_markers)
+        unit = next(u for u, counts in enumerate(self._counts) if max(counts) > 1)
+        raise ValueError(f'{_unit_names[unit]} is invalid')
+
+    def _candidates(self, x, y):
+        used = self._used
+        r, c, b = _cell_units(x, y)
+        return _FULL_MASK & ~(used[r] | used[c] | used[b])
+
+    def _get_solution(self):
+        # Puzzles only have one solution, so it only has to be found once.
+        if self._solution is None:
+            clues = self._clues
+            grid = [
+                value if (x, y) in clues else EMPTY
+                for y, row in enumerate(self._board)
+                for x, value in enumerate(row)
+            ]
+            self._solution = sudokuengine.solve(grid)
+        return self._solution
+
+    def hint(self):
+        """Return a Hint for a cell that can be worked out from the board.
+
+        The board shouldn't have any conflicts, as hints would be based on
+        numbers that are wrong. Numbers that are wrong without breaking
+        any rules are pointed out before anything else.
+        """
+        solution = self._get_solution()
+        if solution is None:
+            return None
+
+        def answer(xy):
+            x, y = xy
+            return solution[y * _SIZE + x]
 
-        def check(lines, header, seq):
-            lines = enumerate(map(set, lines))
-            if all(line == required_nums for _, line in lines):
-                return
+        for xy in _get_coords(_SIZE):
+            value = self[xy]
+            if value and value != answer(xy):
+                return Hint(xy, answer(xy), f'not {value}')
 
-            # If this is exhausted then the all clause would've been True
-            # and thus this won't be executed.
-            num, _ = next(lines, (10, None))
-            raise ValueError(f'{header} {seq[num - 1]} is invalid')
+        empty = [(x, y) for x, y in _get_coords(_SIZE) if not self[x, y]]
+        candidates = {xy: self._candidates(*xy) for xy in empty}
 
-        # Check rows
-        check(self._board, 'Row', row_markers)
-        # Check columns
-        check(zip(*self._board), 'Column', column_markers)
-        # Check boxes
-        check(map(flatten, _get_squares(self._board)), 'Box', row_markers)
+        for xy, mask in candidates.items():
+            if mask and not mask & (mask - 1) and mask.bit_length() == answer(xy):
+                return Hint(xy, mask.bit_length(), "as it's the only number that can go there")
+
+        for unit, cells in enumerate(_unit_cells):
+            for number in range(1, _SIZE + 1):
+                if self._counts[unit][number]:
+                    continue
+
+                bit = 1 << (number - 1)
+                places = [xy for xy in cells if candidates.get(xy, 0) & bit]
+                if len(places) == 1 and answer(places[0]) == number:
+                    reason = f"as it's the only place in {_unit_names[unit].lower()} that {number} can go"
+                    return Hint(places[0], number, reason)
+
+        # There's nothing simple left, so just give them the answer.
+        if not empty:
+            return None
+
+        xy = random.choice(empty)
+        return Hint(xy, answer(xy), 'according to the solution')
 
     def clear(self):
         non_clues = itertools.filterfalse(self._clues.__contains__, _get_coords(len(self._board)))
@@ -177,7 +299,7 @@ class Board:
     def to_data(self):
         board = ''.join(map(str, flatten(self._board)))
         clues = ''.join(map(str, flatten(self._clues)))
-        return board, clues
+        return board, clues, self._difficulty
 
     @classmethod
     def from_data(cls, data):
@@ -186,50 +308,30 @@ class Board:
 
         self._board = [list(map(int, row)) for row in sliced(data['board'], 9)]
         self._clues = {(int(x), int(y)) for x, y in sliced(data['clues'], 2)}
+        self._difficulty = data['difficulty']
+        self._solution = None
         self.new = False
         self.dirty = False  # We don't need to save a game we just loaded.
         self._clue_markers = DEFAULT_CLUE_EMOJIS  # Needed to specially mark the clues.
+        self._build_state()
 
         return self
 
-    @classmethod
-    def beginner(cls):
-        """Returns a sudoku board suitable for beginners"""
-        return cls(clues=random.randint(40, 45))
-
-    @classmethod
-    def intermediate(cls):
-        """Returns a sudoku board suitable for intermediate players"""
-        return cls(clues=random.randint(27, 36))
-
-    @classmethod
-    def expert(cls):
-        """Returns a sudoku board suitable for experts"""
-        return cls(clues=random.randint(19, 22))
-
-    @classmethod
-    def minimum(cls):
-        """Returns a sudoku board with the minimum amount of clues needed
-        to achieve a unique solution.
-        """
-        return cls(clues=17)
-
-    # difficulty aliases
-    easy = beginner
-    medium = intermediate
-    hard = expert
-    extreme = minimum
-
     @property
     def difficulty(self):
-        num_clues = len(self._clues)
-        ranges = [(40, 45), (27, 36), (19, 22), (0, 17)]
+        try:
+            return list(DIFFICULTIES).index(self._difficulty) + 1
+        except ValueError:
+            pass
 
-        for i, (low, high) in enumerate(ranges, 1):
-            if low <= num_clues <= high:
+        # Games saved before the difficulty was saved with them have to be
+        # guessed from the number of clues.
+        num_clues = len(self._clues)
+        for i, spec in enumerate(DIFFICULTIES.values(), 1):
+            if spec.min_clues <= num_clues <= spec.max_clues:
                 return i
 
-        return -1
+        return len(DIFFICULTIES)
 
 
 class _EnumConverter:
@@ -251,11 +353,89 @@ class _EnumConverter:
     def random_example(cls, ctx):
         return random.choice(list(cls._member_map_))
 
-_difficulties = [n for n, v in Board.__dict__.items() if isinstance(v, classmethod)]
-_difficulties.remove('from_data')
+_difficulties = [(name, i) for i, name in enumerate(DIFFICULTIES, 1)]
+_difficulties += [
+    (alias, dict(_difficulties)[name]) for alias, name in
+    [('easy', 'beginner'), ('medium', 'intermediate'), ('hard', 'expert'), ('extreme', 'minimum')]
+]
 Difficulty = enum.Enum('Difficulty', _difficulties, type=_EnumConverter)
 
 
+class PuzzlePool:
+    """Puzzles for each difficulty that are made ahead of time.
+
+    Making a puzzle with a unique solution means solving it over and over
+    while removing clues, which is too slow to do when someone starts a
+    game. A background task keeps `size` puzzles of each difficulty ready,
+    and they're kept in a JSON file so that they survive restarts.
+    """
+
+    def __init__(self, *, filename='sudoku_puzzles.json', size=10, loop=None):
+        self._size = size
+        self._loop = loop or asyncio.get_event_loop()
+        self._data = JSONFile(filename, loop=self._loop)
+        self._needs_refill = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = self._loop.create_task(self._refill_loop())
+            self._needs_refill.set()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        rendering.cancel(self)
+        await self._data.save()
+
+    def _generate(self, difficulty):
+        return rendering.run('sudoku', sudokuengine.generate, difficulty, group=self)
+
+    async def _refill(self):
+        for difficulty in DIFFICULTIES:
+            puzzles = self._data.setdefault(difficulty, [])
+            if len(puzzles) >= self._size:
+                continue
+
+            while len(puzzles) < self._size:
+                puzzle = await self._generate(difficulty)
+                puzzles.append(puzzle.grid)
+
+            await self._data.save()
+
+    async def _refill_loop(self):
+        while True:
+            await self._needs_refill.wait()
+            self._needs_refill.clear()
+
+            try:
+                await self._refill()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Failed to generate sudoku puzzles')
+
+    async def draw(self, difficulty):
+        """Return the grid of a puzzle of a given difficulty.
+
+        This only has to wait if all the puzzles of that difficulty
+        have been taken and haven't been replaced yet.
+        """
+        self._needs_refill.set()
+
+        puzzles = self._data.get(difficulty)
+        if puzzles:
+            puzzle = puzzles.pop()
+            # Otherwise the puzzle could be given out again after a restart.
+            await self._data.save()
+            return puzzle
+
+        puzzle = await self._generate(difficulty)
+        return puzzle.grid
+
+
 HELP_TEXT = '''
 The goal is to fill each space with a number
 from 1 to 9, such that each row, column, and
@@ -366,6 +546,22 @@ class SudokuSession(InteractiveSession):
         self._board.clear()
         return self.default()
 
+    @trigger('\N{ELECTRIC LIGHT BULB}', fallback='hint', block=True)
+    async def hint(self):
+        """Hint"""
+        if not self._help_future.done():
+            self._help_future.cancel()
+
+        if self._board.has_conflicts():
+            await self._queue_edit(0xF44336, 'Fix the numbers that break the rules first.\n')
+            return
+
+        hint = self._board.hint()
+        if hint is None:
+            return None
+
+        await self._queue_edit(0xFFC107, f'Hint: {hint}\n')
+
     # ---------- Save Game ---------------
 
     async def _confirm(self, prompt, *, timeout=None):
@@ -373,10 +569,7 @@ class SudokuSession(InteractiveSession):
         choices = {'y', 'yes', 'n', 'no'}
 
         def check(m):
-            return (m.channel == self._channel
-                    and m.author == ctx.author
-                    and m.content.lower() in choices
-                    )
+            return m.author == ctx.author and m.content.lower() in choices
 
         d = self.default()
         d.description = f'**{prompt}**\n(Type `yes` or `no`)\n\u200b\n{self._board}'
@@ -385,7 +578,7 @@ class SudokuSession(InteractiveSession):
         await self._message.edit(embed=d)
 
         try:
-            message = await ctx.bot.wait_for('message', check=check, timeout=timeout)
+            message = await ctx.bot.wait_for_keyed('message', self._channel.id, check=check, timeout=timeout)
         except asyncio.TimeoutError:
             return False
 
@@ -415,10 +608,10 @@ class SudokuSession(InteractiveSession):
         ctx = self.context
         args = self._board.to_data()
 
-        query = """INSERT INTO saved_sudoku_games (user_id, board, clues)
-                   VALUES ($1, $2, $3)
+        query = """INSERT INTO saved_sudoku_games (user_id, board, clues, difficulty)
+                   VALUES ($1, $2, $3, $4)
                    ON CONFLICT (user_id)
-                   DO UPDATE SET board=$2, clues=$3;
+                   DO UPDATE SET board=$2, clues=$3, difficulty=$4;
                 """
 
         await self._bot.pool.execute(query, ctx.author.id, *args)
@@ -531,16 +724,17 @@ class SudokuSession(InteractiveSession):
         except (IndexError, ValueError):
             return
 
+        # Only the cell that was changed needs to be checked, as any other
+        # conflicts would've been shown when those cells were changed.
+        conflicts = self._board.conflicts((x, y))
+        if conflicts:
+            reasons = '\n'.join(map(str, conflicts))
+            await self._queue_edit(0xF44336, f"{_cell_name((x, y))} can't be {number}.\n{reasons}\n")
+            return
+
         return await self.__validate()
 
     async def on_message(self, message):
-        if (
-            self._blocking
-            or message.channel != self._channel
-            or message.author.id not in self._users
-        ):
-            return
-
         # Parse the input right away so that we don't have any
         # random messages resetting the timer.
         result = self._parse_input(message.content)
@@ -554,15 +748,14 @@ class SudokuSession(InteractiveSession):
         await super().cleanup(**kwargs)
 
     async def run(self):
-        with self._bot.temp_listener(self.on_message):
-            timeout = 300 * (self._board.difficulty + 1) / 2
-            await super().run(timeout=timeout)
+        timeout = 300 * (self._board.difficulty + 1) / 2
+        await super().run(timeout=timeout)
 
 
-def _board_setter(emoji, name, method):
+def _difficulty_setter(emoji, name, difficulty):
     @trigger(emoji, fallback=f'{emoji[0]}|{name.lower()}')
     async def set_func(self):
-        self.board = method()
+        self.difficulty = difficulty
         await self.stop()
     set_func.__name__ = name
     return set_func
@@ -572,12 +765,13 @@ class SudokuMenu(InteractiveSession, stop_emoji=None, stop_fallback=None):
         super().__init__(ctx)
         self._saved_board = None
         self.board = None
+        self.difficulty = None
         self._reaction_map = SudokuMenu._reaction_map.copy()
 
-    easy    = _board_setter('1\u20e3', 'Easy',    Board.easy)
-    medium  = _board_setter('2\u20e3', 'Medium',  Board.medium)
-    hard    = _board_setter('3\u20e3', 'Hard',    Board.hard)
-    extreme = _board_setter('4\u20e3', 'Extreme', Board.extreme)
+    easy    = _difficulty_setter('1\u20e3', 'Easy',    'beginner')
+    medium  = _difficulty_setter('2\u20e3', 'Medium',  'intermediate')
+    hard    = _difficulty_setter('3\u20e3', 'Hard',    'expert')
+    extreme = _difficulty_setter('4\u20e3', 'Extreme', 'minimum')
 
     @trigger('\U0001f4be', fallback='resume|load')
     async def resume_game(self):
@@ -610,14 +804,25 @@ class Sudoku:
     def __init__(self, bot):
         self.bot = bot
         self.sessions = {}
+        self.puzzles = PuzzlePool(loop=bot.loop)
+        self.puzzles.start()
+
+    def __unload(self):
+        self.bot.loop.create_task(self.puzzles.close())
 
-    async def _get_difficulty(self, ctx):
+    async def _new_board(self, difficulty):
+        return Board(await self.puzzles.draw(difficulty), difficulty)
+
+    async def _get_board(self, ctx):
         menu = SudokuMenu(ctx)
         try:
             await asyncio.wait_for(menu.run(), timeout=20)
         except asyncio.TimeoutError:
             await ctx.send('Took too long...')
             return None
+
+        if menu.difficulty is not None:
+            return await self._new_board(menu.difficulty)
         return menu.board
 
     @commands.command()
@@ -627,9 +832,9 @@ class Sudoku:
             return await ctx.send('Please finish your other Sudoku game first.')
 
         if difficulty is None:
-            board = await self._get_difficulty(ctx)
+            board = await self._get_board(ctx)
         else:
-            board = getattr(Board, difficulty)()
+            board = await self._new_board(difficulty)
 
         if board is None:
             return
@@ -0,0 +1,298 @@
+"""Sudoku solving, generation and grading.
+
+Grids are flat lists of n * n numbers (where n = m * m and m is the size
+of a block), going left to right, top to bottom, with 0 for empty cells.
+Which numbers can go where is tracked with a bitmask for every row,
+column and block, where bit d - 1 is set if d has already been used.
+
+Everything here is pure Python with no dependencies on the bot, so it
+can be run in the render pool.
+"""
+
+import collections
+import functools
+import random
+
+__all__ = [
+    'DIFFICULTIES', 'Puzzle',
+    'count_solutions', 'generate', 'generate_solution', 'grade', 'solve',
+]
+
+
+# Grades returned by grade()
+NAKED_SINGLES = 1   # Every cell can be filled because it only has one candidate
+HIDDEN_SINGLES = 2  # Needs finding the only place in a unit a number can go
+GUESSING = 3        # Needs guessing (or something fancier than singles)
+
+
+class _Geometry(collections.namedtuple('_Geometry', 'n row col box units popcount')):
+    __slots__ = ()
+
+
+@functools.lru_cache(maxsize=None)
+def _geometry(m):
+    n = m * m
+    cells = range(n * n)
+    row = [i // n for i in cells]
+    col = [i % n for i in cells]
+    box = [r // m * m + c // m for r, c in zip(row, col)]
+
+    units = [[] for _ in range(n * 3)]
+    for i in cells:
+        units[row[i]].append(i)
+        units[n + col[i]].append(i)
+        units[n * 2 + box[i]].append(i)
+
+    popcount = [bin(i).count('1') for i in range(1 << n)]
+    return _Geometry(n, row, col, box, units, popcount)
+
+
+def _bits(mask):
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
+
+
+def _constraints(grid, geo):
+    """Return the used masks for each row, column and box, and the
+    indices of the empty cells, or None if the grid breaks the rules.
+    """
+    n, row, col, box = geo.n, geo.row, geo.col, geo.box
+    rows, cols, boxes = [0] * n, [0] * n, [0] * n
+    empty = []
+
+    for i, value in enumerate(grid):
+        if not value:
+            empty.append(i)
+            continue
+
+        bit = 1 << (value - 1)
+        r, c, b = row[i], col[i], box[i]
+        if (rows[r] | cols[c] | boxes[b]) & bit:
+            return None
+
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+
+    return rows, cols, boxes, empty
+
+
+def _search(grid, m, limit, rng=None):
+    """Return up to `limit` solutions of a grid.
+
+    This always fills the cell with the fewest candidates first, which
+    means forced cells are filled straight away without any branching.
+    """
+    geo = _geometry(m)
+    state = _constraints(grid, geo)
+    if state is None:
+        return []
+
+    grid = list(grid)
+    rows, cols, boxes, empty = state
+    full = (1 << geo.n) - 1
+    row, col, box, popcount = geo.row, geo.col, geo.box, geo.popcount
+    solutions = []
+
+    def search():
+        if not empty:
+            solutions.append(grid[:])
+            return len(solutions) >= limit
+
+        best, best_count, best_mask = 0, geo.n + 1, 0
+        for i, cell in enumerate(empty):
+            mask = full & ~(rows[row[cell]] | cols[col[cell]] | boxes[box[cell]])
+            count = popcount[mask]
+            if count < best_count:
+                best, best_count, best_mask = i, count, mask
+                if count <= 1:
+                    break
+
+        if not best_count:
+            return False
+
+        cell = empty[best]
+        empty[best] = empty[-1]
+        empty.pop()
+        r, c, b = row[cell], col[cell], box[cell]
+
+        candidates = list(_bits(best_mask))
+        if rng is not None:
+            rng.shuffle(candidates)
+
+        done = False
+        for bit in candidates:
+            rows[r] |= bit
+            cols[c] |= bit
+            boxes[b] |= bit
+            grid[cell] = bit.bit_length()
+
+            done = search()
+
+            rows[r] ^= bit
+            cols[c] ^= bit
+            boxes[b] ^= bit
+            if done:
+                break
+
+        grid[cell] = 0
+        empty.append(cell)
+        empty[best], empty[-1] = empty[-1], empty[best]
+        return done
+
+    search()
+    return solutions
+
+
+def solve(grid, m=3):
+    """Return a solution to a grid, or None if it has no solutions."""
+    solutions = _search(grid, m, 1)
+    return solutions[0] if solutions else None
+
+
+def count_solutions(grid, m=3, limit=2):
+    """Return the number of solutions a grid has, stopping at `limit`.
+
+    With the default limit this is enough to tell whether a puzzle
+    has a unique solution.
+    """
+    return len(_search(grid, m, limit))
+
+
+def generate_solution(m=3, rng=random):
+    """Return a random filled grid."""
+    n = m * m
+    return _search([0] * (n * n), m, 1, rng)[0]
+
+
+def grade(grid, m=3):
+    """Return how hard a puzzle with a unique solution is to solve by hand.
+
+    The puzzle is solved using only naked and hidden singles, the same way
+    a person would. The result is NAKED_SINGLES or HIDDEN_SINGLES if that
+    is enough, otherwise GUESSING.
+    """
+    geo = _geometry(m)
+    state = _constraints(grid, geo)
+    if state is None:
+        raise ValueError('grid is not valid')
+
+    grid = list(grid)
+    rows, cols, boxes, empty = state
+    empty = set(empty)
+    full = (1 << geo.n) - 1
+    row, col, box, units = geo.row, geo.col, geo.box, geo.units
+    result = NAKED_SINGLES
+
+    def place(cell, bit):
+        grid[cell] = bit.bit_length()
+        rows[row[cell]] |= bit
+        cols[col[cell]] |= bit
+        boxes[box[cell]] |= bit
+        empty.discard(cell)
+
+    while empty:
+        candidates = {
+            cell: full & ~(rows[row[cell]] | cols[col[cell]] | boxes[box[cell]])
+            for cell in empty
+        }
+        if not all(candidates.values()):
+            raise ValueError('grid has no solution')
+
+        singles = [(cell, mask) for cell, mask in candidates.items() if not mask & (mask - 1)]
+        if singles:
+            for cell, bit in singles:
+                if cell in empty and not (rows[row[cell]] | cols[col[cell]] | boxes[box[cell]]) & bit:
+                    place(cell, bit)
+            continue
+
+        found = False
+        for unit in units:
+            # Numbers that are a candidate for exactly one cell in this unit.
+            once = twice = 0
+            for cell in unit:
+                mask = candidates.get(cell, 0)
+                twice |= once & mask
+                once |= mask
+            once &= ~twice
+
+            for bit in _bits(once):
+                cell = next(c for c in unit if candidates.get(c, 0) & bit)
+                if cell in empty and not (rows[row[cell]] | cols[col[cell]] | boxes[box[cell]]) & bit:
+                    place(cell, bit)
+                    found = True
+
+        if not found:
+            return GUESSING
+        result = HIDDEN_SINGLES
+
+    return result
+
+
+class _Difficulty(collections.namedtuple('_Difficulty', 'min_clues max_clues min_grade max_grade')):
+    __slots__ = ()
+
+
+# Clue counts are for a 9x9 grid, and are scaled by the number of cells
+# for other sizes.
+DIFFICULTIES = {
+    'beginner':     _Difficulty(40, 45, NAKED_SINGLES, NAKED_SINGLES),
+    'intermediate': _Difficulty(27, 36, NAKED_SINGLES, HIDDEN_SINGLES),
+    'expert':       _Difficulty(22, 26, HIDDEN_SINGLES, GUESSING),
+    # Clues are removed until none of them can be removed anymore.
+    'minimum':      _Difficulty(0, 0, HIDDEN_SINGLES, GUESSING),
+}
+
+# How many times to try to get a puzzle of the right grade before giving up
+# and going with whatever we've got.
+GENERATE_ATTEMPTS = 20
+
+
+class Puzzle(collections.namedtuple('Puzzle', 'grid solution grade')):
+    __slots__ = ()
+
+    @property
+    def clues(self):
+        return sum(map(bool, self.grid))
+
+
+def _dig(solution, m, target, rng):
+    """Remove clues from a solution for as long as it stays unique,
+    stopping once there are only `target` clues left.
+    """
+    grid = list(solution)
+    clues = len(grid)
+    cells = list(range(clues))
+    rng.shuffle(cells)
+
+    for cell in cells:
+        if clues <= target:
+            break
+
+        value, grid[cell] = grid[cell], 0
+        if count_solutions(grid, m) == 1:
+            clues -= 1
+        else:
+            grid[cell] = value
+
+    return grid
+
+
+def generate(difficulty, m=3, rng=random):
+    """Return a random Puzzle with a unique solution for a difficulty."""
+    spec = DIFFICULTIES[difficulty]
+    cells = m ** 4
+
+    for _ in range(GENERATE_ATTEMPTS):
+        solution = generate_solution(m, rng)
+        target = round(rng.randint(spec.min_clues, spec.max_clues) * cells / 81)
+        grid = _dig(solution, m, target, rng)
+
+        puzzle_grade = grade(grid, m)
+        puzzle = Puzzle(grid, solution, puzzle_grade)
+        if spec.min_grade <= puzzle_grade <= spec.max_grade:
+            break
+
+    return puzzle
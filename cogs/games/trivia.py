@@ -1,24 +1,21 @@
 import asyncio
 import collections
 import contextlib
-import glob
 import io
 import itertools
-import inspect
 import json
 import logging
 import os
 import random
-import time
-from html import unescape
+import re
 
-import aiohttp
 import discord
 from discord.ext import commands
 from more_itertools import always_iterable
 from PIL import Image
 
-from ..utils import cache
+from .otdb import QuestionStore
+from ..utils import cache, rendering
 from ..utils.deprecated import DeprecatedCommand
 from ..utils.formats import pluralize
 from ..utils.misc import emoji_url
@@ -58,6 +55,13 @@ class BaseTriviaSession:
 
     # These methods can be overriden by subclasses.
 
+    def _prepare_question(self, question):
+        """Called with each question before it's shown.
+
+        Anything that's needed for checking answers should be made here,
+        rather than for every message.
+        """
+
     def _answer_embed(self, user):
         score = self._score_board[user.id]
         action = 'wins the game' if score >= POINTS_TO_WIN else 'got it'
@@ -83,14 +87,16 @@ class BaseTriviaSession:
     # End.
 
     async def _loop(self):
-        wait_for = self._ctx.bot.wait_for
+        wait_for = self._ctx.bot.wait_for_keyed
+        channel_id = self._ctx.channel.id
 
         for q in itertools.count(1):
             self._current_question = await self._get_question()
+            self._prepare_question(self._current_question)
             await self._show_question(q)
 
             try:
-                message = await wait_for('message', timeout=20, check=self._check)
+                message = await wait_for('message', channel_id, timeout=20, check=self._check)
             except asyncio.TimeoutError:
                 await self._show_answer(correct=False)
             else:
@@ -165,142 +171,25 @@ class BaseTriviaSession:
         return leaderboard[0] if leaderboard else None
 
 
-class OTDBQuestion(collections.namedtuple('_OTDBQ', 'category type question answer incorrect')):
-    __slots__ = ()
-
-    @property
-    def choices(self):
-        a = [self.answer, *self.incorrect]
-        return random.sample(a, len(a))
-
-    @classmethod
-    def from_data(cls, data):
-        return cls(
-            category=data['category'],
-            type=data['type'],
-            question=unescape(data['question']),
-            answer=unescape(data['correct_answer']),
-            incorrect=tuple(map(unescape, data['incorrect_answers'])),
-        )
-
 class DefaultTriviaSession(BaseTriviaSession):
-    BASE = 'https://opentdb.com/api.php'
-    TOKEN_BASE = 'https://opentdb.com/api_token.php'
-
-    # How many questions to fetch from the API
-    AMOUNT = 50
-
-    # How long it takes since the token was last used before it expires
-    TOKEN_EXPIRY_TIME = 60 * 60 * 6
-
-    # These are local to the class and are not meant to be used publicly.
-    # However they're global as all trivia games will be using the same type
-    # of questions.
-    _session = aiohttp.ClientSession()
-
-    # The API token used for OTDB. This will ensure that we don't get the
-    # same question twice.
-    __token = None
-
-    # A lock is needed here because we're messing with class-global state.
-    __lock = asyncio.Lock()
-
-    # A cache is required to make sure we have a fallback for when we exhaust all questions.
-    __cache = set()
-
-    # This is needed to check if we exhausted all possible questions.
-    __exhausted = False
-
-    # This is needed to check if the token has expired. The token gets deleted
-    # after 6 hours of inactivity.
-    __last_used = time.monotonic()
+    # How many questions a session takes from the store at once.
+    AMOUNT = 15
 
     def __init__(self, ctx):
         super().__init__(ctx)
 
+        self._store = ctx.cog.otdb
         self._choices = None
+        self._answer_number = None
         self._pending = []
         self._answerers = set()
 
-        if len(self.__cache) >= 500:
-            # We should probably pre-fill this because most trivia games
-            # don't last very long. So we don't need to make an HTTP request
-            # when we don't have to.
-            self._pending.extend(random.sample(self.__cache, 15))
-
-    @classmethod
-    async def initialize(cls):
-        if cls.__token is not None:
-            return
-
-        logger.info(f'Creating a new OTDB token at {time.monotonic()}')
-        async with cls._session.get(cls.TOKEN_BASE, params=dict(command='request')) as r:
-            response = await r.json()
-
-        assert response['response_code'] == 0
-        cls.__token = response['token']
-        cls.__last_used = time.monotonic()
-
-    @classmethod
-    def to_args(cls):
-        if not cls.__token:
-            return None
-
-        now = time.monotonic()
-        if now - cls.__last_used >= cls.TOKEN_EXPIRY_TIME:
-            return None
-
-        return cls.__token, cls.__cache, cls.__last_used
-
-    @classmethod
-    def refresh(cls, args):
-        logger.info('Re-using OTDB token from last reload.')
-        cls.__token, cls.__cache, cls.__last_used = args
-
-    async def __get(self):
-        if self.__token is None:
-            await self.initialize()
-
-        params = dict(amount=self.AMOUNT, token=self.__token)
-        async with self._session.get(self.BASE, params=params) as r:
-            response = await r.json()
-            self.__class__.__last_used = time.monotonic()
-
-        if response['response_code'] == 3:
-            # Ensure this is None as initialize checks for None token.
-            self.__class__.__token = None
-            # The token has expired. We need to regenerate it
-            await self.initialize()
-            # We don't need the cache because we're going to get dupes anyway.
-            self.__cache.clear()
-            # recurrrrsion cuz why not
-            return await self.__get()
-
-        if response['response_code'] == 4:
-            # We've exhausted all possible questions. At this point we have
-            # to exclusively use the cache.
-            self.__exhausted = True
-            self.__token = None  # This token isn't good anymore.
-            assert self.__cache, 'cache is empty even though questions have been exhausted'
-            return random.sample(self.__cache, self.AMOUNT)
-
-        questions = tuple(map(OTDBQuestion.from_data, response['results']))
-        self.__cache.update(questions)
-        return questions
-
     async def _get_question(self):
         # Because we're getting a new question we need to refresh the answerer cache.
         self._answerers.clear()
 
         if not self._pending:
-            if self.__exhausted:
-                # We don't need a lock for this because we don't modify
-                # the cache.
-                questions = random.sample(self.__cache, self.AMOUNT)
-            else:
-                async with self.__lock:
-                    questions = await self.__get()
-            self._pending.extend(questions)
+            self._pending.extend(await self._store.draw(self.AMOUNT))
 
         return self._pending.pop()
 
@@ -324,22 +213,22 @@ class DefaultTriviaSession(BaseTriviaSession):
             return False
 
         number = int(message.content)
-
-        try:
-            choice = self._choices[number - 1]
-        except IndexError:
+        if not 1 <= number <= len(self._choices):
             return False
 
         # We only want people who actually try.
         self._answer_waiter.set()
         self._answerers.add(author_id)
         # TODO: Delete answers if bot has perms?
-        return choice == self._current_question.answer
+        return number == self._answer_number
 
-    async def _show_question(self, number):
-        question = self._current_question
+    def _prepare_question(self, question):
         # This has to be cached because OTDBQuestion.choices scrambles them each time.
         self._choices = question.choices
+        self._answer_number = self._choices.index(question.answer) + 1
+
+    async def _show_question(self, number):
+        question = self._current_question
 
         leader = self.leader
         leader_text = (
@@ -363,11 +252,100 @@ class DefaultTriviaSession(BaseTriviaSession):
         await self._ctx.send(embed=embed)
 
 
+_IGNORED_CHARACTERS = re.compile(r'[\W_]+')
+
+def _normalize_answer(text):
+    # Case, spaces and punctuation don't matter, so that "Mr. Mime",
+    # "mr mime" and "MrMime" are all the same answer.
+    folded = text.casefold()
+    # Most guesses are one word, which don't need the regex.
+    return folded if folded.isalnum() else _IGNORED_CHARACTERS.sub('', folded)
+
+def _deletions(word):
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+def _is_one_substitution(a, b):
+    # a and b must be the same length. Swapping two adjacent letters
+    # counts as one typo as well.
+    diffs = [i for i, (x, y) in enumerate(zip(a, b)) if x != y]
+    if len(diffs) == 1:
+        return True
+
+    if len(diffs) == 2:
+        i, j = diffs
+        return j == i + 1 and a[i] == b[j] and a[j] == b[i]
+
+    return False
+
+
+class AnswerMatcher:
+    """Checks guesses against a question's accepted answers.
+
+    All the answers are normalized once, so that checking a guess only
+    needs to normalize the guess and look it up in a set.
+
+    If allow_typos is True, guesses that are one typo away from answers
+    that are at least TYPO_MIN_LENGTH characters long are accepted too.
+    This uses a table of every answer with one character deleted, so
+    that typos can be found without comparing against every answer.
+    """
+    __slots__ = ('_answers', '_deletions', '_typo_lengths')
+
+    TYPO_MIN_LENGTH = 5
+
+    def __init__(self, answers, *, allow_typos=False):
+        self._answers = set(filter(None, map(_normalize_answer, always_iterable(answers))))
+
+        # answer with one character deleted -> the answers it came from
+        self._deletions = collections.defaultdict(set)
+        # Guesses more than one character longer or shorter than these
+        # can't be typos.
+        self._typo_lengths = set()
+        if not allow_typos:
+            return
+
+        for answer in self._answers:
+            length = len(answer)
+            if length < self.TYPO_MIN_LENGTH:
+                continue
+
+            self._typo_lengths.update((length - 1, length, length + 1))
+            for deleted in _deletions(answer):
+                self._deletions[deleted].add(answer)
+
+    def __contains__(self, guess):
+        guess = _normalize_answer(guess)
+        if guess in self._answers:
+            return True
+
+        if len(guess) not in self._typo_lengths:
+            return False
+
+        deletions = self._deletions
+
+        # A character was missed
+        if guess in deletions:
+            return True
+
+        for deleted in _deletions(guess):
+            # An extra character was typed
+            if deleted in self._answers and len(deleted) >= self.TYPO_MIN_LENGTH:
+                return True
+
+            # A character was mistyped, or two were swapped
+            answers = deletions.get(deleted, ())
+            if any(_is_one_substitution(guess, a) for a in answers):
+                return True
+
+        return False
+
+
 class _FuzzyMatchCheck:
     """Mixin for trivia sessions that rely on typing the answer"""
-    @staticmethod
-    def _check_answer(message, answer):
-        return message.lower() == answer.lower()
+    _allow_typos = False
+
+    def _prepare_question(self, question):
+        self._answers = AnswerMatcher(question.answer, allow_typos=self._allow_typos)
 
     def _check(self, message):
         if message.channel != self._ctx.channel:
@@ -379,7 +357,7 @@ class _FuzzyMatchCheck:
             return False
 
         self._answer_waiter.set()
-        return self._check_answer(message.content, self._current_question.answer)
+        return message.content in self._answers
 
 
 # ------------------ Diep.io --------------------
@@ -438,17 +416,13 @@ class DiepioTriviaSession(_FuzzyMatchCheck, BaseTriviaSession):
                 .set_footer(text=f'{user} now has {score} points.')
                 )
 
-    @staticmethod
-    def _check_answer(message, answer):
-        lowered = message.lower()
-        return any(lowered == a.lower() for a in always_iterable(answer))
-
 
 # ------------------ Pokemon --------------------
 
 POKEMON_PATH = os.path.join('data', 'pokemon')
 POKEMON_IMAGE_PATH = os.path.join(POKEMON_PATH, 'images')
 POKEMON_NAMES_FILE = os.path.join(POKEMON_PATH, 'names.json')
+POKEMON_SILHOUETTE_PATH = os.path.join(POKEMON_PATH, 'silhouettes')
 
 class PokemonQuestion(collections.namedtuple('PokemonQuestion', 'index, answer image')):
     __slots__ = ()
@@ -457,37 +431,79 @@ class PokemonQuestion(collections.namedtuple('PokemonQuestion', 'index, answer i
     def file(self):
         return os.path.join(POKEMON_PATH, 'images', f'{self.index}.png')
 
+def pokemon_indices():
+    """Return the indices of all the Pokemon that have images."""
+    try:
+        entries = os.scandir(POKEMON_IMAGE_PATH)
+    except FileNotFoundError:
+        return []
+
+    with entries:
+        return sorted(
+            os.path.splitext(entry.name)[0] for entry in entries
+            if entry.name.endswith('.png') and entry.is_file()
+        )
+
 # Image utilities
 
+def _silhouette_alpha(alpha):
+    return 255 if alpha >= 100 else 0
+
+def _silhouette_colour(alpha):
+    return 30 if alpha else 0
+
 def _create_silouhette(index):
     with open(os.path.join(POKEMON_IMAGE_PATH, f'{index}.png'), 'rb') as f, \
             Image.open(f) as im:
 
-        image = Image.new(im.mode, im.size)
-        image.putdata([
-            (30, 30, 30, 255) if a >= 100 else (0, 0, 0, 0)
-            for *_, a in im.getdata()
-        ])
-        return image
+        # Image.point uses a lookup table, so the pixels never have to
+        # go through Python.
+        alpha = im.convert('RGBA').getchannel('A').point(_silhouette_alpha)
+        colour = alpha.point(_silhouette_colour)
+        return Image.merge('RGBA', (colour, colour, colour, alpha))
+
+def write_silhouette(index, *, force=False):
+    """Make the silhouette of a Pokemon and save it in the silhouette directory.
+
+    Unless force is True, the silhouette is only made if it's missing or
+    older than the Pokemon's image. Returns the silhouette as PNG bytes.
+    """
+    path = os.path.join(POKEMON_SILHOUETTE_PATH, f'{index}.png')
+    source = os.path.join(POKEMON_IMAGE_PATH, f'{index}.png')
+
+    if not force:
+        with contextlib.suppress(FileNotFoundError):
+            if os.path.getmtime(path) >= os.path.getmtime(source):
+                with open(path, 'rb') as f:
+                    return f.read()
 
-def _write_image_to_file(image):
     f = io.BytesIO()
-    image.save(f, 'png')
-    f.seek(0)
-    return discord.File(f, 'pokemon.png')
+    _create_silouhette(index).save(f, 'png')
+    data = f.getvalue()
+
+    os.makedirs(POKEMON_SILHOUETTE_PATH, exist_ok=True)
+    # Write to a temporary file first, so that no one can read a
+    # half-written silhouette.
+    temp = f'{path}.{os.getpid()}.tmp'
+    with open(temp, 'wb') as f:
+        f.write(data)
+    os.replace(temp, path)
+
+    return data
 
-@cache.cache(maxsize=None)
-async def _create_silouhette_async(index):
-    run = asyncio.get_event_loop().run_in_executor
-    return await run(None, _create_silouhette, index)
+@cache.cache(maxsize=256)
+async def _silouhette_png_async(index):
+    return await rendering.run('silhouette', write_silhouette, index)
 
 async def _get_silouhette(index):
-    run = asyncio.get_event_loop().run_in_executor
-    image = await _create_silouhette_async(index)
-    return await run(None, _write_image_to_file, image)
+    data = await _silouhette_png_async(index)
+    return discord.File(io.BytesIO(data), 'pokemon.png')
 
 
 class PokemonTriviaSession(_FuzzyMatchCheck, BaseTriviaSession):
+    # Pokemon names are hard to spell.
+    _allow_typos = True
+
     try:
         with open(POKEMON_NAMES_FILE) as f:
             _pokemon_names = json.load(f)
@@ -497,9 +513,9 @@ class PokemonTriviaSession(_FuzzyMatchCheck, BaseTriviaSession):
     else:
         logger.info(f'Successfully loaded {POKEMON_NAMES_FILE}.')
 
-    async def _get_question(self):
-        file = random.choice(glob.glob(f'{POKEMON_IMAGE_PATH}/*.png'))
+    _pokemon_indices = pokemon_indices()
 
+    async def _get_question(self):
         # Note that this assumes that the filename is the pokedex number
         # of the pokemon. The way the pictures are meant to be stored is
         # pokedex_no.png. For example, Bulbasaur's image is meant to be
@@ -510,7 +526,7 @@ class PokemonTriviaSession(_FuzzyMatchCheck, BaseTriviaSession):
         # pokedex_no-some_num.png. This is bad because it can cause KeyErrors
         # since the names.json only has the actual Pokedex number without
         # any other info.
-        index = os.path.splitext(os.path.basename(file))[0]
+        index = random.choice(self._pokemon_indices)
         answer = self._pokemon_names[index.partition('-')[0]]
         image = await _get_silouhette(index)
         return PokemonQuestion(index, answer, image)
@@ -560,27 +576,11 @@ class Trivia:
         except FileNotFoundError:
             self.diepio_guilds = set()
 
-        self.bot.loop.create_task(self._init_default_trivia())
-
-    async def _init_default_trivia(self):
-        if not hasattr(self.bot, '__cached_trivia_args__'):
-            await DefaultTriviaSession.initialize()
-            return
-
-        args = self.bot.__cached_trivia_args__
-        now = time.monotonic()
-        if now - args[-1] >= DefaultTriviaSession.TOKEN_EXPIRY_TIME:
-            await DefaultTriviaSession.initialize()
-            return
-
-        DefaultTriviaSession.refresh(args)
-        del self.bot.__cached_trivia_args__
+        self.otdb = QuestionStore(bot.session, loop=bot.loop)
+        self.otdb.start()
 
     def __unload(self):
-        args = DefaultTriviaSession.to_args()
-        if args:
-            logger.info('Caching OTDB token for reloading.')
-            self.bot.__cached_trivia_args__ = args
+        self.bot.loop.create_task(self.otdb.close())
 
     @contextlib.contextmanager
     def _create_session(self, ctx, session):
@@ -645,8 +645,3 @@ class Trivia:
 
 def setup(bot):
     bot.add_cog(Trivia(bot))
-
-def teardown(bot):
-    coro = DefaultTriviaSession._session.close()
-    if inspect.isawaitable(coro):
-        asyncio.ensure_future(coro)
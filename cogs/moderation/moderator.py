@@ -237,6 +237,11 @@ class Moderator:
                 rate=2, per=600, type=commands.BucketType.guild
             )
 
+        # guild_id -> role_id of the muted role (or None if there isn't one).
+        # on_member_update is called for every role and nickname change, so
+        # we can't afford to query the DB every time a role gets removed.
+        self._muted_role_ids = {}
+
     def __unload(self):
         self.bot.__mod_mute_role_create_bucket__ = self._mute_role_create_cooldowns
 
@@ -677,13 +682,34 @@ class Moderator:
 
         return discord.utils.find(probably_mute_role, reversed(guild.roles))
 
+    async def _get_muted_role_id(self, guild):
+        try:
+            return self._muted_role_ids[guild.id]
+        except KeyError:
+            pass
+
+        role = await self._get_muted_role(guild)
+        role_id = self._muted_role_ids[guild.id] = role.id if role else None
+        return role_id
+
+    def _invalidate_muted_role(self, guild):
+        self._muted_role_ids.pop(guild.id, None)
+
     async def _update_muted_role(self, guild, new_role, connection=None):
-        connection = connection or self.bot.pool
+        if connection is None:
+            async with self.bot.pool.acquire() as connection:
+                return await self._update_muted_role(guild, new_role, connection)
+
         query = """INSERT INTO muted_roles (guild_id, role_id) VALUES ($1, $2)
                    ON CONFLICT (guild_id)
                    DO UPDATE SET role_id = $2
                 """
-        await connection.execute(query, guild.id, new_role.id)
+        async with connection.transaction():
+            await connection.execute(query, guild.id, new_role.id)
+
+        # Only cache the new role once it's been committed, so a failed
+        # update can't leave the cache with a role that was never saved.
+        self._muted_role_ids[guild.id] = new_role.id
 
     @staticmethod
     async def _regen_muted_role_perms(role, *channels):
@@ -981,18 +1007,43 @@ class Moderator:
 
     async def on_member_update(self, before, after):
         # In the event of a manual unmute, this has to be covered.
-        removed_roles = set(before.roles).difference(after.roles)
-        if not removed_roles:
-            return  # Give an early out to save queries.
+        #
+        # This gets called for every nickname, role and presence change, so
+        # the common case of the roles not changing at all has to be cheap.
+        #
+        # Member._roles is a sorted array of role IDs, so comparing them is
+        # done in C, and checking for a role is a binary search. Member.roles
+        # would build a list of Role objects every time.
+        before_roles, after_roles = before._roles, after._roles
+        if before_roles is after_roles or before_roles == after_roles:
+            return
+
+        role_id = await self._get_muted_role_id(before.guild)
+        if role_id is None:
+            return
 
-        role = await self._get_muted_role(before.guild)
-        if role in removed_roles:
+        if before_roles.has(role_id) and not after_roles.has(role_id):
             # We need to remove this guy from the scheduler in the event of
             # a manual unmute. Because if the guy was muted again, the old
             # mute would still be in effect. So it would just remove the
             # muted role.
             await self._remove_time_entry(before.guild, before)
 
+    # The muted role might be found by name if one wasn't set, so any change
+    # to the roles can change which role is considered the muted role.
+    async def on_guild_role_create(self, role):
+        self._invalidate_muted_role(role.guild)
+
+    async def on_guild_role_delete(self, role):
+        self._invalidate_muted_role(role.guild)
+
+    async def on_guild_role_update(self, before, after):
+        if before.name != after.name:
+            self._invalidate_muted_role(after.guild)
+
+    async def on_guild_remove(self, guild):
+        self._invalidate_muted_role(guild)
+
     # XXX: Should I even bother to remove unbans from the scheduler in the event
     #      of a manual unban?
 
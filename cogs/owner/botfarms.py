@@ -52,8 +52,10 @@ class AntiBotCollections:
     # Determining if a server is a "bot collection server" is no easy task,
     # because there are a lot of edge cases in servers where it might not be
     # a bot farm but merely a testing server with only a few bots.
-    @staticmethod
-    def is_bot_farm(guild):
+    def __init__(self, bot):
+        self.bot = bot
+
+    def is_bot_farm(self, guild):
         """Return True if the guilds is considered to be a "bot farm".
 
         Bot farms are guilds where the bot-to-member ratio is extremely high.
@@ -61,7 +63,7 @@ class AntiBotCollections:
         to the bot and could even pose problems as people in those bot farms
         like to hammer bots with a lot of commands.
         """
-        bots = sum(m.bot for m in guild.members)
+        bots = self.bot.member_stats.get(guild).bots
         total = guild.member_count
 
         return _ci_lower_bound(bots, total, 0.9) >= 0.42
@@ -91,7 +93,7 @@ class AntiBotCollections:
         A bot collection server is a server that has a high
         ratio of bots to members.
         """
-        bots = sum(m.bot for m in server.members)
+        bots = ctx.bot.member_stats.get(server).bots
         total = server.member_count
 
         bot_farm = self.is_bot_farm(server)
@@ -119,4 +121,4 @@ class AntiBotCollections:
 
 
 def setup(bot):
-    bot.add_cog(AntiBotCollections())
+    bot.add_cog(AntiBotCollections(bot))
@@ -1,5 +1,6 @@
 import asyncio
 import copy
+import logging
 import random
 from functools import partial
 
@@ -11,6 +12,8 @@ from .utils import db, disambiguate
 from .utils.context_managers import temp_attr
 from .utils.misc import str_join
 
+log = logging.getLogger(__name__)
+
 
 class Selfroles(db.Table):
     id = db.Column(db.Serial, primary_key=True)
@@ -126,6 +129,12 @@ class AutoRole(disambiguate.Role):
 _bot_role_check = partial(commands.bot_has_permissions, manage_roles=True)
 
 
+# How many auto-roles can be given at once, and how many members can be
+# waiting for their auto-role before on_member_join starts waiting too.
+_AUTOROLE_WORKERS = 4
+_AUTOROLE_QUEUE_SIZE = 256
+
+
 class Roles:
     """Commands that are related to roles.
 
@@ -136,6 +145,18 @@ class Roles:
     def __init__(self, bot):
         self.bot = bot
 
+        # Giving roles one request per member during a raid can easily hit
+        # the global rate-limit, so only let a few go through at once.
+        self._autorole_queue = asyncio.Queue(maxsize=_AUTOROLE_QUEUE_SIZE)
+        self._autorole_workers = [
+            bot.loop.create_task(self._autorole_worker())
+            for _ in range(_AUTOROLE_WORKERS)
+        ]
+
+    def __unload(self):
+        for worker in self._autorole_workers:
+            worker.cancel()
+
     def __local_check(self, ctx):
         return bool(ctx.guild)
 
@@ -258,9 +279,29 @@ class Roles:
         if row is None:
             return
 
+        # The member might've left while they were in the queue.
+        if server.get_member(member.id) is None:
+            return
+
         # TODO: respect the high verification level, and check perms.
         await member.add_roles(discord.Object(id=row[0]))
 
+    async def _autorole_worker(self):
+        queue = self._autorole_queue
+        while True:
+            member = await queue.get()
+            try:
+                await self._add_auto_role(member)
+            except discord.HTTPException:
+                pass
+            except Exception:
+                # One bad member shouldn't take the worker down with it,
+                # otherwise the queue eventually stops being drained.
+                log.exception('Failed to give auto-role to member %d in guild %d',
+                              member.id, member.guild.id)
+            finally:
+                queue.task_done()
+
     @commands.command(name='addrole', aliases=['ar'])
     @commands.has_permissions(manage_roles=True)
     @_bot_role_check()
@@ -311,7 +352,7 @@ class Roles:
         await ctx.send(f"Successfully deleted **{role.name}**!")
 
     async def on_member_join(self, member):
-        await self._add_auto_role(member)
+        await self._autorole_queue.put(member)
 
 
 def setup(bot):
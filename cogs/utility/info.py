@@ -1,12 +1,11 @@
 import collections
-import contextlib
 import datetime
 import functools
 import json
 import random
 import time
 import typing
-from itertools import accumulate, chain, count, dropwhile
+from itertools import accumulate, count, dropwhile
 from math import log10
 from operator import attrgetter
 
@@ -90,6 +89,11 @@ _status_colors = {
 }
 
 
+def _get_members(guild, member_ids):
+    members = map(guild.get_member, member_ids)
+    return [m for m in members if m is not None]
+
+
 def default_last_n(n=50):
     return lambda: collections.deque(maxlen=n)
 
@@ -185,9 +189,10 @@ class ServerPages(InteractiveSession):
         region = _SERVER_REGIONS.get(str(server.region))
 
         odfkeys = collections.OrderedDict.fromkeys
-        statuses = odfkeys(['online', 'idle', 'dnd', 'offline'], 0)
-        statuses.update(collections.Counter(m.status.name for m in server.members if not m.bot))
-        statuses['bot_tag'] = sum(m.bot for m in server.members)
+        counts = self.context.bot.member_stats.get(server).counts
+        statuses = collections.OrderedDict(
+            (k, counts[k]) for k in ['online', 'idle', 'dnd', 'offline', 'bot_tag']
+        )
 
         if self.context.bot_has_permissions(external_emojis=True):
             formatter = self._format_statuses_with_emojis
@@ -277,8 +282,10 @@ class ChannelPaginator(Paginator):
             discord.VoiceChannel: parse_voice_channel
         }
 
+        self._channel_parsers = _channel_parsers
+
         entries = [
-            (category, [_channel_parsers[c.__class__](c) for c in entries])
+            (category, entries)
             for category, channels in ctx.guild.by_category()
             for entries in sliced(channels, 10)
         ]
@@ -287,6 +294,7 @@ class ChannelPaginator(Paginator):
 
     def create_embed(self, page):
         category, channels = page[0]
+        channels = [self._channel_parsers[c.__class__](c) for c in channels]
 
         header = f'Channels in category {category}' if category else "Channels with no category..."
         category_id = category.id if category else None
@@ -294,7 +302,7 @@ class ChannelPaginator(Paginator):
 
         return (discord.Embed(description=description, colour=self.colour)
                 .set_author(name=header)
-                .set_footer(text=f'Page {self._index + 1}/{len(self._pages)} | Category ID: {category_id}')
+                .set_footer(text=f'Page {self._index + 1}/{self._source.page_count} | Category ID: {category_id}')
                 )
 
 embedded = functools.partial(commands.bot_has_permissions, embed_links=True)
@@ -514,7 +522,8 @@ class Information:
         def bool_as_answer(b):
             return "YNeos"[not b::2]
 
-        member_amount = len(role.members)
+        member_stats = ctx.bot.member_stats.get(ctx.guild)
+        member_amount = member_stats.role_count(role)
         if role.is_default():
             ping_notice = "And congrats on the ping. I don't have any popcorn sadly."
             members_name = "Members"
@@ -532,7 +541,7 @@ class Information:
 
         else:
             members_name = f"Members ({member_amount})"
-            members_value = str_join(", ", role.members) or '-no one is in this role :(-'
+            members_value = str_join(", ", member_stats.role_members(role)) or '-no one is in this role :(-'
 
         hex_role_color = str(role.colour).upper()
         permissions = role.permissions.value
@@ -662,8 +671,7 @@ class Information:
         """Shows all the members of the server, sorted by their top role, then by join date"""
         # TODO: Status
         hierarchy = sorted(ctx.guild.members, key=attrgetter("top_role", "joined_at"), reverse=True)
-        members = tuple(map(str, hierarchy))
-        pages = Paginator(ctx, members, title=f'Members in {ctx.guild} ({len(members)})')
+        pages = Paginator(ctx, hierarchy, title=f'Members in {ctx.guild} ({len(hierarchy)})', format_entry=str)
         await pages.interact()
 
     @commands.command()
@@ -678,11 +686,13 @@ class Information:
             sorted(member.roles, reverse=True)[:-1]  # remove @everyone
         )
 
-        padding = int(log10(max(map(len, (role.members for role in roles))))) + 1
+        role_count = ctx.bot.member_stats.get(ctx.guild).role_count
+        counts = list(map(role_count, roles))
+        padding = int(log10(max(counts))) + 1
 
         author_roles = ctx.author.roles
         get_name = functools.partial(formats.bold_name, predicate=lambda r: r in author_roles)
-        hierarchy = [f"`{len(role.members) :<{padding}}\u200b` {get_name(role)}" for role in roles]
+        hierarchy = [f"`{count :<{padding}}\u200b` {get_name(role)}" for count, role in zip(counts, roles)]
         pages = Paginator(ctx, hierarchy, title=f'Roles in {ctx.guild} ({len(hierarchy)})')
         await pages.interact()
 
@@ -708,17 +718,19 @@ class Information:
         average_color = discord.Colour.from_rgb(*map(round, (c / len(roles) for c in total_color)))
 
         if members:
-            entries = sorted(map(str, members))
-            # Make the author's name bold (assuming they have that role).
-            # We have to do it after the list was built, otherwise the author's name
-            # would be at the top.
-            with contextlib.suppress(ValueError):
-                index = entries.index(str(ctx.author))
-                entries[index] = f'**{entries[index]}**'
+            # Sorting by the name and discriminator is the same as sorting by
+            # str(member), without having to format every member up front.
+            entries = sorted(members, key=attrgetter('name', 'discriminator'))
+            author_id = ctx.author.id
+
+            def format_entry(member):
+                # Make the author's name bold (assuming they have that role).
+                return f'**{member}**' if member.id == author_id else str(member)
         else:
             entries = ('There are no members :(', )
+            format_entry = None
 
-        pages = Paginator(ctx, entries, colour=average_color, title=truncated_title)
+        pages = Paginator(ctx, entries, colour=average_color, title=truncated_title, format_entry=format_entry)
         await pages.interact()
 
     @commands.command()
@@ -730,7 +742,7 @@ class Information:
         Only one role can be specified. For multiple roles, use `{prefix}inanyrole`
         or `{prefix}inallrole`.
         """
-        await self._inrole(ctx, role, members=role.members)
+        await self._inrole(ctx, role, members=ctx.bot.member_stats.get(ctx.guild).role_members(role))
 
     @varpos.require_va_command()
     @commands.guild_only()
@@ -741,8 +753,9 @@ class Information:
         If you don't want to mention a role and there's a space in the role name,
         you must put the role in quotes
         """
-        await self._inrole(ctx, *roles, members=set(chain.from_iterable(map(attrgetter('members'), roles))),
-                           final='or')
+        stats = ctx.bot.member_stats.get(ctx.guild)
+        member_ids = set().union(*map(stats.role_member_ids, roles))
+        await self._inrole(ctx, *roles, members=_get_members(ctx.guild, member_ids), final='or')
 
     @varpos.require_va_command()
     @commands.guild_only()
@@ -753,8 +766,11 @@ class Information:
         If you don't want to mention a role and there's a space in the role name,
         you must put that role in quotes
         """
-        role_members = (role.members for role in roles)
-        await self._inrole(ctx, *roles, members=set(next(role_members)).intersection(*role_members))
+        stats = ctx.bot.member_stats.get(ctx.guild)
+        # Start from the smallest role so the intersection is as cheap as possible.
+        role_ids = sorted(map(stats.role_member_ids, roles), key=len)
+        member_ids = set(role_ids[0]).intersection(*role_ids[1:])
+        await self._inrole(ctx, *roles, members=_get_members(ctx.guild, member_ids))
 
     @commands.command()
     @commands.guild_only()
@@ -1,13 +1,16 @@
+import asyncio
+import collections
 import itertools
 import logging
 
 import asyncpg
 import discord
 from discord.ext import commands
+from lru import LRU
 
 from ..utils import db, formats
 from ..utils.examples import _get_static_example
-from ..utils.paginator import Paginator
+from ..utils.paginator import Paginator, QueryPageSource
 
 
 class Tag(db.Table, table_name='tags'):
@@ -52,6 +55,60 @@ class ServerTagPaginator(Paginator):
             return embed.set_author(name=embed.author.name, icon_url=guild.icon_url)
         return embed
 
+def _tag_name(row):
+    return row['name']
+
+
+# The number of guilds to keep tags around for, and the number of tags to
+# keep around for each of them.
+TAG_CACHE_GUILDS = 256
+TAG_CACHE_SIZE = 64
+
+# Seconds between writing the tag uses to the database
+USES_FLUSH_INTERVAL = 60
+
+
+class _TagCache:
+    """Per-guild LRU of tag name -> the tag it resolves to.
+
+    Aliases map to the original tag, so a cached alias needs no lookups.
+    """
+
+    def __init__(self, *, max_guilds=TAG_CACHE_GUILDS, max_tags=TAG_CACHE_SIZE):
+        self._guilds = LRU(max_guilds)
+        self._max_tags = max_tags
+        self.hits = self.misses = 0
+
+    def get(self, guild_id, name):
+        tags = self._guilds.get(guild_id)
+        tag = tags.get(name) if tags is not None else None
+        if tag is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return tag
+
+    def put(self, guild_id, name, tag):
+        try:
+            tags = self._guilds[guild_id]
+        except KeyError:
+            tags = self._guilds[guild_id] = LRU(self._max_tags)
+        tags[name] = tag
+
+    def invalidate(self, guild_id, name):
+        """Forget a tag, along with every alias that points to it."""
+        tags = self._guilds.get(guild_id)
+        if tags is None:
+            return
+
+        for key, tag in tags.items():
+            if key == name or tag['name'].lower() == name:
+                del tags[key]
+
+    def __len__(self):
+        return sum(map(len, self._guilds.values()))
+
+
 class TagName(commands.clean_content):
     async def convert(self, ctx, argument):
         converted = await super().convert(ctx, argument)
@@ -85,6 +142,47 @@ class Tags:
     """You're it."""
     def __init__(self, bot):
         self.bot = bot
+        self._cache = _TagCache()
+        # (guild_id, name) -> uses that haven't been written yet
+        self._pending_uses = collections.Counter()
+        self._uses_flusher = asyncio.ensure_future(self._flush_uses_loop())
+
+    def __unload(self):
+        self._uses_flusher.cancel()
+        self.bot.loop.create_task(self._flush_uses())
+
+    def cache_stats(self):
+        """Return (tags cached, hits, misses) for the tag cache."""
+        return len(self._cache), self._cache.hits, self._cache.misses
+
+    async def _flush_uses_loop(self):
+        while True:
+            await asyncio.sleep(USES_FLUSH_INTERVAL)
+            try:
+                await self._flush_uses()
+            except Exception:
+                tag_logger.exception('Failed to write tag uses')
+
+    async def _flush_uses(self):
+        if not self._pending_uses:
+            return
+
+        pending, self._pending_uses = self._pending_uses, collections.Counter()
+        guild_ids, names = map(list, zip(*pending))
+        uses = list(pending.values())
+
+        # This matches on the actual name, so it can use the primary key.
+        query = """UPDATE tags SET uses = tags.uses + pending.uses
+                   FROM unnest($1::BIGINT[], $2::TEXT[], $3::INTEGER[])
+                        AS pending (location_id, name, uses)
+                   WHERE tags.location_id = pending.location_id AND tags.name = pending.name;
+                """
+        try:
+            await self.bot.pool.execute(query, guild_ids, names, uses)
+        except Exception:
+            # Put them back so they aren't lost.
+            self._pending_uses.update(pending)
+            raise
 
     async def __error(self, ctx, error):
         print('error!', error)
@@ -127,9 +225,24 @@ class Tags:
         return tag
 
     async def _get_original_tag(self, connection, name, guild_id):
-        tag = await self._get_tag(connection, name, guild_id)
-        if tag['is_alias']:
-            return await self._get_tag(connection, tag['content'], guild_id)
+        tag = self._cache.get(guild_id, name)
+        if tag is not None:
+            return tag
+
+        # Resolve the alias in the same query, rather than looking up the
+        # alias and then the original tag.
+        query = """SELECT * FROM tags
+                   WHERE location_id = $1 AND lower(name) = (
+                       SELECT CASE WHEN is_alias THEN lower(content) ELSE lower(name) END
+                       FROM tags
+                       WHERE location_id = $1 AND lower(name) = $2
+                   );
+                """
+        tag = await connection.fetchrow(query, guild_id, name)
+        if tag is None:
+            raise await self._disambiguate_error(connection, name, guild_id)
+
+        self._cache.put(guild_id, name, tag)
         return tag
 
     @commands.group(invoke_without_command=True)
@@ -138,8 +251,9 @@ class Tags:
         tag = await self._get_original_tag(ctx.db, name, ctx.guild.id)
         await ctx.send(tag['content'])
 
-        query = 'UPDATE tags SET uses = uses + 1 WHERE name = $1 AND location_id = $2'
-        await ctx.db.execute(query, tag['name'], ctx.guild.id)
+        # Uses are written in batches, so that popular tags don't need a
+        # query every time they're used.
+        self._pending_uses[ctx.guild.id, tag['name']] += 1
 
     @tag.command(name='create', aliases=['add'])
     async def tag_create(self, ctx, name: TagName, *, content: TagContent):
@@ -153,6 +267,7 @@ class Tags:
         except asyncpg.UniqueViolationError:
             await ctx.send(f'Tag {name} already exists...')
         else:
+            self._cache.invalidate(ctx.guild.id, name)
             await ctx.send(f'Successfully created tag {name}! ^.^')
 
     @tag.command(name='edit')
@@ -170,6 +285,7 @@ class Tags:
 
         query = 'UPDATE tags SET content = $1 WHERE location_id = $2 AND name = $3;'
         await ctx.db.execute(query, new_content, ctx.guild.id, tag['name'])
+        self._cache.invalidate(ctx.guild.id, name)
         await ctx.send("Successfully edited the tag!")
 
     @tag.command(name='alias')
@@ -193,6 +309,7 @@ class Tags:
         except asyncpg.UniqueViolationError:
             return await ctx.send(f'Alias {alias} already exists...')
         else:
+            self._cache.invalidate(ctx.guild.id, alias)
             await ctx.send(f'Successfully created alias {alias} that points to {original}! ^.^')
 
     @tag.command(name='delete', aliases=['remove'])
@@ -218,6 +335,7 @@ class Tags:
                 """
 
         await ctx.db.execute(query, ctx.guild.id, name)
+        self._cache.invalidate(ctx.guild.id, name)
         if not tag['is_alias']:
             await ctx.send(f"Tag {name} and all of its aliases have been deleted.")
         else:
@@ -238,6 +356,8 @@ class Tags:
         # XXX: This takes roughly 8-16 ms. Not good, but to make my life
         #      simpler I'll ignore it for now until the bot gets really big
         #      and querying the tags starts becoming expensive.
+        # Make sure the uses and rank are up to date.
+        await self._flush_uses()
         tag = await self._get_tag(ctx.db, tag, ctx.guild.id)
         rank = await self._get_tag_rank(ctx.db, tag)
 
@@ -280,13 +400,12 @@ class Tags:
     @tag.command(name='list', aliases=['all'])
     async def tag_list(self, ctx):
         """Shows all the tags in the server."""
-        query = 'SELECT name FROM tags WHERE location_id = $1 ORDER BY name'
-        tags = [tag[0] for tag in await ctx.db.fetch(query, ctx.guild.id)]
+        query = 'SELECT name FROM tags WHERE location_id = $1'
+        entries = QueryPageSource(ctx.pool, query, ctx.guild.id, key='name',
+                                  format_entry=_tag_name, numbered=True)
 
-        entries = (
-            itertools.starmap('{0}. {1}'.format, enumerate(tags, 1)) if tags else
-            (f'There are no tags. Use `{ctx.prefix}tag create` to fix that.', )
-        )
+        if await entries.get_page(0) is None:
+            entries = (f'There are no tags. Use `{ctx.prefix}tag create` to fix that.', )
 
         paginator = ServerTagPaginator(ctx, entries)
         await paginator.interact()
@@ -296,13 +415,12 @@ class Tags:
         """Shows all the tags in the server."""
         member = member or ctx.author
 
-        query = 'SELECT name FROM tags WHERE location_id = $1 AND owner_id = $2 ORDER BY name'
-        tags = [tag[0] for tag in await ctx.db.fetch(query, ctx.guild.id, ctx.author.id)]
+        query = 'SELECT name FROM tags WHERE location_id = $1 AND owner_id = $2'
+        entries = QueryPageSource(ctx.pool, query, ctx.guild.id, ctx.author.id, key='name',
+                                  format_entry=_tag_name, numbered=True)
 
-        entries = (
-            itertools.starmap('{0}. {1}'.format, enumerate(tags, 1)) if tags else
-            (f"{member} didn't make any tags yet. :(", )
-        )
+        if await entries.get_page(0) is None:
+            entries = (f"{member} didn't make any tags yet. :(", )
         paginator = MemberTagPaginator(ctx, entries, member=member)
         await paginator.interact()
 
@@ -1,12 +1,10 @@
-import asyncio
-import functools
 from io import BytesIO
 
 import aiohttp
 import discord
 from colorthief import ColorThief
 
-from . import cache
+from . import cache, rendering
 
 
 @cache.cache(maxsize=4096)
@@ -16,14 +14,17 @@ async def _read_image_from_url(url):
             return await resp.read()
 
 
+def _dominant_color(data):
+    with BytesIO(data) as f:
+        # TODO: Make my own color-grabber module. This is ugly as hell.
+        return ColorThief(f).get_color(quality=1)
+
+
 @cache.cache(maxsize=4096)
 async def _dominant_color_from_url(url):
     """Returns an rgb tuple consisting the dominant color given a image url."""
-    with BytesIO(await _read_image_from_url(url)) as f:
-        # TODO: Make my own color-grabber module. This is ugly as hell.
-        loop = asyncio.get_event_loop()
-        get_colour = functools.partial(ColorThief(f).get_color, quality=1)
-        return await loop.run_in_executor(None, get_colour)
+    data = await _read_image_from_url(url)
+    return await rendering.run('colour', _dominant_color, data)
 
 
 async def url_color(url):
@@ -0,0 +1,45 @@
+"""Settling bets for games that people can bet money on.
+
+Bets are taken from everyone at once when a game starts, and winnings are
+paid to everyone at once when it ends. That way a game with a lot of
+players only needs one query for each, and because the bets are only taken
+if there's enough money at that moment, two games can't both take the same
+money.
+"""
+
+__all__ = ['get_money', 'pay_out', 'take_bets']
+
+
+async def get_money(user_id, *, connection):
+    query = 'SELECT amount FROM currency WHERE user_id = $1;'
+    return await connection.fetchval(query, user_id) or 0
+
+
+async def take_bets(bets, *, connection):
+    """Take everyone's bets, given as a dict of user id -> amount.
+
+    Bets are only taken from those who still have enough money for them.
+    This returns a dict of the bets that were taken.
+    """
+    if not bets:
+        return {}
+
+    query = """UPDATE currency SET amount = currency.amount - bets.amount
+               FROM unnest($1::BIGINT[], $2::INTEGER[]) AS bets (user_id, amount)
+               WHERE currency.user_id = bets.user_id AND currency.amount >= bets.amount
+               RETURNING currency.user_id, bets.amount;
+            """
+    records = await connection.fetch(query, list(bets), list(bets.values()))
+    return {user_id: amount for user_id, amount in records}
+
+
+async def pay_out(winnings, *, connection):
+    """Pay everyone their winnings, given as a dict of user id -> amount."""
+    if not winnings:
+        return
+
+    query = """UPDATE currency SET amount = currency.amount + winnings.amount
+               FROM unnest($1::BIGINT[], $2::INTEGER[]) AS winnings (user_id, amount)
+               WHERE currency.user_id = winnings.user_id;
+            """
+    await connection.execute(query, list(winnings), list(winnings.values()))
@@ -39,9 +39,7 @@ async def disambiguate(ctx, matches, transform=str, *, tries=3):
         message = await ctx.send(entries)
 
     def check(m):
-        return (m.author.id == ctx.author.id
-                and m.channel.id == ctx.channel.id
-                and m.content.isdigit())
+        return m.author.id == ctx.author.id and m.content.isdigit()
 
     await ctx.release()
 
@@ -49,7 +47,7 @@ async def disambiguate(ctx, matches, transform=str, *, tries=3):
     try:
         for i in range(tries):
             try:
-                msg = await ctx.bot.wait_for('message', check=check, timeout=30.0)
+                msg = await ctx.bot.wait_for_keyed('message', ctx.channel.id, check=check, timeout=30.0)
             except asyncio.TimeoutError:
                 raise commands.BadArgument('Took too long. Goodbye.')
 
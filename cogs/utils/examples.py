@@ -5,6 +5,7 @@ import itertools
 import random
 import re
 import typing
+import weakref
 
 import discord
 from discord.ext import commands
@@ -271,15 +272,27 @@ def _split_params(command):
             break
     return required, optional
 
+# command -> (qualified names, required params, optional params)
+#
+# These never change for a command, and when an extension is reloaded the
+# old commands are thrown out, taking their entries with them.
+_signatures = weakref.WeakKeyDictionary()
+
+def _command_signature(command):
+    try:
+        return _signatures[command]
+    except KeyError:
+        required, optional = _split_params(command)
+        signature = _signatures[command] = list(all_qualified_names(command)), required, optional
+        return signature
+
 def command_example(command, ctx):
     """Generate a working example given a command.
 
     If a command has optional arguments, it will generate two examples,
     one with required arguments only, and one with all args included.
     """
-    qual_names = list(all_qualified_names(command))
-
-    required, optional = _split_params(command)
+    qual_names, required, optional = _command_signature(command)
 
     def generate(params):
         resolved = ' '.join(_parameter_examples(params, ctx, command))
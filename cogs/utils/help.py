@@ -1,14 +1,17 @@
 import asyncio
+import collections
 import copy
 import inspect
 import itertools
 import operator
 import random
 import sys
+import time
 
 import discord
 from discord.ext import commands
-from more_itertools import chunked, flatten, run_length, sliced, spy
+from lru import LRU
+from more_itertools import chunked, run_length, sliced
 
 from .commands import all_names, command_category, walk_parents
 from .converter import BotCommand
@@ -85,8 +88,9 @@ def _help_command_embed(ctx, command, func):
         description = f'*{command.warning}*\n\n{description}'
 
     embed = discord.Embed(title=func(title), description=func(description), colour=ctx.bot.colour)
+    catalog = get_catalog(ctx.bot)
 
-    requirements = _make_command_requirements(command)
+    requirements = catalog.requirements(command)
     if requirements:
         embed.add_field(name=func("Requirements"), value=func(requirements))
 
@@ -94,7 +98,7 @@ def _help_command_embed(ctx, command, func):
     embed.add_field(name=func("Usage"), value=func(usage), inline=False)
 
     if _has_subcommands(command):
-        subs = _list_subcommands_and_descriptions(command)
+        subs = catalog.subcommands(command)
         embed.add_field(name='See also', value=subs, inline=False)
 
     category = command_category(command, 'Other')
@@ -102,18 +106,145 @@ def _help_command_embed(ctx, command, func):
     return embed.set_footer(text=func(footer))
 
 
+async def _passes_global_checks(ctx):
+    # These are the checks that only run once per invoke (plonks and
+    # blacklists), so they don't depend on the command.
+    try:
+        return await ctx.bot.can_run(ctx, call_once=True)
+    except commands.CommandError:
+        return False
+
+
 async def _can_run(command, ctx):
+    """Command.can_run, but without the checks that _passes_global_checks
+    already covers.
+    """
+    original = ctx.command
+    ctx.command = command
     try:
-        return await command.can_run(ctx)
+        # Global checks that run for every command (i.e. custom permissions)
+        # depend on the command, so they still have to be run here.
+        if not await ctx.bot.can_run(ctx):
+            return False
+
+        cog = command.instance
+        if cog is not None:
+            local_check = getattr(cog, f'_{cog.__class__.__name__}__local_check', None)
+            if local_check is not None and not await discord.utils.maybe_coroutine(local_check, ctx):
+                return False
+
+        return await discord.utils.async_all(predicate(ctx) for predicate in command.checks)
     except commands.CommandError:
         return False
+    finally:
+        ctx.command = original
+
+
+def _category_description(command):
+    # We can't rely on the package being in bot.extensions, because
+    # maybe they wanted to only import one or a few extensions instead
+    # of the whole folder.
+    pkg_name = command.module.rpartition('.')[0]
+    module = sys.modules[pkg_name]
+    return inspect.getdoc(module) or 'No description... yet.'
+
+
+# How long the commands someone can use are remembered for, in seconds.
+VISIBILITY_TTL = 60
+
+
+class _Visibility(collections.namedtuple('_Visibility', 'expiry passed commands')):
+    __slots__ = ()
+
+
+class HelpCatalog:
+    """All the stuff about the bot's commands that the help pages need.
+
+    This is built once every time an extension is (un)loaded, instead of
+    every time someone uses help. Which commands someone can use is only
+    checked for the commands being shown, and kept for a little while.
+    """
+
+    def __init__(self, bot):
+        self.generation = bot.extension_generation
+
+        def sort_key(c):
+            return command_category(c), c.qualified_name
+
+        visible = [c for c in sorted(bot.commands, key=sort_key) if not c.hidden]
+        self.commands = visible
+
+        # (category, description, commands) in the order they're shown
+        # in the general help.
+        self.categories = []
+        for parent, cmds in itertools.groupby(visible, key=command_category):
+            cmds = list(cmds)
+            self.categories.append((parent, _category_description(cmds[0]), cmds))
+
+        # lowercased category, as given by the Category converter ->
+        # (description, commands sorted by name)
+        self._by_name = {}
+        for _, description, cmds in self.categories:
+            name = command_category(cmds[0], 'other').lower()
+            self._by_name[name] = description, sorted(cmds, key=str)
+
+        self._requirements = {}
+        self._subcommands = {}
+        # (guild_id, channel_id, author_id) -> _Visibility
+        self._visibility = LRU(256)
+
+    def category(self, name):
+        # Categories with only hidden commands are still valid categories.
+        return self._by_name.get(name, ('No description... yet.', []))
+
+    def requirements(self, command):
+        try:
+            return self._requirements[command]
+        except KeyError:
+            requirements = self._requirements[command] = _make_command_requirements(command)
+            return requirements
+
+    def subcommands(self, command):
+        try:
+            return self._subcommands[command]
+        except KeyError:
+            subs = self._subcommands[command] = _list_subcommands_and_descriptions(command)
+            return subs
+
+    async def visibility(self, ctx, commands):
+        """Return a dict of command -> whether the invoker can use it,
+        for the commands given.
+        """
+        key = getattr(ctx.guild, 'id', None), ctx.channel.id, ctx.author.id
+        now = time.monotonic()
+
+        entry = self._visibility.get(key)
+        if entry is None or entry.expiry <= now:
+            passed = await _passes_global_checks(ctx)
+            entry = self._visibility[key] = _Visibility(now + VISIBILITY_TTL, passed, {})
+
+        if not entry.passed:
+            return dict.fromkeys(commands, False)
+
+        can_run = entry.commands
+        # Don't gather these, _can_run temporarily changes ctx.command
+        for command in commands:
+            if command not in can_run:
+                can_run[command] = await _can_run(command, ctx)
 
+        return {command: can_run[command] for command in commands}
 
-async def _command_formatters(commands, ctx):
-    for command in commands:
-        # Can't do async-genexpr because Python <3.6.4 requires the function
-        # to be async def, however then we'd have to await it.
-        yield command.name, await _can_run(command, ctx)
+
+def get_catalog(bot):
+    """Return the help catalog for the bot, rebuilding it if needed."""
+    catalog = getattr(bot, '__help_catalog__', None)
+    if catalog is None or catalog.generation != bot.extension_generation:
+        catalog = bot.__help_catalog__ = HelpCatalog(bot)
+    return catalog
+
+
+def _command_formatters(commands, visibility):
+    return [(command.name, visibility[command]) for command in commands]
 
 
 NUM_COMMAND_COLUMNS = 2
@@ -141,9 +272,6 @@ def _command_lines(command_can_run_pairs):
 CROSSED_NOTE = "**Note:** You can't use commands\nthat are ~~crossed out~~."
 
 
-def _get_category_commands(bot, category):
-    return {c for c in bot.all_commands.values() if command_category(c, 'other') == category}
-
 class CogPages(Paginator):
     goto = None
 
@@ -153,17 +281,13 @@ class CogPages(Paginator):
     # DB too.
     @classmethod
     async def create(cls, ctx, category):
-        command, commands = spy(
-            c for c in _get_category_commands(ctx.bot, category)
-            if not (c.hidden or ctx.bot.formatter.show_hidden)
-        )
+        catalog = get_catalog(ctx.bot)
+        description, commands = catalog.category(category)
 
-        pairs = [pair async for pair in _command_formatters(sorted(commands, key=str), ctx)]
+        pairs = _command_formatters(commands, await catalog.visibility(ctx, commands))
 
         self = cls(ctx, _command_lines(pairs))
-        pkg_name = command[0].module.rpartition('.')[0]
-        module = sys.modules[pkg_name]
-        self._cog_doc = inspect.getdoc(module) or 'No description... yet.'
+        self._cog_doc = description
         self._cog_name = category.title() or 'Other'
 
         return self
@@ -192,10 +316,8 @@ class GeneralHelpPaginator(Paginator):
 
     @classmethod
     async def create(cls, ctx):
-        def sort_key(c):
-            return command_category(c), c.qualified_name
-
-        entries = (cmd for cmd in sorted(ctx.bot.commands, key=sort_key) if not cmd.hidden)
+        catalog = get_catalog(ctx.bot)
+        visibility = await catalog.visibility(ctx, catalog.commands)
 
         nested_pages = []
         per_page = 30
@@ -203,18 +325,8 @@ class GeneralHelpPaginator(Paginator):
         # (cog, description, first 10 commands)
         # (cog, description, next 10 commands)
         # ...
-        for parent, cmds in itertools.groupby(entries, key=command_category):
-            command, cmds = spy(cmds)
-            command = next(iter(command))  # spy returns (list, iterator)
-
-            # We can't rely on the package being in bot.extensions, because
-            # maybe they wanted to only import one or a few extensions instead
-            # of the whole folder.
-            pkg_name = command.module.rpartition('.')[0]
-            module = sys.modules[pkg_name]
-            description = inspect.getdoc(module) or 'No description... yet.'
-
-            lines = [pair async for pair in _command_formatters(cmds, ctx)]
+        for parent, description, cmds in catalog.categories:
+            lines = _command_formatters(cmds, visibility)
             nested_pages.extend((parent.title(), description, page) for page in sliced(lines, per_page))
 
         self = cls(ctx, nested_pages, per_page=1)  # needed to break the slicing in __getitem__
@@ -240,20 +352,20 @@ class GeneralHelpPaginator(Paginator):
         return (discord.Embed(colour=colour, description=description)
                 .set_author(name=name)
                 .add_field(name='Commands', value=commands)
-                .set_footer(text=f'Page {self._index + 1}/{len(self._pages)}')
+                .set_footer(text=f'Page {self._index + 1}/{self._source.page_count}')
                 )
 
     # These methods are overridden because docstrings are annoying
 
     @trigger('\N{BLACK LEFT-POINTING TRIANGLE}', fallback=r'\<')
-    def previous(self):
+    async def previous(self):
         """Back"""
-        return super().previous() or (self.instructions() if self._index == 0 else None)
+        return await super().previous() or (self.instructions() if self._index == 0 else None)
 
     @trigger('\N{BLACK RIGHT-POINTING TRIANGLE}', fallback=r'\>')
-    def next(self):
+    async def next(self):
         """Next"""
-        return super().next()
+        return await super().next()
 
     @trigger('\N{INPUT SYMBOL FOR NUMBERS}', block=True)
     async def goto(self):
@@ -277,7 +389,7 @@ class GeneralHelpPaginator(Paginator):
                 start += count
 
         # create the page numbers for the cogs
-        pairs = list(cog_pages(flatten(self._pages), 1))
+        pairs = list(cog_pages(self._source.entries, 1))
         padding = max(len(p[0]) for p in pairs)
         lines = [f'`\u200b{numbers:<{padding}}\u200b` - {name}' for numbers, name in pairs]
         print(lines)
@@ -0,0 +1,172 @@
+import collections
+
+
+def _role_ids(member):
+    # Member._roles is a sorted array of the IDs of the member's roles. It
+    # doesn't have @everyone, which isn't useful to keep track of anyway, as
+    # everyone has it. Member.roles would build a list of Role objects.
+    return member._roles
+
+
+class GuildMemberStats:
+    """Member counts for a guild that are kept up to date through events.
+
+    Getting things like the number of bots or the members in a role normally
+    requires going through every member in the guild, which gets expensive
+    in large guilds.
+    """
+    __slots__ = ('_keys', 'counts', '_roles')
+
+    def __init__(self, members=()):
+        # member_id -> the key the member is counted under. This is used
+        # instead of the member from before the update so that events that
+        # come in after we've already seen the new member aren't counted twice.
+        self._keys = {}
+        # status name (or "bot_tag" for bots) -> number of members
+        self.counts = collections.Counter()
+        # role_id -> set of member IDs
+        self._roles = collections.defaultdict(set)
+
+        for member in members:
+            self.add(member)
+
+    @staticmethod
+    def _key(member):
+        return 'bot_tag' if member.bot else member.status.name
+
+    @property
+    def bots(self):
+        return self.counts['bot_tag']
+
+    def add(self, member):
+        if member.id in self._keys:
+            return
+
+        key = self._keys[member.id] = self._key(member)
+        self.counts[key] += 1
+
+        roles = self._roles
+        for role_id in _role_ids(member):
+            roles[role_id].add(member.id)
+
+    def remove(self, member):
+        key = self._keys.pop(member.id, None)
+        if key is None:
+            return
+
+        self.counts[key] -= 1
+
+        self._remove_roles(member.id, _role_ids(member))
+
+    def _remove_roles(self, member_id, role_ids):
+        roles = self._roles
+        for role_id in role_ids:
+            members = roles.get(role_id)
+            if members is None:
+                continue
+
+            members.discard(member_id)
+            if not members:
+                del roles[role_id]
+
+    def update(self, before, after):
+        old_key = self._keys.get(after.id)
+        if old_key is None:
+            self.add(after)
+            return
+
+        new_key = self._key(after)
+        if old_key != new_key:
+            self._keys[after.id] = new_key
+            self.counts[old_key] -= 1
+            self.counts[new_key] += 1
+
+        # This is called for every presence change, so the common case of
+        # the roles not changing has to be cheap.
+        before_roles, after_roles = _role_ids(before), _role_ids(after)
+        if before_roles is after_roles or before_roles == after_roles:
+            return
+
+        before_roles, after_roles = set(before_roles), set(after_roles)
+        self._remove_roles(after.id, before_roles - after_roles)
+
+        roles = self._roles
+        for role_id in after_roles - before_roles:
+            roles[role_id].add(after.id)
+
+    def remove_role(self, role):
+        self._roles.pop(role.id, None)
+
+    def role_count(self, role):
+        if role.is_default():
+            return len(self._keys)
+
+        members = self._roles.get(role.id)
+        return len(members) if members else 0
+
+    def role_member_ids(self, role):
+        """Returns the set of IDs of the members that have a given role.
+
+        The set must not be modified.
+        """
+        if role.is_default():
+            return self._keys.keys()
+
+        return self._roles.get(role.id) or frozenset()
+
+    def role_members(self, role):
+        get_member = role.guild.get_member
+        members = map(get_member, self.role_member_ids(role))
+        return [m for m in members if m is not None]
+
+
+class MemberStats:
+    """Keeps track of the member counts of every guild the bot is in.
+
+    A guild's counts are only made the first time they're needed, after
+    which they're kept up to date by the bot's member events.
+    """
+
+    def __init__(self):
+        self._guilds = {}
+
+    def __len__(self):
+        return len(self._guilds)
+
+    def get(self, guild):
+        try:
+            return self._guilds[guild.id]
+        except KeyError:
+            stats = self._guilds[guild.id] = GuildMemberStats(guild.members)
+            return stats
+
+    def drop(self, guild):
+        self._guilds.pop(guild.id, None)
+
+    def clear(self):
+        self._guilds.clear()
+
+    def _get_built(self, guild):
+        # Guilds that haven't been built yet don't need to be updated, as
+        # they'll be up to date when they're built.
+        return self._guilds.get(guild.id)
+
+    def member_join(self, member):
+        stats = self._get_built(member.guild)
+        if stats is not None:
+            stats.add(member)
+
+    def member_remove(self, member):
+        stats = self._get_built(member.guild)
+        if stats is not None:
+            stats.remove(member)
+
+    def member_update(self, before, after):
+        stats = self._get_built(after.guild)
+        if stats is not None:
+            stats.update(before, after)
+
+    def role_delete(self, role):
+        stats = self._get_built(role.guild)
+        if stats is not None:
+            stats.remove_role(role)
@@ -1,17 +1,22 @@
 import asyncio
 import collections
+import collections.abc
 import contextlib
 import functools
 import itertools
+import logging
 import re
+import time
 
 import discord
 from discord.ext import commands
-from more_itertools import chunked, consume, iter_except, unique_everseen
+from more_itertools import consume, iter_except, unique_everseen
 
 from .misc import maybe_awaitable
 from .queue import SimpleQueue
 
+log = logging.getLogger(__name__)
+
 
 _Trigger = collections.namedtuple('_Trigger', 'emoji pattern blocking fallback')
 
@@ -45,12 +50,50 @@ paginated = functools.partial(
 _validate_context = paginated()(lambda: 0).__commands_checks__[0]
 
 
-class _TriggerCooldown(commands.CooldownMapping):
-    def __init__(self):
-        super().__init__(commands.Cooldown(rate=5, per=2, type=commands.BucketType.user))
+class _TriggerCooldown:
+    """Cooldowns for triggers, keyed by (message_id, user_id).
+
+    A CooldownMapping never gets rid of its buckets, which means one is made
+    for every paginator anyone has ever reacted to. Instead, the buckets are
+    kept in two generations. Every `lifetime` seconds, the current generation
+    becomes the old one and the old one is thrown out. Buckets that are used
+    in the old generation are moved to the current one.
+
+    `lifetime` must be longer than the cooldown's `per`, otherwise a bucket
+    could be thrown out while it's still rate-limited.
+    """
+
+    def __init__(self, rate=5, per=2, *, lifetime=60):
+        self._cooldown = commands.Cooldown(rate=rate, per=per, type=commands.BucketType.user)
+        self._lifetime = lifetime
+        self._current = {}
+        self._previous = {}
+        self._rotated_at = time.monotonic()
+
+    def __len__(self):
+        return len(self._current) + len(self._previous)
+
+    def _maybe_rotate(self):
+        now = time.monotonic()
+        elapsed = now - self._rotated_at
+        if elapsed < self._lifetime:
+            return
 
-    def _bucket_key(self, tup):
-        return tup
+        # If nothing was used for two whole lifetimes, everything is stale.
+        self._previous = self._current if elapsed < self._lifetime * 2 else {}
+        self._current = {}
+        self._rotated_at = now
+
+    def get_bucket(self, key):
+        self._maybe_rotate()
+        try:
+            return self._current[key]
+        except KeyError:
+            pass
+
+        bucket = self._previous.pop(key, None) or self._cooldown.copy()
+        self._current[key] = bucket
+        return bucket
 
     def is_rate_limited(self, message_id, user_id):
         bucket = self.get_bucket((message_id, user_id))
@@ -59,6 +102,11 @@ class _TriggerCooldown(commands.CooldownMapping):
 _trigger_cooldown = _TriggerCooldown()
 
 
+def trigger_cooldown_count():
+    """Return the number of trigger cooldown buckets being kept around."""
+    return len(_trigger_cooldown)
+
+
 class _Callback(collections.namedtuple('_Callback', 'func blocking')):
     """Wrapper class to store both the resolved descriptor and blocking
     attribute."""
@@ -71,6 +119,94 @@ class _Callback(collections.namedtuple('_Callback', 'func blocking')):
         return self.func.__doc__
 
 
+def _compile_triggers(triggers):
+    # Combine all the patterns into one regex so that we only need to do
+    # one match per message, rather than one for every pattern. Named groups
+    # are used to figure out which pattern was matched.
+    if not triggers:
+        return None, {}
+
+    callbacks = {}
+    patterns = []
+    for i, (pattern, callback) in enumerate(triggers):
+        name = f'_trigger{i}'
+        callbacks[name] = callback
+        patterns.append(f'(?P<{name}>{pattern})')
+
+    return re.compile('|'.join(patterns)), callbacks
+
+
+class InteractiveSessionRouter:
+    """Sends reactions and messages to the interactive sessions they're for.
+
+    Sessions are looked up by their message's ID for reactions, and by their
+    channel's ID for messages. Otherwise every reaction and message would go
+    through every session that's currently running.
+
+    This is added to the bot as a cog the first time a session is run.
+    """
+
+    def __init__(self):
+        # These map to sets because sessions can share a channel, and
+        # sometimes even a message (e.g. a menu that opens a sub-menu).
+        self._by_message = collections.defaultdict(set)
+        self._by_channel = collections.defaultdict(set)
+
+    @property
+    def session_count(self):
+        return sum(map(len, self._by_channel.values()))
+
+    def add(self, session):
+        self._by_channel[session._channel.id].add(session)
+
+    def add_reactions(self, session):
+        self._by_message[session._message.id].add(session)
+
+    @staticmethod
+    def _discard(mapping, key, session):
+        sessions = mapping.get(key)
+        if sessions is None:
+            return
+
+        sessions.discard(session)
+        if not sessions:
+            del mapping[key]
+
+    def remove(self, session):
+        if session._message is not None:
+            self._discard(self._by_message, session._message.id, session)
+        self._discard(self._by_channel, session._channel.id, session)
+
+    @staticmethod
+    async def _dispatch(sessions, method, *args):
+        if not sessions:
+            return
+
+        # Sessions can stop while we're going through them.
+        for session in list(sessions):
+            # One broken session shouldn't stop the others from getting the event.
+            try:
+                await getattr(session, method)(*args)
+            except Exception:
+                log.exception('%s failed in %r', method, session)
+
+    async def on_reaction_add(self, reaction, user):
+        sessions = self._by_message.get(reaction.message.id)
+        await self._dispatch(sessions, '_on_reaction', reaction, user)
+
+    async def on_message(self, message):
+        sessions = self._by_channel.get(message.channel.id)
+        await self._dispatch(sessions, '_on_message', message)
+
+
+def _get_router(bot):
+    router = bot.get_cog('InteractiveSessionRouter')
+    if router is None:
+        router = InteractiveSessionRouter()
+        bot.add_cog(router)
+    return router
+
+
 class InteractiveSession:
     r"""Base class for all interactive sessions.
 
@@ -90,6 +226,10 @@ class InteractiveSession:
     A page should either return a discord.Embed, or None if to indicate
     the page was invalid somehow. e.g. The page number given was out of
     bounds, or there were side effects associated with it.
+
+    Subclasses that need to handle input other than the triggers can
+    override 'on_message', which is called for every message in the
+    session's channel that didn't match a trigger.
     """
 
     # TODO: Context-less __init__
@@ -112,6 +252,9 @@ class InteractiveSession:
         # Might be refactored out later, but this is the simplest solution.
         self._using_reactions = False
 
+        # (compiled pattern, {group name: callback}) of the current run
+        self._triggers = None, {}
+
     def __init_subclass__(cls, *, stop_emoji='\N{BLACK SQUARE FOR STOP}', stop_pattern=None, stop_fallback='exit', **kwargs):
         super().__init_subclass__(**kwargs)
         cls._reaction_map = callbacks = collections.OrderedDict()
@@ -155,6 +298,9 @@ class InteractiveSession:
                 seen_patterns.add(fallback)
                 message_fallbacks.append((fallback, callback))
 
+        cls._compiled_callbacks = _compile_triggers(message_callbacks)
+        cls._compiled_fallbacks = _compile_triggers(message_callbacks + message_fallbacks)
+
     def using_reactions(self):
         """Return True if reactions are being used for the current
         session, False otherwise.
@@ -210,53 +356,17 @@ class InteractiveSession:
             raise RuntimeError('start() must set self._message')
 
         message = self._message
-        triggers = self._message_callbacks.copy()
         task = None
-        listeners = []
-
-        def listen(func):
-            listeners.append(func)
-            return self._bot.listen()(func)
+        router = _get_router(self._bot)
 
         if using_reactions:
             task = self._bot.loop.create_task(self.add_reactions())
-
-            @listen
-            async def on_reaction_add(reaction, user):
-                if (
-                    not self._blocking
-                    and reaction.message.id == message.id
-                    and user.id in self._users
-                    and self.check(reaction, user)
-                    and not _trigger_cooldown .is_rate_limited(message.id, user.id)
-                ):
-                    callback, self._blocking = self._reaction_map[reaction.emoji]
-                    cleanup = functools.partial(message.remove_reaction, reaction.emoji, user)
-                    await self._queue.put((callback, cleanup))
+            self._triggers = self._compiled_callbacks
+            router.add_reactions(self)
         else:
-            triggers.extend(self._message_fallbacks)
-
-        if triggers:
-            @listen
-            async def on_message(msg):
-                if (
-                    self._blocking
-                    or msg.channel != self._channel
-                    or msg.author.id not in self._users
-                ):
-                    return
-
-                patterns, callbacks = zip(*triggers)
-                selectors = map(re.fullmatch, patterns, itertools.repeat(msg.content))
-                callback = next(itertools.compress(callbacks, selectors), None)
-                if callback is None:
-                    return
-
-                if _trigger_cooldown.is_rate_limited(message.id, msg.author.id):
-                    return
-
-                callback, self._blocking = callback
-                await self._queue.put((callback, msg.delete))
+            self._triggers = self._compiled_fallbacks
+
+        router.add(self)
 
         try:
             while True:
@@ -289,9 +399,7 @@ class InteractiveSession:
 
         finally:
             self._using_reactions = False
-
-            for listener in listeners:
-                self._bot.remove_listener(listener)
+            router.remove(self)
 
             if not (task is None or task.done()):
                 task.cancel()
@@ -301,22 +409,295 @@ class InteractiveSession:
 
     interact = run  # backwards compat
 
+    async def _on_reaction(self, reaction, user):
+        message = self._message
+        if (
+            not self._blocking
+            and user.id in self._users
+            and self.check(reaction, user)
+            and not _trigger_cooldown.is_rate_limited(message.id, user.id)
+        ):
+            callback, self._blocking = self._reaction_map[reaction.emoji]
+            cleanup = functools.partial(message.remove_reaction, reaction.emoji, user)
+            await self._queue.put((callback, cleanup))
+
+    async def _on_message(self, message):
+        if self._blocking or message.author.id not in self._users:
+            return
+
+        pattern, callbacks = self._triggers
+        match = pattern and pattern.fullmatch(message.content)
+        if not match:
+            await self.on_message(message)
+            return
+
+        if _trigger_cooldown.is_rate_limited(self._message.id, message.author.id):
+            return
+
+        callback, self._blocking = callbacks[match.lastgroup]
+        await self._queue.put((callback, message.delete))
+
+    async def on_message(self, message):
+        """Called when a message in the session's channel didn't match any
+        of the triggers."""
+
     @property
     def reaction_help(self):
         return '\n'.join(itertools.starmap('{0} => {1.__doc__}'.format, self._reaction_map.items()))
 
 
+# ------------- Page sources --------------
+
+class PageSource:
+    """Base class for the things that give a Paginator its pages.
+
+    Pages are only made when the paginator needs them, and the last few
+    are cached. This is so that paginating thousands of entries doesn't
+    require formatting every single one of them up front.
+
+    Subclasses must implement '_get_entries'.
+    """
+    # How many formatted pages to keep around.
+    cache_size = 5
+
+    def __init__(self, *, per_page=15, format_entry=None, numbered=False):
+        self.per_page = per_page
+        self._format_entry = format_entry
+        self._numbered = numbered
+        self._cache = collections.OrderedDict()
+
+    @property
+    def page_count(self):
+        """The number of pages, or None if that isn't known yet."""
+        return None
+
+    @property
+    def entry_count(self):
+        """The number of entries, or None if that isn't known yet."""
+        return None
+
+    async def _get_entries(self, index):
+        """Return the raw entries at a given page, or an empty sequence
+        if the page is out of bounds."""
+        raise NotImplementedError
+
+    async def get_page_count(self):
+        """Return the number of pages, doing whatever it takes to find it."""
+        return self.page_count
+
+    def format_page(self, index, entries):
+        format_entry = self._format_entry
+        if format_entry is not None:
+            entries = map(format_entry, entries)
+
+        if self._numbered:
+            start = index * self.per_page + 1
+            entries = itertools.starmap('{0}. {1}'.format, enumerate(entries, start))
+
+        return list(entries)
+
+    async def get_page(self, index):
+        """Return the formatted entries at a given page.
+
+        None if the index is out of bounds.
+        """
+        count = self.page_count
+        if index < 0 or count is not None and index >= count:
+            return None
+
+        cache = self._cache
+        try:
+            page = cache[index]
+        except KeyError:
+            pass
+        else:
+            cache.move_to_end(index)
+            return page
+
+        entries = await self._get_entries(index)
+        if not entries:
+            return None
+
+        page = cache[index] = self.format_page(index, entries)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return page
+
+
+class ListPageSource(PageSource):
+    """Page source for a sequence of entries."""
+
+    def __init__(self, entries, **kwargs):
+        super().__init__(**kwargs)
+        self.entries = entries
+
+    @property
+    def page_count(self):
+        return -(-len(self.entries) // self.per_page)
+
+    @property
+    def entry_count(self):
+        return len(self.entries)
+
+    async def _get_entries(self, index):
+        start = index * self.per_page
+        return self.entries[start:start + self.per_page]
+
+
+class IteratorPageSource(PageSource):
+    """Page source for an iterator or an async iterator.
+
+    Entries are only taken out of the iterator when a page that needs
+    them is requested.
+    """
+
+    def __init__(self, iterable, **kwargs):
+        super().__init__(**kwargs)
+        if hasattr(iterable, '__aiter__'):
+            self._aiterator = iterable.__aiter__()
+            self._iterator = None
+        else:
+            self._aiterator = None
+            self._iterator = iter(iterable)
+
+        # The raw entries of every page that was taken out so far. These
+        # can't be thrown out because an iterator can't go back.
+        self._pages = []
+        self._exhausted = False
+
+    @property
+    def page_count(self):
+        return len(self._pages) if self._exhausted else None
+
+    @property
+    def entry_count(self):
+        return sum(map(len, self._pages)) if self._exhausted else None
+
+    async def _take_page(self):
+        per_page = self.per_page
+        if self._iterator is not None:
+            page = list(itertools.islice(self._iterator, per_page))
+        else:
+            page = []
+            with contextlib.suppress(StopAsyncIteration):
+                while len(page) < per_page:
+                    page.append(await self._aiterator.__anext__())
+
+        if len(page) < per_page:
+            self._exhausted = True
+        return page
+
+    async def _fill(self, index):
+        while len(self._pages) <= index and not self._exhausted:
+            page = await self._take_page()
+            if page:
+                self._pages.append(page)
+
+    async def _get_entries(self, index):
+        await self._fill(index)
+        return self._pages[index] if index < len(self._pages) else ()
+
+    async def get_page_count(self):
+        await self._fill(float('inf'))
+        return len(self._pages)
+
+
+class QueryPageSource(PageSource):
+    """Page source for a database query.
+
+    This uses keyset pagination, i.e. the next page is fetched with
+    "WHERE key > <last key of the current page>" instead of an OFFSET.
+    This lets the DB use an index to find where the page starts, rather
+    than going through every row before it.
+
+    The query must not have an ORDER BY, and key must be a column that is
+    unique in the query's results.
+    """
+
+    def __init__(self, pool, query, *args, key, **kwargs):
+        super().__init__(**kwargs)
+        self._pool = pool
+        self._args = args
+        self._key = key
+
+        n = len(args)
+        self._first_query = (
+            f'SELECT * FROM ({query}) AS q '
+            f'ORDER BY q.{key} LIMIT {self.per_page} OFFSET ${n + 1};'
+        )
+        self._after_query = (
+            f'SELECT * FROM ({query}) AS q WHERE q.{key} > ${n + 1} '
+            f'ORDER BY q.{key} LIMIT {self.per_page} OFFSET ${n + 2};'
+        )
+        self._count_query = f'SELECT COUNT(*) FROM ({query}) AS q;'
+
+        # The key of the last row of each page, in order. Only contiguous
+        # pages from the start are here, as they're needed for the keyset.
+        self._boundaries = []
+        self._entry_count = None
+
+    @property
+    def page_count(self):
+        if self._entry_count is None:
+            return None
+        return -(-self._entry_count // self.per_page)
+
+    @property
+    def entry_count(self):
+        return self._entry_count
+
+    async def _get_entries(self, index):
+        per_page, boundaries = self.per_page, self._boundaries
+
+        # Start from the closest page we know the end of. If we have to skip
+        # some pages, an OFFSET from there is still much cheaper than
+        # fetching every page in between.
+        anchor = min(index, len(boundaries))
+        offset = (index - anchor) * per_page
+        if anchor:
+            rows = await self._pool.fetch(self._after_query, *self._args, boundaries[anchor - 1], offset)
+        else:
+            rows = await self._pool.fetch(self._first_query, *self._args, offset)
+
+        if rows and index == len(boundaries):
+            boundaries.append(rows[-1][self._key])
+
+        if len(rows) < per_page and (rows or index == 0):
+            self._entry_count = index * per_page + len(rows)
+
+        return rows
+
+    async def get_page_count(self):
+        if self._entry_count is None:
+            self._entry_count = await self._pool.fetchval(self._count_query, *self._args)
+        return self.page_count
+
+
+def _page_source(entries, **kwargs):
+    if isinstance(entries, PageSource):
+        return entries
+    if isinstance(entries, collections.abc.Sequence):
+        return ListPageSource(entries, **kwargs)
+    return IteratorPageSource(entries, **kwargs)
+
+
 # ------------- Paginator --------------
 
 class Paginator(InteractiveSession):
     """Class that takes an iterable of entries and paginates them.
 
     This is what often comes to mind when people talk about 'paginators'
+
+    entries can be a sequence, an iterator, an async iterator or a
+    PageSource. Entries are formatted with format_entry (if given)
+    only when the page they're on is shown.
     """
-    def __init__(self, ctx, entries, *, per_page=15, title=discord.Embed.Empty, colour=None, **kwargs):
+    def __init__(self, ctx, entries, *, per_page=15, title=discord.Embed.Empty, colour=None,
+                 format_entry=None, numbered=False, **kwargs):
         super().__init__(ctx, **kwargs)
-        self._pages = tuple(chunked(entries, per_page))
+        self._source = _page_source(entries, per_page=per_page, format_entry=format_entry, numbered=numbered)
         self._index = 0
+        self._single_page = False
 
         if colour is None:
             colour = ctx.bot.colour
@@ -327,14 +708,23 @@ class Paginator(InteractiveSession):
 
     def single_page(self):
         """Return True if there is only one page, False otherwise"""
-        return len(self._pages) == 1
+        return self._single_page
 
     def small(self):
         """Return True if there are five pages or less, False otherwise"""
-        return len(self._pages) <= 5
+        count = self._source.page_count
+        return count is not None and count <= 5
 
     async def start(self):
         await super().start()
+
+        count = self._source.page_count
+        if count is None:
+            # Only fetch one more page to know if we need to paginate at all.
+            self._single_page = await self._source.get_page(1) is None
+        else:
+            self._single_page = count <= 1
+
         if self.single_page():
             # Don't even start paginating if there is only one page.
             await self.stop()
@@ -354,51 +744,59 @@ class Paginator(InteractiveSession):
             if not (small and emoji in fast_forwards):
                 await self._message.add_reaction(emoji)
 
+    def _page_footer(self):
+        count, total = self._source.page_count, self.total
+        footer = f'Page: {self._index + 1} / {"?" if count is None else count}'
+        return footer if total is None else f'{footer} ({total} total)'
+
     # Main methods
     def create_embed(self, page):
         """Create an embed given a slice of entries"""
 
         return (discord.Embed(title=self.title, colour=self.colour, description='\n'.join(page))
-                .set_footer(text=f'Page: {self._index + 1} / {len(self._pages)} ({self.total} total)')
+                .set_footer(text=self._page_footer())
                 )
 
-    def page_at(self, idx):
+    async def page_at(self, idx):
         """Return the embed that would be created at a certain point.
 
         None if the index is out of bounds.
         """
-        if not 0 <= idx < len(self._pages):
+        page = await self._source.get_page(idx)
+        if page is None:
             return None
 
         self._index = idx
-        return self.create_embed(self._pages[idx])
+        return self.create_embed(page)
 
     @trigger('\N{BLACK LEFT-POINTING DOUBLE TRIANGLE WITH VERTICAL BAR}', fallback=r'\<\<')
-    def default(self):
+    async def default(self):
         """First page"""
-        return self.page_at(0)
+        return await self.page_at(0)
 
     @trigger('\N{BLACK LEFT-POINTING TRIANGLE}', fallback=r'\<')
-    def previous(self):
+    async def previous(self):
         """Previous page"""
-        return self.page_at(self._index - 1)
+        return await self.page_at(self._index - 1)
 
     @trigger('\N{BLACK RIGHT-POINTING TRIANGLE}', fallback=r'\>')
-    def next(self):
+    async def next(self):
         """Next page"""
-        return self.page_at(self._index + 1)
+        return await self.page_at(self._index + 1)
 
     @trigger('\N{BLACK RIGHT-POINTING DOUBLE TRIANGLE WITH VERTICAL BAR}', fallback=r'\>\>')
-    def last(self):
+    async def last(self):
         """Last page"""
-        return self.page_at(len(self._pages) - 1)
+        return await self.page_at(await self._source.get_page_count() - 1)
 
     # --------- Go-to page ------------
 
     def _goto_embed(self):
         ctx = self.context
+        count = self._source.page_count
+        numbers = 'a page number' if count is None else f'a number from 1 to {count}'
         description = (
-            f'Please enter a number from 1 to {len(self._pages)}.\n\n'
+            f'Please enter {numbers}.\n\n'
             'To cancel, click \N{INPUT SYMBOL FOR NUMBERS} again.'
         )
         return (discord.Embed(colour=self.colour, description=description)
@@ -411,7 +809,10 @@ class Paginator(InteractiveSession):
         except ValueError:
             return None
 
-        return self.page_at(index - 1)
+        count = self._source.page_count
+        if index < 1 or count is not None and index > count:
+            return None
+        return index - 1
 
     # XXX: This needs to be fully refactored for the reaction-less paginator
     #      or possibly not used at all.
@@ -420,26 +821,24 @@ class Paginator(InteractiveSession):
     async def goto(self):
         """Go to page"""
         ctx = self.context
-        return_result = None
+        index = None
         user_message = None
 
         def check(m):
-            nonlocal return_result, user_message
-            if not (m.channel.id == self._channel.id and m.author.id == ctx.author.id):
+            nonlocal index, user_message
+            if m.author.id != ctx.author.id:
                 return False
 
             result = self._goto_parse_input(m.content)
             if result is None:
                 return False
 
-            return_result = result
+            index = result
             user_message = m
             return True
 
         def remove_check(reaction, user):
-            return (reaction.message.id == self._message.id
-                    and user.id == ctx.author.id
-                    and reaction.emoji == '\N{INPUT SYMBOL FOR NUMBERS}')
+            return user.id == ctx.author.id and reaction.emoji == '\N{INPUT SYMBOL FOR NUMBERS}'
 
         # The two futures are such that so the user doesn't get "stuck" in the
         # number page. If they click on the number page by accident, then they
@@ -449,9 +848,10 @@ class Paginator(InteractiveSession):
         # 1. The actual number of the page they want to go to
         # 2. The removal of the numbered reaction if the user wants to go back
 
+        wait_for = self._bot.wait_for_keyed
         to_wait = [
-            self._bot.wait_for('message', check=check),
-            self._bot.wait_for('reaction_remove', check=remove_check),
+            wait_for('message', self._channel.id, check=check),
+            wait_for('reaction_remove', self._message.id, check=remove_check),
         ]
 
         try:
@@ -473,7 +873,7 @@ class Paginator(InteractiveSession):
             result = done.pop().result()
 
             if isinstance(result, discord.Message):
-                return return_result
+                return await self.page_at(index)
             # The user probably removed a reaction.
             return None
         finally:
@@ -485,8 +885,11 @@ class Paginator(InteractiveSession):
 
     @property
     def total(self):
-        """Return the total number of entries in the list"""
-        return sum(map(len, self._pages))
+        """Return the total number of entries in the list
+
+        None if that isn't known yet.
+        """
+        return self._source.entry_count
 
 # -------------- Field Pages ----------------------
 
@@ -496,12 +899,13 @@ class FieldPaginator(Paginator):
         super().__init__(context, entries, **kwargs)
 
         self.inline = inline
-        if len(self._pages) > 25:
+        count = self._source.page_count
+        if count is not None and count > 25:
             raise ValueError("too many fields per page (maximum 25)")
 
     def create_embed(self, page):
         embed = (discord.Embed(title=self.title, colour=self.colour)
-                 .set_footer(text=f'Page: {self._index + 1} / {len(self._pages)} ({self.total} total)')
+                 .set_footer(text=self._page_footer())
                  )
 
         add_field = functools.partial(embed.add_field, inline=self.inline)
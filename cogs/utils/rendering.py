@@ -0,0 +1,138 @@
+"""Bot-wide service for CPU-heavy work, mostly image rendering.
+
+Rendering in the default thread pool means the pure-Python parts are
+serialised by the GIL, and one big render can slow down the event loop.
+Jobs here are run in a process pool instead.
+
+Jobs must be module-level functions, and should take compact state
+(a FEN, a board as lists) and return encoded bytes, as everything has to
+be pickled to get to and from the worker processes.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import os
+
+__all__ = ['RenderService', 'cancel', 'run', 'shutdown', 'stats']
+
+# The number of jobs of a given type that can be in the pool at once, so
+# that one busy game can't starve everything else.
+JOB_LIMITS = {
+    'chess': 4,
+    'dots-and-boxes': 2,
+    'silhouette': 2,
+    'colour': 2,
+    'minesweeper': 2,
+    'connect-4': 2,
+    'checkers': 2,
+    # Only used to fill the puzzle pool in the background, so there's no
+    # need for this to take up more than one worker.
+    'sudoku': 1,
+}
+DEFAULT_JOB_LIMIT = 2
+
+
+class JobStats(collections.namedtuple('JobStats', 'queued running completed')):
+    __slots__ = ()
+
+
+class RenderService:
+    def __init__(self, *, max_workers=None, limits=JOB_LIMITS):
+        self._max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._limits = limits
+        self._executor = None
+        self._semaphores = {}
+        # group -> set of tasks, so they can be cancelled together.
+        self._groups = collections.defaultdict(set)
+
+        self._queued = collections.Counter()
+        self._running = collections.Counter()
+        self._completed = collections.Counter()
+
+    def _get_executor(self):
+        # The pool is only made when it's needed, so that the worker
+        # processes aren't started for nothing.
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(self._max_workers)
+        return self._executor
+
+    def _get_semaphore(self, job_type):
+        try:
+            return self._semaphores[job_type]
+        except KeyError:
+            limit = self._limits.get(job_type, DEFAULT_JOB_LIMIT)
+            semaphore = self._semaphores[job_type] = asyncio.Semaphore(limit)
+            return semaphore
+
+    async def _run(self, job_type, func, args):
+        semaphore = self._get_semaphore(job_type)
+
+        self._queued[job_type] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._queued[job_type] -= 1
+
+        self._running[job_type] += 1
+        try:
+            # If this gets cancelled while the job is still waiting in the
+            # pool, wrap_future makes sure it never gets run.
+            result = await asyncio.wrap_future(self._get_executor().submit(func, *args))
+        finally:
+            self._running[job_type] -= 1
+            semaphore.release()
+
+        self._completed[job_type] += 1
+        return result
+
+    def run(self, job_type, func, *args, group=None):
+        """Run func(*args) in the pool, returning a task for its result.
+
+        If a group is given, the job can be cancelled with everything else
+        in the group through cancel(group), e.g. when a game ends.
+        """
+        task = asyncio.ensure_future(self._run(job_type, func, args))
+        if group is not None:
+            jobs = self._groups[group]
+            jobs.add(task)
+            task.add_done_callback(lambda t: self._discard(group, t))
+        return task
+
+    def _discard(self, group, task):
+        jobs = self._groups.get(group)
+        if jobs is None:
+            return
+
+        jobs.discard(task)
+        if not jobs:
+            del self._groups[group]
+
+    def cancel(self, group):
+        """Cancel all the unfinished jobs in a group."""
+        for task in self._groups.pop(group, ()):
+            task.cancel()
+
+    def stats(self):
+        """Return a dict of job type -> JobStats"""
+        types = set(self._queued) | set(self._running) | set(self._completed)
+        return {
+            t: JobStats(self._queued[t], self._running[t], self._completed[t])
+            for t in sorted(types)
+        }
+
+    def shutdown(self):
+        for group in list(self._groups):
+            self.cancel(group)
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+_service = RenderService()
+
+run = _service.run
+cancel = _service.cancel
+stats = _service.stats
+shutdown = _service.shutdown
@@ -0,0 +1,237 @@
+"""Bot-wide tick driver for games that advance on a timer, e.g. races.
+
+Rather than every session sleeping in its own loop, sessions are added
+to one driver that ticks all of them from a single loop.
+
+Sessions that show their state by editing a message should go through
+edit() rather than editing it themselves. Edits are coalesced, so a
+message is edited at most once every EDIT_INTERVAL seconds with whatever
+the latest state is, and edits that wouldn't change anything are skipped.
+"""
+
+import asyncio
+import collections
+import copy
+import logging
+
+import discord
+
+__all__ = ['EditDispatcher', 'TickDriver', 'add', 'edit', 'finish', 'shutdown', 'wait']
+
+log = logging.getLogger(__name__)
+
+# Seconds between ticks
+TICK_INTERVAL = 1
+
+# The minimum number of seconds between two edits to the same message
+EDIT_INTERVAL = 2
+
+
+class _Registration(collections.namedtuple('_Registration', 'every start future')):
+    __slots__ = ()
+
+
+class TickDriver:
+    def __init__(self, *, interval=TICK_INTERVAL):
+        self._interval = interval
+        self._ticks = 0
+        self._task = None
+        # session -> _Registration
+        self._sessions = {}
+        # tick -> futures to be woken up on that tick
+        self._waiters = collections.defaultdict(list)
+
+    def _ensure_running(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        next_tick = loop.time()
+        try:
+            while self._sessions or self._waiters:
+                # Ticks are kept on a fixed schedule, so a slow tick doesn't
+                # push all the ones after it back.
+                next_tick += self._interval
+                await asyncio.sleep(max(0, next_tick - loop.time()))
+                self._ticks += 1
+                self._tick()
+        finally:
+            self._task = None
+
+    def _tick(self):
+        ticks = self._ticks
+        for future in self._waiters.pop(ticks, ()):
+            if not future.done():
+                future.set_result(None)
+
+        for session, (every, start, future) in list(self._sessions.items()):
+            if future.done() or (ticks - start) % every:
+                continue
+
+            try:
+                finished = session.tick()
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                if finished:
+                    future.set_result(None)
+
+    def add(self, session, *, every=1):
+        """Tick a session every `every` ticks until it's finished.
+
+        The session's tick() method is called on each of its ticks, and
+        should return True once the session is finished. This returns a
+        future that's done when that happens. Cancelling the future stops
+        the session from being ticked.
+
+        Sessions added at different times get ticked on different ticks,
+        so they don't all do their work at once.
+        """
+        future = asyncio.get_event_loop().create_future()
+        registration = self._sessions[session] = _Registration(every, self._ticks, future)
+
+        def remove(_):
+            if self._sessions.get(session) is registration:
+                del self._sessions[session]
+        future.add_done_callback(remove)
+
+        self._ensure_running()
+        return future
+
+    def wait(self, ticks=1):
+        """Wait until the `ticks`-th tick from now.
+
+        As the current tick has already started, this waits somewhere
+        between ticks - 1 and ticks intervals.
+        """
+        future = asyncio.get_event_loop().create_future()
+        self._waiters[self._ticks + ticks].append(future)
+        self._ensure_running()
+        return future
+
+    def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+
+        for _, _, future in self._sessions.values():
+            future.cancel()
+        for futures in self._waiters.values():
+            for future in futures:
+                future.cancel()
+        self._sessions.clear()
+        self._waiters.clear()
+
+
+class _MessageState:
+    __slots__ = ('message', 'pending', 'sent', 'last_edit', 'task')
+
+    def __init__(self, message):
+        self.message = message
+        # The latest fields that haven't been sent yet, or None.
+        self.pending = None
+        # What the message was last edited to.
+        self.sent = None
+        self.last_edit = float('-inf')
+        self.task = None
+
+
+def _snapshot(fields):
+    # Embeds are usually edited in place, so they have to be copied to
+    # tell whether they changed since the last edit. to_dict() alone isn't
+    # enough, as it shares the embed's list of fields.
+    return {
+        k: copy.deepcopy(v.to_dict()) if isinstance(v, discord.Embed) else v
+        for k, v in fields.items()
+    }
+
+
+class EditDispatcher:
+    def __init__(self, *, interval=EDIT_INTERVAL):
+        self._interval = interval
+        # message id -> _MessageState
+        self._messages = {}
+
+    def edit(self, message, **fields):
+        """Edit a message with the fields (e.g. embed) given.
+
+        The edit doesn't happen right away. If the message was edited less
+        than EDIT_INTERVAL seconds ago, the edit is held back until then, and
+        any newer edits made in the meantime replace it.
+
+        If the message was deleted, it gets sent again, and any edits to
+        it from then on go to the new message.
+        """
+        state = self._messages.get(message.id)
+        if state is None:
+            state = self._messages[message.id] = _MessageState(message)
+
+        state.pending = fields
+        if state.task is None:
+            state.task = asyncio.ensure_future(self._flush(state))
+
+    async def _flush(self, state):
+        loop = asyncio.get_event_loop()
+        try:
+            while state.pending is not None:
+                delay = state.last_edit + self._interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                fields, state.pending = state.pending, None
+                snapshot = _snapshot(fields)
+                if snapshot == state.sent:
+                    continue
+
+                try:
+                    try:
+                        await state.message.edit(**fields)
+                    except discord.NotFound:
+                        state.message = await state.message.channel.send(**fields)
+                except discord.HTTPException:
+                    log.exception('Failed to edit message %d', state.message.id)
+                    continue
+
+                state.sent = snapshot
+                state.last_edit = loop.time()
+        finally:
+            state.task = None
+
+    async def finish(self, message):
+        """Wait for the last edit to a message to go through, and stop
+        keeping track of it.
+
+        This returns the message that was last edited, which is a new
+        message if the original one got deleted.
+        """
+        state = self._messages.get(message.id)
+        if state is None:
+            return message
+
+        if state.task is not None:
+            await asyncio.shield(state.task)
+
+        # Only forget about it if nothing else was edited while waiting.
+        if state.task is None:
+            self._messages.pop(message.id, None)
+        return state.message
+
+    def shutdown(self):
+        for state in self._messages.values():
+            if state.task is not None:
+                state.task.cancel()
+        self._messages.clear()
+
+
+_driver = TickDriver()
+_dispatcher = EditDispatcher()
+
+add = _driver.add
+wait = _driver.wait
+edit = _dispatcher.edit
+finish = _dispatcher.finish
+
+
+def shutdown():
+    _driver.shutdown()
+    _dispatcher.shutdown()
@@ -17,8 +17,9 @@ import emoji
 from discord.ext import commands
 from more_itertools import always_iterable
 
-from cogs.utils import db
+from cogs.utils import db, rendering, ticker
 from cogs.utils.jsonf import JSONFile
+from cogs.utils.memberstats import MemberStats
 from cogs.utils.scheduler import DatabaseScheduler
 from cogs.utils.time import duration_units
 from cogs.utils.transformdict import CIDict
@@ -122,6 +123,20 @@ def _get_proper_activity(type, name, url=''):
     return discord.Activity(type=type, name=name)
 
 
+# Events that can be waited on with Chiaki.wait_for_keyed, along with how
+# to get the key from the event's arguments.
+_KEYED_EVENTS = {
+    'message': lambda message: message.channel.id,
+    'reaction_add': lambda reaction, user: reaction.message.id,
+    'reaction_remove': lambda reaction, user: reaction.message.id,
+    'raw_reaction_add': lambda payload: payload.message_id,
+    'raw_reaction_remove': lambda payload: payload.message_id,
+}
+
+def _always_true(*args):
+    return True
+
+
 VersionInfo = collections.namedtuple('VersionInfo', 'major minor micro releaselevel serial')
 
 
@@ -144,6 +159,13 @@ class Chiaki(commands.AutoShardedBot):
 
         self.message_counter = 0
         self.command_counter = collections.Counter()
+        self.member_stats = MemberStats()
+        # Bumped every time an extension is (un)loaded, so things that are
+        # built from the bot's commands know when to rebuild themselves.
+        self.extension_generation = 0
+
+        # (event, key) -> [(future, check)]
+        self._keyed_listeners = collections.defaultdict(list)
         self.custom_prefixes = JSONFile('customprefixes.json')
 
         self.reset_requested = False
@@ -211,6 +233,8 @@ class Chiaki(commands.AutoShardedBot):
     async def close(self):
         await self.session.close()
         self._game_task.cancel()
+        rendering.shutdown()
+        ticker.shutdown()
         await super().close()
 
     def add_cog(self, cog):
@@ -234,6 +258,8 @@ class Chiaki(commands.AutoShardedBot):
         return (name for _, name, is_pkg in pkgutil.iter_modules(path, spec.name + '.') if not is_pkg)
 
     def load_extension(self, name):
+        self.extension_generation += 1
+
         modules = self.find_extensions(name)
         if modules is None:
             super().load_extension(name)
@@ -257,6 +283,7 @@ class Chiaki(commands.AutoShardedBot):
         self.extensions[name] = importlib.import_module(name)
 
     def unload_extension(self, name):
+        self.extension_generation += 1
         super().unload_extension(name)
         # unload_extension removes the commands/cogs in submodules but not the
         # submodule itself.
@@ -264,6 +291,56 @@ class Chiaki(commands.AutoShardedBot):
             if _is_submodule(name, module_name):
                 del self.extensions[module_name]
 
+    def dispatch(self, event, *args, **kwargs):
+        super().dispatch(event, *args, **kwargs)
+
+        if not self._keyed_listeners:
+            return
+
+        get_key = _KEYED_EVENTS.get(event)
+        if get_key is None:
+            return
+
+        listeners = self._keyed_listeners.get((event, get_key(*args)))
+        if not listeners:
+            return
+
+        for future, check in list(listeners):
+            # Finished listeners are removed by wait_for_keyed.
+            if future.done():
+                continue
+
+            try:
+                result = check(*args)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                if result:
+                    future.set_result(args[0] if len(args) == 1 else args)
+
+    async def wait_for_keyed(self, event, key, *, check=None, timeout=None):
+        """Like wait_for, but only for the events with a certain key.
+
+        The key is the channel ID for messages, and the message ID for
+        reactions. Unlike wait_for, the check is only called on the events
+        that match the key, rather than on every single event. This matters
+        when there are hundreds of games waiting on messages at once.
+        """
+        if event not in _KEYED_EVENTS:
+            raise ValueError(f'{event!r} cannot be waited on with a key')
+
+        future = self.loop.create_future()
+        entry = future, check or _always_true
+
+        listeners = self._keyed_listeners[event, key]
+        listeners.append(entry)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            listeners.remove(entry)
+            if not listeners:
+                self._keyed_listeners.pop((event, key), None)
+
     @contextlib.contextmanager
     def temp_listener(self, func, name=None):
         """Context manager for temporary listeners"""
@@ -360,6 +437,8 @@ class Chiaki(commands.AutoShardedBot):
         print(self.user.id)
         print('------')
         self._import_emojis()
+        # We might've missed some events while we were disconnected.
+        self.member_stats.clear()
         self.db_scheduler.run()
 
         if not hasattr(self, 'appinfo'):
@@ -402,6 +481,32 @@ class Chiaki(commands.AutoShardedBot):
     async def on_message(self, message):
         await self.process_commands(message)
 
+    # These have to be in the bot rather than a cog, otherwise the counts
+    # would go out of date while the cog is being reloaded.
+    async def on_member_join(self, member):
+        self.member_stats.member_join(member)
+
+    async def on_member_remove(self, member):
+        self.member_stats.member_remove(member)
+
+    async def on_member_update(self, before, after):
+        self.member_stats.member_update(before, after)
+
+    async def on_guild_role_delete(self, role):
+        self.member_stats.role_delete(role)
+
+    async def on_guild_available(self, guild):
+        self.member_stats.drop(guild)
+
+    async def on_guild_unavailable(self, guild):
+        self.member_stats.drop(guild)
+
+    async def on_guild_join(self, guild):
+        self.member_stats.drop(guild)
+
+    async def on_guild_remove(self, guild):
+        self.member_stats.drop(guild)
+
     # ------ Viewlikes ------
 
     # Note these views and properties look deceptive. They look like a thin
@@ -112,9 +112,7 @@ class Context(commands.Context):
         author_id = author_id or self.author.id
 
         def check(data):
-            return (data.message_id == msg.id
-                    and data.user_id == author_id
-                    and is_valid_emoji(str(data.emoji)))
+            return data.user_id == author_id and is_valid_emoji(str(data.emoji))
 
         for em in emojis:
             await msg.add_reaction(em)
@@ -123,7 +121,7 @@ class Context(commands.Context):
             await self.release()
 
         try:
-            data = await self.bot.wait_for('raw_reaction_add', check=check, timeout=timeout)
+            data = await self.bot.wait_for_keyed('raw_reaction_add', msg.id, check=check, timeout=timeout)
             return str(data.emoji) == str(confirm_emoji)
         finally:
             if reacquire:
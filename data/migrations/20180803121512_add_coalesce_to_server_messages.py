@@ -0,0 +1,11 @@
+"""Created on 2018-08-03 12:15:12.613970 UTC
+
+Add coalesce to server_messages
+
+This lets servers put members that join or leave around the same
+time in a single message, rather than flooding the channel.
+"""
+
+
+upgrade_server_messages = 'ALTER TABLE server_messages ADD COLUMN IF NOT EXISTS coalesce BOOLEAN DEFAULT FALSE;'
+downgrade_server_messages = 'ALTER TABLE server_messages DROP COLUMN IF EXISTS coalesce;'
@@ -0,0 +1,30 @@
+"""Created on 2018-08-11 15:42:07.318254 UTC
+
+Add minesweeper_best_times
+
+This keeps each player's best time on every level, so that records and
+leaderboards don't have to go through every game ever played. Existing
+wins are copied over from minesweeper_games. Custom games (level 4)
+don't count towards records, so they're left out.
+"""
+
+
+upgrade_minesweeper_best_times = """
+CREATE TABLE IF NOT EXISTS minesweeper_best_times (
+user_id BIGINT NOT NULL,
+level SMALLINT NOT NULL,
+time REAL NOT NULL,
+played_at TIMESTAMP NOT NULL,
+PRIMARY KEY(user_id, level)
+);
+CREATE INDEX IF NOT EXISTS minesweeper_best_times_level_time_idx ON minesweeper_best_times (level, time);
+
+INSERT INTO minesweeper_best_times (user_id, level, time, played_at)
+SELECT DISTINCT ON (user_id, level) user_id, level, time, played_at
+FROM minesweeper_games
+WHERE won AND level != 4
+ORDER BY user_id, level, time, played_at
+ON CONFLICT (user_id, level) DO NOTHING;
+"""
+
+downgrade_minesweeper_best_times = 'DROP TABLE minesweeper_best_times'
@@ -0,0 +1,12 @@
+"""Created on 2018-08-18 13:45:12.482019 UTC
+
+Add difficulty to saved_sudoku_games
+
+The difficulty can't be told from the number of clues, as the harder
+difficulties overlap. Games saved before this are left as NULL, and
+their difficulty is guessed from the clues like before.
+"""
+
+
+upgrade_saved_sudoku_games = 'ALTER TABLE saved_sudoku_games ADD COLUMN IF NOT EXISTS difficulty TEXT;'
+downgrade_saved_sudoku_games = 'ALTER TABLE saved_sudoku_games DROP COLUMN IF EXISTS difficulty;'